@@ -0,0 +1,273 @@
+"""
+Long-lived audio capture service with a pre-roll ring buffer.
+
+One input stream stays open for the whole session and a background thread writes
+every chunk into a fixed-size NumPy ring buffer. A command is then cut out of the
+buffer, including a configurable amount of audio from just before the trigger, so
+there is no device initialization per command and the first syllable is not clipped.
+
+The audio source is pluggable: PyAudioSource reads the microphone, WavFileSource
+plays a WAV file at real-time speed for testing on machines without a microphone.
+"""
+
+import threading
+import time
+import wave
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size ring buffer of int16 samples.
+
+    Positions are absolute sample counts since the buffer was created, so a caller
+    can remember "the trigger was at sample N" and read around it later.
+
+    Args:
+        capacity (int): Number of samples kept
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._written = 0
+        self._lock = threading.Lock()
+        self._new_data = threading.Condition(self._lock)
+
+    @property
+    def position(self):
+        """Total number of samples written so far."""
+        with self._lock:
+            return self._written
+
+    def write(self, samples):
+        """Append samples, overwriting the oldest ones when the buffer is full."""
+        total = len(samples)
+        # Only the last `capacity` samples can survive anyway
+        samples = samples[-self.capacity:]
+        n = len(samples)
+        with self._lock:
+            start = (self._written + total - n) % self.capacity
+            first = min(n, self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:n - first] = samples[first:]
+            self._written += total
+            self._new_data.notify_all()
+
+    def wait_for(self, position, timeout=None):
+        """
+        Block until the buffer has reached a position.
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        with self._lock:
+            return self._new_data.wait_for(lambda: self._written >= position, timeout)
+
+    def read(self, start, end):
+        """
+        Copy the samples between two absolute positions.
+
+        Samples that were already overwritten (or never written) are skipped, so the
+        result may be shorter than end - start.
+
+        Returns:
+            numpy.ndarray: int16 samples
+        """
+        with self._lock:
+            start = max(start, self._written - self.capacity, 0)
+            end = min(end, self._written)
+            if end <= start:
+                return np.zeros(0, dtype=np.int16)
+            indices = np.arange(start, end) % self.capacity
+            return self._data[indices]
+
+
+class PyAudioSource:
+    """
+    Microphone input through PyAudio (16-bit mono).
+
+    Args:
+        sample_rate (int): Audio sample rate
+        chunk (int): Samples per read
+    """
+
+    def __init__(self, sample_rate=16000, chunk=1024):
+        self.sample_rate = sample_rate
+        self.chunk = chunk
+        self._pyaudio = None
+        self._stream = None
+
+    def open(self):
+        import pyaudio
+
+        self._pyaudio = pyaudio.PyAudio()
+        self._stream = self._pyaudio.open(format=pyaudio.paInt16,
+                                          channels=1,
+                                          rate=self.sample_rate,
+                                          input=True,
+                                          frames_per_buffer=self.chunk)
+
+    def read(self):
+        data = self._stream.read(self.chunk, exception_on_overflow=False)
+        return np.frombuffer(data, dtype=np.int16)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+            self._pyaudio = None
+
+
+class WavFileSource:
+    """
+    Plays a 16-bit mono WAV file as if it came from a microphone.
+
+    Args:
+        path (str): Path to the WAV file
+        chunk (int): Samples per read
+        realtime (bool): Sleep between chunks so the file plays at its original speed
+        loop (bool): Start again at the end of the file, otherwise silence follows
+    """
+
+    def __init__(self, path, chunk=1024, realtime=True, loop=False):
+        self.path = path
+        self.chunk = chunk
+        self.realtime = realtime
+        self.loop = loop
+
+        with wave.open(path, 'rb') as wf:
+            if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+                raise ValueError(f"{path}: only 16-bit mono WAV files are supported")
+            self.sample_rate = wf.getframerate()
+            self._samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        self._offset = 0
+        self._next_time = None
+
+    def open(self):
+        self._offset = 0
+        self._next_time = time.monotonic()
+
+    def read(self):
+        if self.realtime:
+            # Keep to the clock of a real device instead of sleeping a fixed time per chunk
+            self._next_time += self.chunk / self.sample_rate
+            delay = self._next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        if self._offset >= len(self._samples) and self.loop:
+            self._offset = 0
+        samples = self._samples[self._offset:self._offset + self.chunk]
+        self._offset += self.chunk
+        if len(samples) < self.chunk:
+            samples = np.concatenate([samples, np.zeros(self.chunk - len(samples), dtype=np.int16)])
+        return samples
+
+    def close(self):
+        pass
+
+
+class AudioCaptureService:
+    """
+    Keeps one audio source open and records it into a ring buffer on a background thread.
+
+    Args:
+        source: Audio source with open(), read() and close() (PyAudioSource, WavFileSource, ...)
+        buffer_seconds (float): Seconds of audio kept in the ring buffer
+        pre_roll (float): Default seconds of audio from before the trigger included in a capture
+    """
+
+    def __init__(self, source, buffer_seconds=30, pre_roll=0.3):
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.pre_roll = pre_roll
+        self.buffer = AudioRingBuffer(int(buffer_seconds * self.sample_rate))
+
+        self._running = threading.Event()
+        self._thread = None
+        self.error = None
+
+    def start(self):
+        """Open the source and start filling the ring buffer."""
+        if self._thread is not None:
+            return self
+        self.source.open()
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="audio-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the capture thread and close the source."""
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.source.close()
+
+    def _run(self):
+        try:
+            while self._running.is_set():
+                self.buffer.write(self.source.read())
+        except Exception as e:
+            print(f"Error in audio capture: {e}")
+            self.error = e
+            self._running.clear()
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def capture(self, duration, pre_roll=None, trigger=None):
+        """
+        Record a command of a given length, starting pre_roll seconds before the trigger.
+
+        Args:
+            duration (float): Seconds to record after the trigger
+            pre_roll (float): Seconds before the trigger to include, None uses the service default
+            trigger (int): Absolute sample position of the trigger, None means now
+
+        Returns:
+            numpy.ndarray: int16 samples, or None if the capture thread stopped
+        """
+        if pre_roll is None:
+            pre_roll = self.pre_roll
+        if trigger is None:
+            trigger = self.buffer.position
+
+        end = trigger + int(duration * self.sample_rate)
+        while not self.buffer.wait_for(end, timeout=0.5):
+            if not self.running:
+                return None
+        return self.buffer.read(trigger - int(pre_roll * self.sample_rate), end)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def save_wav(samples, path, sample_rate=16000):
+    """
+    Save int16 mono samples as a WAV file.
+
+    Args:
+        samples (numpy.ndarray): int16 samples
+        path (str): Output path
+        sample_rate (int): Audio sample rate
+
+    Returns:
+        str: The output path
+    """
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+    return path
@@ -0,0 +1,223 @@
+"""
+Batch offline transcription of a directory of WAV files.
+
+Every worker process loads the Whisper model once and then transcribes its share of
+the files. One JSON line is written per file with the transcript, the parsed
+coordinates and the timings. With --labels the results are compared against the
+expected coordinates and the accuracy is printed, so model or parser changes can be
+measured on a whole corpus of recorded commands.
+
+With --batch a single process loads the model and --workers threads send the files
+to it at the same time through the dynamic batching queue (see batching_queue.py),
+so the clips are decoded several at once instead of one per worker process.
+
+Usage:
+    python batch_transcribe.py recordings/ --workers 4 --output results.jsonl
+    python batch_transcribe.py recordings/ --labels labels.json
+    python batch_transcribe.py recordings/ --batch --workers 8
+
+The labels file is a JSON object mapping the WAV file name to the expected coordinate,
+for example {"b4_take1.wav": "B4", "c2_take1.wav": "C2"}.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool, cpu_count
+
+from coordinate_parser import parse_battleship_coordinates
+
+# Set in each worker process by init_worker
+worker_voice = None
+worker_options = {}
+
+
+def init_worker(model_name, cascade, cpu_optimized, threads, batched=False):
+    """Load the Whisper model once per worker process (or once in this process with batched)."""
+    global worker_voice, worker_options
+    import battleship_voice
+
+    battleship_voice.CPU_OPTIMIZED = cpu_optimized
+    battleship_voice.TORCH_INTRA_OP_THREADS = threads
+    battleship_voice.WARMUP_RUNS = 0
+    battleship_voice.BATCH_DECODING = batched
+
+    battleship_voice.get_whisper_model(model_name)
+    if cascade:
+        battleship_voice.get_whisper_model(battleship_voice.CASCADE_FAST_MODEL)
+
+    worker_voice = battleship_voice
+    worker_options = {"model_name": model_name, "cascade": cascade}
+
+
+def transcribe_file(audio_file):
+    """
+    Transcribe and parse a single WAV file in a worker process.
+
+    Args:
+        audio_file (str): Path to the WAV file
+
+    Returns:
+        dict: Result record for the JSONL output
+    """
+    record = {"file": os.path.basename(audio_file), "text": "", "coordinates": [], "error": None}
+    try:
+        start = time.perf_counter()
+        audio_data = worker_voice.load_wav_audio(audio_file)
+        if audio_data is None:
+            record["error"] = "unsupported sample width"
+            return record
+        load_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = worker_voice.transcribe_audio(audio_data, worker_options["model_name"],
+                                               cascade=worker_options["cascade"])
+        transcribe_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        coordinates = parse_battleship_coordinates(result["text"], verbose=False)
+        parse_time = time.perf_counter() - start
+
+        record.update({
+            "text": result["text"].strip(),
+            "coordinates": coordinates,
+            "audio_s": len(audio_data) / 16000,
+            "load_s": load_time,
+            "transcribe_s": transcribe_time,
+            "parse_s": parse_time,
+        })
+    except Exception as e:
+        record["error"] = str(e)
+    return record
+
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def load_labels(labels_file):
+    """
+    Load the expected coordinate for each file.
+
+    Args:
+        labels_file (str): Path to a JSON object mapping file names to coordinates
+
+    Returns:
+        dict: File name -> expected coordinate (upper case)
+    """
+    with open(labels_file) as f:
+        labels = json.load(f)
+    return {os.path.basename(name): coord.upper() for name, coord in labels.items()}
+
+
+def score(records, labels):
+    """
+    Compare the parsed coordinates against the labels.
+
+    A file counts as exact when the parser found only the expected coordinate,
+    and as contained when the expected coordinate is anywhere in the list.
+
+    Args:
+        records (list): Result records from transcribe_file
+        labels (dict): File name -> expected coordinate
+
+    Returns:
+        dict: Accuracy report
+    """
+    labelled = [r for r in records if r["file"] in labels]
+    exact = sum(1 for r in labelled if r["coordinates"] == [labels[r["file"]]])
+    contained = sum(1 for r in labelled if labels[r["file"]] in r["coordinates"])
+    empty = sum(1 for r in labelled if not r["coordinates"])
+    total = len(labelled)
+    return {
+        "labelled": total,
+        "exact": exact,
+        "contained": contained,
+        "no_coordinates": empty,
+        "exact_accuracy": exact / total if total else 0.0,
+        "contained_accuracy": contained / total if total else 0.0,
+        "missing_labels": sorted(set(labels) - {r["file"] for r in records}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a directory of WAV files with Whisper")
+    parser.add_argument("wav_dir", help="Directory with 16-bit WAV files")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL file to write the results to")
+    parser.add_argument("--workers", type=positive_int, default=max(1, cpu_count() // 2), help="Number of worker processes")
+    parser.add_argument("--model", default="small", help="Whisper model name")
+    parser.add_argument("--cascade", action="store_true", help="Use the fast model first (cascade mode)")
+    parser.add_argument("--cpu-optimized", action="store_true", help="Use the int8 quantized CPU mode")
+    parser.add_argument("--labels", help="JSON file mapping WAV file names to the expected coordinate")
+    parser.add_argument("--batch", action="store_true",
+                        help="One process, --workers threads sharing the model through the batching queue")
+    args = parser.parse_args()
+
+    audio_files = sorted(os.path.join(args.wav_dir, name) for name in os.listdir(args.wav_dir)
+                         if name.lower().endswith(".wav"))
+    if not audio_files:
+        print(f"No WAV files found in {args.wav_dir}")
+        return
+
+    start = time.perf_counter()
+    if args.batch:
+        # the threads only wait on the queue, the model gets all the cores
+        threads = cpu_count()
+        print(f"Transcribing {len(audio_files)} files with {args.workers} threads sharing one model "
+              f"(batches of up to {args.workers})...")
+        init_worker(args.model, args.cascade, args.cpu_optimized, threads, batched=True)
+        worker_voice.BATCH_MAX_SIZE = args.workers
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+        results = executor.map(transcribe_file, audio_files)
+    else:
+        # Split the cores between the workers so they don't fight over the same threads
+        threads = max(1, cpu_count() // args.workers)
+        print(f"Transcribing {len(audio_files)} files with {args.workers} workers ({threads} torch threads each)...")
+        executor = Pool(processes=args.workers, initializer=init_worker,
+                        initargs=(args.model, args.cascade, args.cpu_optimized, threads))
+        results = executor.imap(transcribe_file, audio_files)
+
+    records = []
+    with executor, open(args.output, "w") as out:
+        for record in results:
+            records.append(record)
+            out.write(json.dumps(record) + "\n")
+            status = record["error"] or record["coordinates"]
+            print(f"[{len(records)}/{len(audio_files)}] {record['file']}: {status}")
+    wall_time = time.perf_counter() - start
+
+    ok = [r for r in records if r["error"] is None]
+    audio_total = sum(r["audio_s"] for r in ok)
+    print(f"\nResults written to {args.output}")
+    print(f"Files: {len(records)} ({len(records) - len(ok)} errors), wall time {wall_time:.1f} s, "
+          f"{len(records) / wall_time:.2f} files/s")
+    if ok and audio_total:
+        transcribe_total = sum(r["transcribe_s"] for r in ok)
+        print(f"Audio: {audio_total:.1f} s, average transcription {transcribe_total / len(ok):.3f} s "
+              f"(RTF {transcribe_total / audio_total:.3f})")
+    if args.batch:
+        for transcriber in worker_voice.batching_transcribers.values():
+            stats = transcriber.stats
+            print(f"Batches: {stats['batches']} for {stats['requests']} requests, "
+                  f"largest {stats['largest_batch']}, {stats['errors']} failed")
+        worker_voice.stop_batching_transcribers()
+
+    if args.labels:
+        report = score(records, load_labels(args.labels))
+        print(f"\nAccuracy on {report['labelled']} labelled files:")
+        print(f"- exact (only the expected coordinate): {report['exact']} ({report['exact_accuracy'] * 100:.1f}%)")
+        print(f"- contained (expected coordinate found): {report['contained']} "
+              f"({report['contained_accuracy'] * 100:.1f}%)")
+        print(f"- no coordinates found: {report['no_coordinates']}")
+        if report["missing_labels"]:
+            print(f"- labelled files not found: {len(report['missing_labels'])}")
+
+
+if __name__ == "__main__":
+    main()
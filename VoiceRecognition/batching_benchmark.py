@@ -0,0 +1,91 @@
+"""
+Load test for the dynamic batching queue (batching_queue.py).
+
+A number of client threads send commands at the same time, first straight to the
+model (one model.transcribe per request, serialized by a lock like a single
+resident model would be) and then through a BatchingTranscriber. For both it
+reports the throughput and the p50/p95 latency per request.
+
+Usage:
+    python batching_benchmark.py [--wav command.wav] [--model small] [--clients 8]
+                                 [--requests 4] [--max-batch 8] [--max-wait-ms 30]
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+import battleship_voice
+from batching_queue import BatchingTranscriber
+
+
+def run_clients(handle, clips, clients, requests):
+    """
+    Let every client thread send its requests one after the other.
+
+    Returns:
+        tuple: (wall time in seconds, list of per-request latencies in seconds)
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def client(index):
+        for n in range(requests):
+            start = time.perf_counter()
+            handle(clips[(index + n) % len(clips)])
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def report(name, wall_time, latencies):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    print(f"{name:>10}: {len(latencies) / wall_time:.2f} requests/s, "
+          f"p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-request and batched Whisper decoding under load")
+    parser.add_argument("--wav", nargs="*", default=[], help="Command clips (16-bit mono 16kHz WAV)")
+    parser.add_argument("--model", default="small", help="Whisper model size")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client threads")
+    parser.add_argument("--requests", type=int, default=4, help="Requests per client")
+    parser.add_argument("--max-batch", type=int, default=8, help="Largest batch")
+    parser.add_argument("--max-wait-ms", type=float, default=30, help="Batching window")
+    args = parser.parse_args()
+
+    clips = [battleship_voice.load_wav_audio(path) for path in args.wav]
+    clips = [clip for clip in clips if clip is not None]
+    if not clips:
+        # No clips given: 2 seconds of low level noise, about the length of a command
+        clips = [np.random.default_rng(0).normal(0, 0.01, 32000).astype(np.float32)]
+
+    model = battleship_voice.load_whisper_model(args.model, warmup_runs=1)
+
+    model_lock = threading.Lock()
+
+    def sequential(audio_data):
+        with model_lock:
+            return model.transcribe(audio_data, fp16=False, language='English')
+
+    report("sequential", *run_clients(sequential, clips, args.clients, args.requests))
+
+    with BatchingTranscriber(model, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms) as batcher:
+        report("batched", *run_clients(batcher.transcribe, clips, args.clients, args.requests))
+        print(f"Batches: {batcher.stats['batches']} for {batcher.stats['requests']} requests "
+              f"(largest {batcher.stats['largest_batch']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Dynamic batching queue in front of a resident Whisper model.
+
+Callers submit a clip and get a concurrent.futures.Future back. A worker thread
+collects the requests that arrive within a short window (max_wait_ms after the
+oldest waiting request, or until max_batch_size requests are waiting) and runs
+them through whisper.decode as one batch, then resolves every caller's future
+with its own result.
+
+A batch of N short commands costs much less than N separate passes, because the
+encoder and the decoder run on all clips at once. max_wait_ms bounds how long a
+request can wait for others to join its batch, so a lone request is only delayed
+by that window.
+
+Commands that fit the short-command fast path (see short_command.py) are decoded
+on a window just long enough for the longest clip in the batch; as soon as one
+clip is longer, the whole batch uses the normal 30 second window.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+import whisper
+
+from short_command import (HOP_LENGTH, MAX_TOKENS, decoding_to_result, full_audio_context,
+                           prepare_short_command, truncated_audio_context)
+
+# Marks the end of the request stream
+_STOP = object()
+
+
+def decode_batch(model, clips, max_seconds=8, language="en"):
+    """
+    Transcribe several clips with a single batched whisper.decode call.
+
+    Args:
+        model: Whisper model
+        clips (list): Audio samples per clip (float32, 16kHz)
+        max_seconds (int): Longest clip decoded on a shortened window, 0 always uses 30 seconds
+        language (str): Language code passed to the decoder
+
+    Returns:
+        list: One result dict per clip, in the same shape as model.transcribe
+    """
+    prepared = [prepare_short_command(clip, max_seconds) for clip in clips] if max_seconds else []
+    if prepared and all(audio is not None for audio, _ in prepared):
+        # Pad every clip to the longest one so they share one encoder window
+        n_frames = max(frames for _, frames in prepared)
+        audios = [whisper.pad_or_trim(audio, n_frames * HOP_LENGTH) for audio, _ in prepared]
+        context = truncated_audio_context(model, n_frames)
+        sample_len = MAX_TOKENS
+    else:
+        n_frames = whisper.audio.N_FRAMES
+        audios = [whisper.pad_or_trim(clip) for clip in clips]
+        context = full_audio_context(model)
+        sample_len = None
+
+    mel = torch.stack([whisper.log_mel_spectrogram(audio, model.dims.n_mels) for audio in audios])
+    options = whisper.DecodingOptions(language=language, without_timestamps=True, fp16=False,
+                                      sample_len=sample_len)
+    with context:
+        decoded = whisper.decode(model, mel.to(model.device), options)
+
+    return [decoding_to_result(result, n_frames, language) for result in decoded]
+
+
+class BatchingTranscriber:
+    """
+    Request queue that batches concurrent transcriptions for one model.
+
+    Args:
+        model: Resident Whisper model
+        max_batch_size (int): Most clips decoded together
+        max_wait_ms (float): Longest a request waits for others to join its batch
+        max_seconds (int): Longest clip decoded on a shortened window (see decode_batch)
+        language (str): Language code passed to the decoder
+    """
+
+    def __init__(self, model, max_batch_size=8, max_wait_ms=30, max_seconds=8, language="en"):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_seconds = max_seconds
+        self.language = language
+
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+        self.stats = {"requests": 0, "batches": 0, "largest_batch": 0, "errors": 0}
+
+    def submit(self, audio_data):
+        """
+        Queue a clip for transcription.
+
+        Args:
+            audio_data (numpy.ndarray): Audio samples (float32, 16kHz)
+
+        Returns:
+            Future: Resolves to the result dict (or raises the decoding error)
+        """
+        future = Future()
+        self._requests.put((audio_data, future, time.monotonic()))
+        return future
+
+    def transcribe(self, audio_data, timeout=None):
+        """Submit a clip and wait for its result."""
+        return self.submit(audio_data).result(timeout)
+
+    def close(self):
+        """Stop the worker after the requests that are already queued."""
+        self._requests.put(_STOP)
+        self._thread.join()
+
+    def _collect(self):
+        """Wait for a request, then gather more until the batch is full or the oldest has waited max_wait."""
+        first = self._requests.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            # Callers may have cancelled their future while it was queued
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+            try:
+                results = decode_batch(self.model, [entry[0] for entry in batch],
+                                       self.max_seconds, self.language)
+            except Exception as e:
+                print(f"Error in batched decoding: {e}")
+                self.stats["errors"] += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
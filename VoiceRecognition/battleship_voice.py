@@ -2,23 +2,141 @@
 # + Claude 3.7 thinking mode was used to debug + add extra test cases to catch different letter pronounciations
 
 import json
+import time
+import threading
 import pyaudio
 import wave
 import os
-import re
 import whisper
 from datetime import datetime
 import numpy as np
 
 import torch
 
+from coordinate_parser import parse_battleship_coordinates
+from transcription_cache import TranscriptionCache
+from session_log import SessionLog, query_stats
+from voice_pipeline import VoicePipeline
+from audio_capture import AudioCaptureService, PyAudioSource, WavFileSource, save_wav
+from keyword_recognizer import KeywordRecognizer
+from short_command import full_audio_context, transcribe_short
+from batching_queue import BatchingTranscriber
+from model_artifacts import load_model_artifact
+from latency_metrics import LatencyMetrics, RequestTrace, activate, current_trace, stage
+from session_archive import append_file
+
 device = 'cuda' if torch.cuda.is_available() else 'cpu'
 
+# CPU-optimized inference settings (used by load_whisper_model)
+# set CPU_OPTIMIZED to True for int8 quantization (CPU only), the thread counts use torch's default when None
+CPU_OPTIMIZED = False
+TORCH_INTRA_OP_THREADS = None
+TORCH_INTER_OP_THREADS = None
+WARMUP_RUNS = 1  # only with CPU_OPTIMIZED, where the first quantized inference is much slower than the rest
+
+# Prepared model artifacts (see model_artifacts.py)
+# when `python model_artifacts.py small` was run, the model is memory-mapped from MODEL_CACHE_DIR instead of rebuilt
+USE_MODEL_CACHE = True
+MODEL_CACHE_DIR = "model_cache"
+
+# Cascade recognition settings (see transcribe_cascade)
+# the fast model runs first, the larger model only runs when the fast result can't be trusted
+CASCADE_MODE = False
+CASCADE_FAST_MODEL = "tiny"
+CASCADE_MIN_AVG_LOGPROB = -1.0  # escalate when any segment's avg_logprob is below this
+CASCADE_MAX_NO_SPEECH_PROB = 0.6  # escalate when any segment's no_speech_prob is above this
+
+# Transcription cache settings (replayed clips skip the model, see transcription_cache.py)
+USE_TRANSCRIPTION_CACHE = False
+TRANSCRIPTION_CACHE_DIR = "transcription_cache"
+TRANSCRIPTION_CACHE_MAX_DISK_BYTES = 50 * 1024 * 1024
+
+# Every recognition is appended to this SQLite session log (see session_log.py)
+SESSION_LOG_PATH = "battleship_session.db"
+
+# Persistent capture settings (see audio_capture.py)
+# the input stream stays open for the session and commands include PRE_ROLL_SECONDS from before the trigger
+PERSISTENT_CAPTURE = True
+PRE_ROLL_SECONDS = 0.3
+CAPTURE_BUFFER_SECONDS = 30
+CAPTURE_WAV_FILE = None  # set to a 16-bit mono WAV path to test without a microphone
+
+# Offline keyword recognizer settings (see keyword_recognizer.py)
+# set KEYWORD_TEMPLATES_DIR to a folder of recorded coordinates to try it before Whisper
+KEYWORD_TEMPLATES_DIR = None
+KEYWORD_MIN_CONFIDENCE = 0.2  # below this the command goes to Whisper
+
+# Short-command fast path (see short_command.py)
+# the encoder only runs on the trimmed command instead of a full 30 second window
+SHORT_COMMAND_FAST_PATH = False
+SHORT_COMMAND_MAX_SECONDS = 8  # longer commands use the normal transcribe path
+
+# Dynamic batching (see batching_queue.py)
+# concurrent requests for the same model are collected for up to BATCH_MAX_WAIT_MS and decoded together.
+# the interactive loops send one command at a time, so batches only form with concurrent callers
+# like batch_transcribe.py --batch
+BATCH_DECODING = False
+BATCH_MAX_SIZE = 8
+BATCH_MAX_WAIT_MS = 30  # longest a request waits for others to join its batch
+
+# Early rejection settings (see recognize_with_details)
+# recordings whose loudest 100 ms is below MIN_SPEECH_RMS never reach the model,
+# results Whisper itself considers silence (both limits crossed) are not parsed
+EARLY_REJECTION = True
+MIN_SPEECH_RMS = 0.01  # float samples in [-1, 1], quiet speech is around 0.03
+REJECT_MAX_NO_SPEECH_PROB = 0.6
+REJECT_MIN_AVG_LOGPROB = -1.0
+
+# Latency metrics (see latency_metrics.py)
+# rolling p50/p95 per stage are written here after every command, .json for JSON, anything else for Prometheus
+METRICS_PATH = "battleship_metrics.prom"
+METRICS_WINDOW = 100  # number of recent commands the percentiles cover
+PRINT_REQUEST_TRACE = True  # print the per-stage timings of every command
+
+# Capture recording (see session_archive.py, replay with session_replay.py)
+# every recording is appended to this archive before it is deleted, process_board.py records its frames
+# to the same file when BATTLESHIP_RECORD_ARCHIVE is set for the web app too
+RECORD_ARCHIVE = os.environ.get("BATTLESHIP_RECORD_ARCHIVE")
+
 
 # block below of code is claude generated, was used to find out I dont have ffpmeg installed.
 # Initialize the global whisper_model variable at module level
 whisper_model = None
 
+# All loaded models by name, so the cascade can keep the fast and the large model resident
+whisper_models = {}
+
+# BatchingTranscriber per loaded model (keyed by id(model)), created by get_batching_transcriber
+batching_transcribers = {}
+batching_transcribers_lock = threading.Lock()  # batch_transcribe.py --batch asks from many threads at once
+
+# Shared AudioCaptureService, created by get_capture_service when PERSISTENT_CAPTURE is on
+capture_service = None
+
+# Shared KeywordRecognizer, created by get_keyword_recognizer when KEYWORD_TEMPLATES_DIR is set
+keyword_recognizer = None
+
+# Shared TranscriptionCache, created by get_transcription_cache when USE_TRANSCRIPTION_CACHE is on
+transcription_cache = None
+
+# How many recordings were rejected before or right after inference
+rejection_stats = {
+    "silent": 0,
+    "low_confidence": 0
+}
+
+# Rolling per-stage latencies of the session, exported to METRICS_PATH
+request_metrics = LatencyMetrics(METRICS_WINDOW)
+
+# How often the cascade had to escalate to the larger model (and why)
+cascade_stats = {
+    "requests": 0,
+    "escalations": 0,
+    "no_coordinates": 0,
+    "low_avg_logprob": 0,
+    "high_no_speech_prob": 0
+}
+
 # Check if torchaudio is available for alternative audio processing
 try:
     import torchaudio
@@ -39,41 +157,103 @@ else:
     print("For better results, install FFmpeg: https://ffmpeg.org/download.html")
 
 
-def record_audio(duration=5, sample_rate=16000):
+def get_capture_service(sample_rate=16000):
+    """
+    Return the long-lived capture service, opening the input stream the first time.
+
+    Args:
+        sample_rate (int): Audio sample rate (only used when the service is created)
+
+    Returns:
+        AudioCaptureService: The running capture service
+    """
+    global capture_service
+    if capture_service is None:
+        if CAPTURE_WAV_FILE:
+            source = WavFileSource(CAPTURE_WAV_FILE, loop=True)
+        else:
+            source = PyAudioSource(sample_rate)
+        capture_service = AudioCaptureService(source, buffer_seconds=CAPTURE_BUFFER_SECONDS,
+                                              pre_roll=PRE_ROLL_SECONDS).start()
+    return capture_service
+
+
+def stop_capture_service():
+    """Close the input stream of the capture service (if it was started)."""
+    global capture_service
+    if capture_service is not None:
+        service, capture_service = capture_service, None
+        service.stop()
+
+
+def record_audio(duration=5, sample_rate=16000, audio_path=None):
     """
     Record audio from the microphone for a specified duration.
 
+    With PERSISTENT_CAPTURE the audio comes from the long-lived capture service
+    (including the pre-roll), otherwise a new stream is opened for this recording.
+
     Args:
         duration (int): Recording duration in seconds
         sample_rate (int): Audio sample rate
+        audio_path (str): Where to save the WAV file, defaults to temp_audio.wav in the working directory
 
     Returns:
         str: Path to the audio file
     """
+    # Create a fixed path for the audio file (unless the caller picked one)
+    if audio_path is None:
+        audio_path = os.path.join(os.getcwd(), "temp_audio.wav")
+
+    if PERSISTENT_CAPTURE:
+        try:
+            with stage("device_open"):
+                service = get_capture_service(sample_rate)
+            print("Listening... (Speak now)")
+            with stage("record"):
+                samples = service.capture(duration)
+            if samples is None:
+                print(f"Error recording audio: capture stopped ({service.error})")
+                # drop the stopped service, the next recording opens the device again
+                stop_capture_service()
+                return None
+            print("Recording finished.")
+
+            with stage("wav_write"):
+                save_wav(samples, audio_path, service.sample_rate)
+            print(f"Audio saved to: {audio_path}")
+            return audio_path
+
+        except Exception as e:
+            print(f"Error recording audio: {e}")
+            return None
+
     try:
         # Audio recording parameters
         chunk = 1024
         audio_format = pyaudio.paInt16
         channels = 1
 
-        # Initialize PyAudio
-        p = pyaudio.PyAudio()
+        with stage("device_open"):
+            # Initialize PyAudio
+            p = pyaudio.PyAudio()
 
-        print("Listening... (Speak now)")
+            # Open stream
+            stream = p.open(format=audio_format,
+                            channels=channels,
+                            rate=sample_rate,
+                            input=True,
+                            frames_per_buffer=chunk)
 
-        # Open stream
-        stream = p.open(format=audio_format,
-                        channels=channels,
-                        rate=sample_rate,
-                        input=True,
-                        frames_per_buffer=chunk)
+        print("Listening... (Speak now)")
 
         frames = []
 
         # Record audio in chunks
-        for i in range(0, int(sample_rate / chunk * duration)):
-            data = stream.read(chunk, exception_on_overflow=False)
-            frames.append(data)
+        with stage("record"):
+            for i in range(0, int(sample_rate / chunk * duration)):
+                data = stream.read(chunk, exception_on_overflow=False)
+                frames.append(data)
 
         print("Recording finished.")
 
@@ -82,16 +262,14 @@ def record_audio(duration=5, sample_rate=16000):
         stream.close()
         p.terminate()
 
-        # Create a fixed path for the audio file
-        audio_path = os.path.join(os.getcwd(), "temp_audio.wav")
-
         # Save the recorded data as a WAV file
-        wf = wave.open(audio_path, 'wb')
-        wf.setnchannels(channels)
-        wf.setsampwidth(p.get_sample_size(audio_format))
-        wf.setframerate(sample_rate)
-        wf.writeframes(b''.join(frames))
-        wf.close()
+        with stage("wav_write"):
+            wf = wave.open(audio_path, 'wb')
+            wf.setnchannels(channels)
+            wf.setsampwidth(p.get_sample_size(audio_format))
+            wf.setframerate(sample_rate)
+            wf.writeframes(b''.join(frames))
+            wf.close()
 
         print(f"Audio saved to: {audio_path}")
         return audio_path
@@ -101,77 +279,514 @@ def record_audio(duration=5, sample_rate=16000):
         return None
 
 
-def recognize_with_whisper(audio_file, model_name="small"):
+def load_wav_audio(audio_file):
+    """
+    Read a 16-bit WAV file into the float32 mono 16kHz array Whisper expects.
+
+    Args:
+        audio_file (str): Path to the audio file
+
+    Returns:
+        numpy.ndarray: Audio samples in [-1, 1], or None if the sample width is unsupported
+    """
+    # Read the wave file directly instead of using whisper's load_audio
+    with stage("wav_read"), wave.open(audio_file, 'rb') as wf:
+        # Get audio parameters
+        channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        sample_rate = wf.getframerate()
+        n_frames = wf.getnframes()
+
+        # Read all frames
+        audio_bytes = wf.readframes(n_frames)
+
+    # Convert to numpy array
+    if sample_width == 2:  # 16-bit audio
+        audio_data = np.frombuffer(audio_bytes, dtype=np.int16)
+    else:
+        print(f"Unsupported sample width: {sample_width}")
+        return None
+
+    # Convert to float32 and normalize to [-1, 1]
+    audio_data = audio_data.astype(np.float32) / 32768.0
+
+    # If stereo, convert to mono
+    if channels == 2:
+        audio_data = audio_data.reshape(-1, 2).mean(axis=1)
+
+    # Resample to 16000 Hz if needed (Whisper expects 16kHz)
+    if sample_rate != 16000:
+        print(f"Warning: Audio sample rate is {sample_rate}Hz, not 16000Hz. Resampling may be required.")
+        with stage("resample"):
+            # Simple resampling by linear interpolation
+            if sample_rate > 16000:
+                # Downsample
+                ratio = sample_rate / 16000
+                audio_data = audio_data[::int(ratio)]
+            else:
+                # Upsample (not ideal but better than nothing)
+                ratio = 16000 / sample_rate
+                audio_data = np.repeat(audio_data, int(ratio))
+
+    return audio_data
+
+
+def configure_torch_threads(intra_op_threads=None, inter_op_threads=None):
+    """
+    Set the number of threads torch uses on the CPU.
+
+    Args:
+        intra_op_threads (int): Threads used inside a single op (matrix multiplies etc.), None keeps the default
+        inter_op_threads (int): Threads used to run independent ops in parallel, None keeps the default
+    """
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            # torch only allows this before any parallel work has started
+            print(f"Warning: Could not set inter-op threads: {e}")
+    print(f"Torch threads: intra-op={torch.get_num_threads()}, inter-op={torch.get_num_interop_threads()}")
+
+
+def quantize_whisper_model(model):
+    """
+    Apply dynamic int8 quantization to the linear layers of a Whisper model (CPU only).
+
+    Whisper uses its own Linear subclass, which torch's quantize_dynamic does not
+    recognise, so those layers are swapped for plain nn.Linear layers (same weights) first.
+
+    Args:
+        model: Whisper model on the CPU
+
+    Returns:
+        The quantized model
+    """
+    for module in list(model.modules()):
+        for name, child in module.named_children():
+            if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+                linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                linear.weight = child.weight
+                linear.bias = child.bias
+                setattr(module, name, linear)
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def warm_up_model(model, runs=1, seconds=1.0):
+    """
+    Run a few inferences on silence so the first real command is not slow.
+
+    Args:
+        model: Whisper model
+        runs (int): Number of warm-up inferences
+        seconds (float): Length of the silent clip in seconds
+    """
+    silence = np.zeros(int(16000 * seconds), dtype=np.float32)
+    for _ in range(runs):
+        model.transcribe(silence, fp16=False, language='English')
+
+
+def load_whisper_model(model_name="small", cpu_optimized=False, intra_op_threads=None,
+                       inter_op_threads=None, warmup_runs=0, use_cache=False):
+    """
+    Load a Whisper model, optionally in the CPU-optimized mode.
+
+    Args:
+        model_name (str): Whisper model name ('tiny', 'base', 'small', etc.)
+        cpu_optimized (bool): Apply dynamic int8 quantization to the linear layers (ignored on GPU)
+        intra_op_threads (int): Torch intra-op threads, None keeps the default
+        inter_op_threads (int): Torch inter-op threads, None keeps the default
+        warmup_runs (int): Number of warm-up inferences to run after loading
+        use_cache (bool): Memory-map the prepared artifact from MODEL_CACHE_DIR when there is one
+
+    Returns:
+        The loaded Whisper model
+    """
+    configure_torch_threads(intra_op_threads, inter_op_threads)
+
+    if cpu_optimized and device != 'cpu':
+        print("Warning: int8 quantization is only supported on the CPU, using the full model.")
+        cpu_optimized = False
+
+    model = None
+    if use_cache:
+        model = load_model_artifact(model_name, cpu_optimized, MODEL_CACHE_DIR)
+        if model is not None:
+            print(f"Loaded Whisper {model_name} from the model cache ({MODEL_CACHE_DIR}).")
+            model = model.to(device)
+        else:
+            print(f"No prepared {model_name} artifact in {MODEL_CACHE_DIR}, "
+                  f"run model_artifacts.py to speed up the next start.")
+
+    if model is None:
+        print(f"Loading Whisper {model_name} model (this may take a moment the first time)...")
+        model = whisper.load_model(model_name).to(device)
+
+        if cpu_optimized:
+            print("Applying dynamic int8 quantization to the linear layers...")
+            model = quantize_whisper_model(model)
+
+    if warmup_runs:
+        print(f"Warming up the model ({warmup_runs} run(s))...")
+        warm_up_model(model, runs=warmup_runs)
+
+    print("Model loaded successfully.")
+    return model
+
+
+def get_whisper_model(model_name="small"):
+    """
+    Return the loaded Whisper model with this name, loading it the first time.
+
+    Args:
+        model_name (str): Whisper model name ('tiny', 'base', 'small', etc.)
+
+    Returns:
+        The loaded Whisper model
+    """
+    global whisper_model
+    if model_name not in whisper_models:
+        with stage("model_load"):
+            whisper_models[model_name] = load_whisper_model(model_name, cpu_optimized=CPU_OPTIMIZED,
+                                                            intra_op_threads=TORCH_INTRA_OP_THREADS,
+                                                            inter_op_threads=TORCH_INTER_OP_THREADS,
+                                                            warmup_runs=WARMUP_RUNS if CPU_OPTIMIZED else 0,
+                                                            use_cache=USE_MODEL_CACHE)
+    if whisper_model is None:
+        whisper_model = whisper_models[model_name]
+    return whisper_models[model_name]
+
+
+def get_batching_transcriber(model):
+    """
+    Return the batching queue in front of a model, starting it the first time.
+
+    Args:
+        model: Whisper model
+
+    Returns:
+        BatchingTranscriber: The queue for this model
+    """
+    with batching_transcribers_lock:
+        if id(model) not in batching_transcribers:
+            max_seconds = SHORT_COMMAND_MAX_SECONDS if SHORT_COMMAND_FAST_PATH else 0
+            batching_transcribers[id(model)] = BatchingTranscriber(model, max_batch_size=BATCH_MAX_SIZE,
+                                                                   max_wait_ms=BATCH_MAX_WAIT_MS,
+                                                                   max_seconds=max_seconds)
+        return batching_transcribers[id(model)]
+
+
+def stop_batching_transcribers():
+    """Stop the batching queues (requests that are already queued are finished first)."""
+    for transcriber in batching_transcribers.values():
+        transcriber.close()
+    batching_transcribers.clear()
+
+
+def run_whisper(model, audio_data):
+    """
+    Transcribe with one model, through the batching queue or the short-command fast path when enabled.
+
+    The batching queue only helps when several threads call this at the same time (batch_transcribe.py
+    --batch), a single caller waits BATCH_MAX_WAIT_MS and is decoded as a batch of one.
+
+    Args:
+        model: Whisper model
+        audio_data (numpy.ndarray): Audio samples (float32, 16kHz)
+
+    Returns:
+        dict: Whisper transcription result
+    """
+    with stage("transcribe"):
+        if BATCH_DECODING:
+            return get_batching_transcriber(model).transcribe(audio_data)
+        if SHORT_COMMAND_FAST_PATH:
+            result = transcribe_short(model, audio_data, max_seconds=SHORT_COMMAND_MAX_SECONDS)
+            if result is not None:
+                return result
+        with full_audio_context(model):
+            return model.transcribe(audio_data, fp16=False, language='English')
+
+
+def segment_confidence(result):
+    """
+    Get the worst segment-level confidence values from a Whisper transcription result.
+
+    Args:
+        result (dict): Result of model.transcribe
+
+    Returns:
+        tuple: (lowest avg_logprob, highest no_speech_prob), (None, None) if there are no segments
+    """
+    segments = result.get("segments") or []
+    if not segments:
+        return None, None
+    return (min(segment["avg_logprob"] for segment in segments),
+            max(segment["no_speech_prob"] for segment in segments))
+
+
+def transcribe_cascade(audio_data, model_name="small", fast_model_name=CASCADE_FAST_MODEL):
+    """
+    Transcribe with the fast model first and only escalate to the larger model when needed.
+
+    The fast result is kept when it contains a valid coordinate and none of its segments
+    fall below CASCADE_MIN_AVG_LOGPROB or above CASCADE_MAX_NO_SPEECH_PROB.
+    Every call is counted in cascade_stats.
+
+    Args:
+        audio_data (numpy.ndarray): Audio samples (float32, 16kHz)
+        model_name (str): Larger Whisper model used when escalating
+        fast_model_name (str): Fast Whisper model that runs first
+
+    Returns:
+        dict: Whisper transcription result of the model that was used
+    """
+    cascade_stats["requests"] += 1
+
+    result = run_whisper(get_whisper_model(fast_model_name), audio_data)
+    avg_logprob, no_speech_prob = segment_confidence(result)
+
+    reasons = []
+    if not parse_battleship_coordinates(result["text"], verbose=False):
+        reasons.append("no_coordinates")
+    if avg_logprob is not None and avg_logprob < CASCADE_MIN_AVG_LOGPROB:
+        reasons.append("low_avg_logprob")
+    if no_speech_prob is not None and no_speech_prob > CASCADE_MAX_NO_SPEECH_PROB:
+        reasons.append("high_no_speech_prob")
+
+    if not reasons:
+        print(f"Cascade: accepted {fast_model_name} result")
+        return result
+
+    cascade_stats["escalations"] += 1
+    for reason in reasons:
+        cascade_stats[reason] += 1
+    print(f"Cascade: escalating to {model_name} ({', '.join(reasons)})")
+
+    return run_whisper(get_whisper_model(model_name), audio_data)
+
+
+def get_transcription_cache():
+    """
+    Return the shared transcription cache, or None when USE_TRANSCRIPTION_CACHE is off.
+
+    Returns:
+        TranscriptionCache: The cache (created on first use)
+    """
+    global transcription_cache
+    if USE_TRANSCRIPTION_CACHE and transcription_cache is None:
+        transcription_cache = TranscriptionCache(TRANSCRIPTION_CACHE_DIR,
+                                                 max_disk_bytes=TRANSCRIPTION_CACHE_MAX_DISK_BYTES)
+    return transcription_cache
+
+
+def get_keyword_recognizer():
+    """
+    Return the offline keyword recognizer, or None when no templates are configured.
+
+    Returns:
+        KeywordRecognizer: The recognizer (templates are loaded on first use)
+    """
+    global keyword_recognizer
+    if KEYWORD_TEMPLATES_DIR and keyword_recognizer is None:
+        keyword_recognizer = KeywordRecognizer.from_directory(KEYWORD_TEMPLATES_DIR)
+    return keyword_recognizer
+
+
+def recognize_keyword(audio_data):
+    """
+    Try the offline keyword recognizer on a command.
+
+    Args:
+        audio_data (numpy.ndarray): Audio samples (float32, 16kHz)
+
+    Returns:
+        str: The coordinate if the recognizer is confident enough, otherwise None
+    """
+    recognizer = get_keyword_recognizer()
+    if recognizer is None:
+        return None
+
+    start = time.perf_counter()
+    with stage("keyword"):
+        coordinate, confidence = recognizer.recognize(audio_data)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if coordinate and confidence >= KEYWORD_MIN_CONFIDENCE:
+        print(f"Keyword recognizer: {coordinate} (confidence {confidence:.2f}, {elapsed_ms:.1f} ms)")
+        return coordinate
+
+    print(f"Keyword recognizer not confident ({coordinate}, {confidence:.2f}), falling back to Whisper.")
+    return None
+
+
+def transcribe_audio(audio_data, model_name="small", cascade=False):
+    """
+    Transcribe prepared audio with a single model or with the cascade.
+
+    When the transcription cache is enabled, a clip that was transcribed before with the
+    same model and options is returned from the cache without running the model.
+
+    Args:
+        audio_data (numpy.ndarray): Audio samples (float32, 16kHz)
+        model_name (str): Whisper model name ('tiny', 'base', 'small', etc.)
+        cascade (bool): Whether to run the fast model first (see transcribe_cascade)
+
+    Returns:
+        dict: Whisper transcription result
+    """
+    cache = get_transcription_cache()
+    if cache is not None:
+        options = {"language": "English", "fp16": False, "cpu_optimized": CPU_OPTIMIZED,
+                   "cascade": CASCADE_FAST_MODEL if cascade else None, "short_command": SHORT_COMMAND_FAST_PATH,
+                   "batched": BATCH_DECODING}
+        with stage("cache"):
+            key = cache.make_key(audio_data, model_name, options)
+            result = cache.get(key)
+        if result is not None:
+            print("Transcription cache hit, skipping the model.")
+            return result
+
+    if cascade:
+        result = transcribe_cascade(audio_data, model_name)
+    else:
+        result = run_whisper(get_whisper_model(model_name), audio_data)
+
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+
+def peak_rms(audio_data, frame=1600):
+    """
+    Return the RMS energy of the loudest frame (100 ms at 16kHz).
+
+    The loudest frame is used instead of the whole clip, so a short command in a
+    mostly silent 5 second recording still counts as speech.
+
+    Args:
+        audio_data (numpy.ndarray): Audio samples (float32, 16kHz)
+        frame (int): Frame size in samples
+
+    Returns:
+        float: RMS of the loudest frame
+    """
+    if len(audio_data) < frame:
+        return float(np.sqrt(np.mean(audio_data ** 2))) if len(audio_data) else 0.0
+    n_frames = len(audio_data) // frame
+    frames = audio_data[:n_frames * frame].reshape(n_frames, frame)
+    return float(np.sqrt(np.mean(frames ** 2, axis=1)).max())
+
+
+def is_low_confidence(avg_logprob, no_speech_prob):
+    """
+    Check whether a transcription should be treated as silence.
+
+    Same rule Whisper uses to skip silent segments: the model thinks there is no speech
+    and the decoded text is unlikely.
+
+    Args:
+        avg_logprob (float): Lowest segment avg_logprob (None if unknown)
+        no_speech_prob (float): Highest segment no_speech_prob (None if unknown)
+
+    Returns:
+        bool: Whether the result should be rejected
+    """
+    if avg_logprob is None or no_speech_prob is None:
+        return False
+    return no_speech_prob > REJECT_MAX_NO_SPEECH_PROB and avg_logprob < REJECT_MIN_AVG_LOGPROB
+
+
+def recognize_with_whisper(audio_file, model_name="small", cascade=None):
     """
     Recognize speech using Whisper model.
 
     Args:
         audio_file (str): Path to the audio file
         model_name (str): Whisper model name ('tiny', 'base', 'small', etc.)
+        cascade (bool): Run the fast model first and only escalate when needed, None uses CASCADE_MODE
+
+    Returns:
+        str: Recognized text (empty when nothing was recognized or the recording was rejected)
+    """
+    return recognize_with_details(audio_file, model_name, cascade)["text"]
+
+
+def recognize_with_details(audio_file, model_name="small", cascade=None):
+    """
+    Recognize speech using Whisper model and report how confident the result is.
+
+    With EARLY_REJECTION, a recording without speech energy is rejected before any model
+    runs, and a transcription Whisper considers silence is rejected before parsing.
+
+    Args:
+        audio_file (str): Path to the audio file
+        model_name (str): Whisper model name ('tiny', 'base', 'small', etc.)
+        cascade (bool): Run the fast model first and only escalate when needed, None uses CASCADE_MODE
 
     Returns:
-        str: Recognized text
+        dict: "text" (empty when rejected), "avg_logprob" and "no_speech_prob" (None when Whisper
+            did not run), "rms" of the loudest frame and "rejected" ("silent", "low_confidence" or None)
     """
+    if cascade is None:
+        cascade = CASCADE_MODE
+
+    details = {"text": "", "avg_logprob": None, "no_speech_prob": None, "rms": None, "rejected": None}
+
     try:
         if not os.path.exists(audio_file):
             print(f"Error: Audio file not found at {audio_file}")
-            return ""
+            return details
+
+        # Keep a copy of the recording, the file itself is deleted below
+        if RECORD_ARCHIVE:
+            try:
+                with stage("record_archive"):
+                    append_file(RECORD_ARCHIVE, "audio", audio_file)
+            except Exception as e:
+                print(f"Warning: Could not record audio to {RECORD_ARCHIVE}: {e}")
 
         print(f"Processing audio with Whisper ({model_name} model)...")
 
         # Load model (only once)
-        global whisper_model
-        if whisper_model is None:
-            print(f"Loading Whisper {model_name} model (this may take a moment the first time)...")
-            whisper_model = whisper.load_model(model_name).to(device)
-            print("Model loaded successfully.")
+        get_whisper_model(model_name)
+        if cascade:
+            get_whisper_model(CASCADE_FAST_MODEL)
 
         # Load audio file using wave instead of relying on FFmpeg
         try:
-            # Read the wave file directly instead of using whisper's load_audio
-            import numpy as np
-            with wave.open(audio_file, 'rb') as wf:
-                # Get audio parameters
-                channels = wf.getnchannels()
-                sample_width = wf.getsampwidth()
-                sample_rate = wf.getframerate()
-                n_frames = wf.getnframes()
-
-                # Read all frames
-                audio_bytes = wf.readframes(n_frames)
-
-                # Convert to numpy array
-                if sample_width == 2:  # 16-bit audio
-                    audio_data = np.frombuffer(audio_bytes, dtype=np.int16)
+            audio_data = load_wav_audio(audio_file)
+            if audio_data is None:
+                return details
+            if current_trace() is not None:
+                current_trace().audio_seconds = len(audio_data) / 16000
+
+            # Cheap energy check, silent recordings never reach a model
+            with stage("rms_check"):
+                details["rms"] = peak_rms(audio_data)
+            if EARLY_REJECTION and details["rms"] < MIN_SPEECH_RMS:
+                print(f"No speech energy in the recording (peak RMS {details['rms']:.4f}), skipping recognition.")
+                rejection_stats["silent"] += 1
+                details["rejected"] = "silent"
+                text = ""
+            else:
+                # Offline keyword recognizer first, Whisper only when it is not confident
+                text = recognize_keyword(audio_data)
+            if text is None:
+                # Transcribe audio using the prepared numpy array
+                result = transcribe_audio(audio_data, model_name, cascade=cascade)
+                text = result["text"].strip()
+                details["avg_logprob"], details["no_speech_prob"] = segment_confidence(result)
+
+                if EARLY_REJECTION and is_low_confidence(details["avg_logprob"], details["no_speech_prob"]):
+                    print(f"Whisper thinks this is not speech (no_speech_prob {details['no_speech_prob']:.2f}, "
+                          f"avg_logprob {details['avg_logprob']:.2f}), ignoring '{text}'.")
+                    rejection_stats["low_confidence"] += 1
+                    details["rejected"] = "low_confidence"
+                    text = ""
                 else:
-                    print(f"Unsupported sample width: {sample_width}")
-                    return ""
-
-                # Convert to float32 and normalize to [-1, 1]
-                audio_data = audio_data.astype(np.float32) / 32768.0
-
-                # If stereo, convert to mono
-                if channels == 2:
-                    audio_data = audio_data.reshape(-1, 2).mean(axis=1)
-
-                # Resample to 16000 Hz if needed (Whisper expects 16kHz)
-                if sample_rate != 16000:
-                    print(f"Warning: Audio sample rate is {sample_rate}Hz, not 16000Hz. Resampling may be required.")
-                    # Simple resampling by linear interpolation
-                    if sample_rate > 16000:
-                        # Downsample
-                        ratio = sample_rate / 16000
-                        audio_data = audio_data[::int(ratio)]
-                    else:
-                        # Upsample (not ideal but better than nothing)
-                        ratio = 16000 / sample_rate
-                        audio_data = np.repeat(audio_data, int(ratio))
-
-            # Transcribe audio using the prepared numpy array
-            result = whisper_model.transcribe(audio_data, fp16=False, language='English')
-            text = result["text"].strip()
-
-            print(f"Transcription successful: '{text}'")
+                    print(f"Transcription successful: '{text}'")
 
             # Clean up temp file
             try:
@@ -180,7 +795,8 @@ def recognize_with_whisper(audio_file, model_name="small"):
             except Exception as e:
                 print(f"Warning: Could not delete temp file: {e}")
 
-            return text
+            details["text"] = text
+            return details
 
         except Exception as inner_e:
             print(f"Error processing audio directly: {inner_e}")
@@ -201,11 +817,12 @@ def recognize_with_whisper(audio_file, model_name="small"):
                 audio_data = waveform.squeeze().numpy()
 
                 # Transcribe
-                result = whisper_model.transcribe(audio_data, fp16=False, language='English')
-                text = result["text"].strip()
+                result = transcribe_audio(audio_data, model_name, cascade=cascade)
+                details["text"] = result["text"].strip()
+                details["avg_logprob"], details["no_speech_prob"] = segment_confidence(result)
 
-                print(f"Transcription successful (alternative method): '{text}'")
-                return text
+                print(f"Transcription successful (alternative method): '{details['text']}'")
+                return details
             except Exception as torch_e:
                 print(f"Alternative method also failed: {torch_e}")
                 raise
@@ -214,179 +831,7 @@ def recognize_with_whisper(audio_file, model_name="small"):
         print(f"Error in speech recognition: {e}")
         import traceback
         traceback.print_exc()
-        return ""
-
-
-def parse_battleship_coordinates(text):
-    """
-    Extract battleship coordinates from recognized text with enhanced parsing.
-
-    Args:
-        text (str): Recognized text
-
-    Returns:
-        list: List of extracted coordinates
-    """
-    if not text:
-        return []
-
-    # Convert text to uppercase
-    text = text.upper()
-
-    print(f"Parsing text for coordinates: '{text}'")
-
-    # Regular expression to find battleship coordinates
-    # This pattern looks for:
-    # - A letter A-J (for rows)
-    # - Followed by a number 1-10 (for columns)
-    # - With optional spaces between
-    pattern = r'([A-J])\s*?(10|[1-9])'
-
-    # Find all matches
-    matches = re.findall(pattern, text)
-
-    # Combine the matches back into coordinates
-    coordinates = [''.join(match) for match in matches]
-
-    # Example substitutions added below
-    substitutions = {
-        # A substitutions
-        'HA': 'A', 'KA': 'A', 'CA': 'A', 'AA': 'A', 'AY': 'A', 'EI': 'A', 'ACE': 'A', 'ALPHA': 'A',
-
-        # B substitutions
-        'BEE': 'B', 'BE': 'B', 'PEE': 'B', 'PETE': 'B', 'BRAVO': 'B', 'BEETLE': 'B', 'BEAT': 'B', 'BETA': 'B',
-
-        # C substitutions
-        'SEE': 'C', 'SEA': 'C', 'SI': 'C', 'CHARLIE': 'C', 'SIGHT': 'C', 'CESAR': 'C', 'SEAT': 'C',
-
-        # D substitutions
-        'DEE': 'D', 'DE': 'D', 'THE': 'D', 'DELTA': 'D', 'DEEP': 'D', 'DEAN': 'D', 'DEAL': 'D', 'DI': 'D',
-
-        # E substitutions
-        'HE': 'E', 'ME': 'E', 'ECHO': 'E', 'EAT': 'E', 'EASY': 'E', 'EVEN': 'E', 'EACH': 'E',
-
-        # F substitutions
-        'F': 'F', 'EF': 'F', 'IF': 'F', 'FOXTROT': 'F', 'EFFORT': 'F', 'HALF': 'F', 'LEAF': 'F',
-
-        # G substitutions
-        'G': 'G', 'GE': 'G', 'JEE': 'G', 'GOLF': 'G', 'JEEP': 'G', 'JI': 'G', 'GENE': 'G', 'JEEZ': 'G',
-
-        # H substitutions
-        'H': 'H', 'AGE': 'H', 'ITCH': 'H', 'HOTEL': 'H', 'AITCH': 'H', 'HEDGE': 'H', 'ETCH': 'H', 'HITCH': 'H',
-
-        # I substitutions
-        'I': 'I', 'EYE': 'I', 'AI': 'I', 'INDIA': 'I', 'WHY': 'I', 'IVE': 'I', 'AYE': 'I', 'HIGH': 'I',
-
-        # J substitutions
-        'J': 'J', 'JAY': 'J', 'JULIET': 'J', 'GEE': 'J', 'JET': 'J', 'JANE': 'J', 'JAIL': 'J', 'JAKE': 'J'
-    }
-
-    # Split text into words
-    words = text.replace('.', ' ').replace(',', ' ').split()
-
-    # Check for numerical mentions
-    number_words = {
-        'ONE': '1', 'WON': '1', 'ONCE': '1', 'WANT': '1',
-        'TU': '2', 'TWO': '2', 'TO': '2', 'TOO': '2', 'TUNE': '2', 'TOOTH': '2', 'YOU': '2',
-        'THREE': '3', 'TREE': '3', 'FREE': '3', 'DECREE': '3',
-        'FOUR': '4', 'FOR': '4', 'FORE': '4', 'FLOOR': '4', 'FOURTH': '4',
-        'FIVE': '5', 'HIVE': '5', 'FIFE': '5', 'FIGHT': '5', 'FIFTH': '5',
-        'SIX': '6', 'SICKS': '6', 'STICKS': '6', 'SICK': '6', 'SIXTH': '6',
-        'SEVEN': '7', 'HEAVEN': '7', 'KEVIN': '7', 'SEVERAL': '7', 'SEVENTH': '7',
-        'EIGHT': '8', 'ATE': '8', 'HATE': '8', 'FATE': '8', 'EIGHTH': '8',
-        'NINE': '9', 'WINE': '9', 'LINE': '9', 'SIGN': '9', 'NINTH': '9',
-        'TEN': '10', 'TENT': '10', 'TENTH': '10'
-    }
-
-    # Process each word to find potential coordinates
-    for i, word in enumerate(words):
-        # Check if this word is a letter substitute
-        for sub_key, sub_value in substitutions.items():
-            if word == sub_key:
-                # Check if next word is a number or number word
-                if i + 1 < len(words):
-                    next_word = words[i + 1]
-
-                    # Direct number
-                    if next_word.isdigit() and 1 <= int(next_word) <= 10:
-                        coordinates.append(f"{sub_value}{next_word}")
-
-                    # Number word
-                    elif next_word in number_words:
-                        coordinates.append(f"{sub_value}{number_words[next_word]}")
-
-    # Look for specific patterns like "B4" pronounced as "BEFORE"
-    special_cases = {
-        'BEFORE': 'B4', 'BEFOUR': 'B4', 'SEE YOU TOO': 'C2','SEE YOU': 'C2', 'BEE FOUR': 'B4', 'BE FOUR': 'B4', 'BEEF OR': 'B4', 'BE FOR': 'B4',
-        'SEA TOO': 'C2', 'SEE TOO': 'C2', 'SEE TWO': 'C2', 'SEA TWO': 'C2', 'SEAT OO': 'C2', 'SEAT WO': 'C2',
-        'ATE': 'A8', 'A ATE': 'A8', 'HATE': 'H8', 'GATE': 'G8', 'FATE': 'F8', 'DATE': 'D8',
-        'BENIGN': 'B9', 'SEIZE': 'C6', 'SEAVEN': 'C7', 'DEFEAT': 'D8', 'EFIVE': 'E5', 'EVEN': 'E1',
-        'AFORE': 'A4', 'AFIVE': 'A5', 'BETEN': 'B10', 'BIONE': 'B1', 'BITOO': 'B2',
-        'DEFORE': 'D4', 'DEFIVE': 'D5', 'DETOO': 'D2', 'DETHREE': 'D3',
-        'EYETEN': 'I10', 'EYEFIVE': 'I5', 'EYEONE': 'I1', 'JAYONE': 'J1', 'JAYTOO': 'J2'
-    }
-
-    # Additional phonetic parsing by scanning through the text for combined sounds
-    phonetic_patterns = [
-        (r'([AEI])\s*WON', r'\g<1>1'),  # A WON -> A1
-        (r'([BCDEFGHIJ])[EI]+\s+WON', r'\g<1>1'),  # BEE WON -> B1
-        (r'SEE\s+WON', 'C1'),  # SEE WON -> C1
-        (r'DEE\s+TOO', 'D2'),  # DEE TOO -> D2
-        (r'([ABCDEFGHIJ])\s+TREE', r'\g<1>3'),  # A TREE -> A3
-        (r'TARGET\s+([ABCDEFGHIJ])[\s-]*([1-9]|10|TEN|ONE|TWO|THREE|FOUR|FIVE|SIX|SEVEN|EIGHT|NINE)', r'\g<1>\g<2>'),
-        # TARGET A1 -> A1
-        (r'FIRE\s+AT\s+([ABCDEFGHIJ])[\s-]*([1-9]|10|TEN|ONE|TWO|THREE|FOUR|FIVE|SIX|SEVEN|EIGHT|NINE)', r'\g<1>\g<2>'),
-        # FIRE AT B5 -> B5
-        (r'SHOOT\s+([ABCDEFGHIJ])[\s-]*([1-9]|10|TEN|ONE|TWO|THREE|FOUR|FIVE|SIX|SEVEN|EIGHT|NINE)', r'\g<1>\g<2>')
-        # SHOOT C3 -> C3
-    ]
-
-    # Apply phonetic patterns
-    for pattern, replacement in phonetic_patterns:
-        matches = re.findall(pattern, text)
-        if matches:
-            for match in matches:
-                if isinstance(match, tuple):
-                    # Handle tuple matches from capturing groups
-                    letter = match[0]
-                    number = match[1]
-
-                    # Convert number words to digits if needed
-                    if number in number_words:
-                        number = number_words[number]
-
-                    coordinates.append(f"{letter}{number}")
-                else:
-                    # Handle string replacement
-                    coordinates.append(replacement)
-
-    # For "a1", "b2", etc. that might be lowercase in the original text
-    lowercase_pattern = r'([a-j])\s*?(10|[1-9])'
-    lowercase_matches = re.findall(lowercase_pattern, text.lower())
-    lowercase_coords = [f"{match[0].upper()}{match[1]}" for match in lowercase_matches]
-    coordinates.extend(lowercase_coords)
-
-    # Remove duplicates and ensure all coordinates are valid
-    unique_coords = []
-    for coord in coordinates:
-        # Process word substitutions in the coordinate if they exist
-        # For example, if coord is "BONE", it should be processed as "B1"
-        if len(coord) > 2 and coord not in special_cases.keys():
-            for num_word, num_val in number_words.items():
-                if num_word in coord:
-                    # Try to extract the letter part
-                    letter_part = coord[0]
-                    if letter_part in 'ABCDEFGHIJ':
-                        potential_coord = f"{letter_part}{num_val}"
-                        if potential_coord not in unique_coords:
-                            unique_coords.append(potential_coord)
-
-        # Standard validation
-        if coord not in unique_coords and len(coord) >= 2:
-            if coord[0] in 'ABCDEFGHIJ' and coord[1:] in ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10']:
-                unique_coords.append(coord)
-
-    return unique_coords
+        return details
 
 
 def create_json_output(coordinates):
@@ -439,6 +884,165 @@ def save_json_output(json_output, auto_save=True):
     return None
 
 
+def finish_trace(trace):
+    """
+    Print the stage timings of a command and add them to the rolling metrics.
+
+    Args:
+        trace (RequestTrace): Trace of the command, None does nothing
+    """
+    if trace is None:
+        return
+    if PRINT_REQUEST_TRACE:
+        print(trace.summary())
+    request_metrics.record(trace)
+    if METRICS_PATH:
+        try:
+            request_metrics.export(METRICS_PATH)
+        except OSError as e:
+            print(f"Warning: Could not write metrics file: {e}")
+
+
+def handle_recognition(text, latency_s, session_data, session_log, auto_export_json, trace=None, details=None):
+    """
+    Parse, report and log the result of one recognition.
+
+    Args:
+        text (str): Recognized text (empty if nothing was recognized)
+        latency_s (float): Time from the end of the recording to the recognized text
+        session_data (dict): Session statistics, updated in place
+        session_log (SessionLog): Log the recognition is appended to
+        auto_export_json (bool): Whether to also write a JSON file for this recognition
+        trace (RequestTrace): Stage timings of this command, printed and added to the metrics
+        details (dict): Confidence values from recognize_with_details, printed when present
+
+    Returns:
+        list: Extracted coordinates
+    """
+    if details and details["avg_logprob"] is not None:
+        print(f"Whisper confidence: avg_logprob {details['avg_logprob']:.2f}, "
+              f"no_speech_prob {details['no_speech_prob']:.2f}")
+
+    if not text:
+        if details and details["rejected"] == "silent":
+            print("❌ The recording was silent.")
+        elif details and details["rejected"] == "low_confidence":
+            print("❌ Only noise was recognized.")
+        else:
+            print("❌ No speech detected or recognized.")
+        session_log.log(text, [], latency_s)
+        session_data["failed_recognitions"] += 1
+        print("Tips:")
+        print("- Speak louder or closer to the microphone")
+        print("- Make sure your microphone isn't muted")
+        print("- Try speaking for longer (2-3 seconds)")
+        finish_trace(trace)
+        return []
+
+    print(f"Recognized text: '{text}'")
+
+    # Parse coordinates
+    with activate(trace), stage("parse"):
+        coordinates = parse_battleship_coordinates(text)
+    session_log.log(text, coordinates, latency_s)
+
+    if coordinates:
+        print(f"✓ Successfully extracted coordinates: {coordinates}")
+        session_data["successful_recognitions"] += 1
+
+        # Create JSON output
+        json_output = create_json_output(coordinates)
+        print("\nJSON Output:")
+        print(json_output)
+
+        # Save JSON output (only if configured to do so)
+        if auto_export_json:
+            saved_file = save_json_output(json_output, auto_save=True)
+            if saved_file:
+                session_data["exported_files"].append(saved_file)
+    else:
+        print("❌ No battleship coordinates found in the speech.")
+        session_data["failed_recognitions"] += 1
+        print("Tips:")
+        print("- Try speaking more clearly")
+        print("- Say coordinates like 'A1', 'B5', 'C10'")
+        print("- Try phrases like 'Fire at D4' or 'Target E5'")
+
+    finish_trace(trace)
+    return coordinates
+
+
+def print_session_stats(session_data):
+    """Print the running success rate and the cache / cascade counters."""
+    total_attempts = session_data["successful_recognitions"] + session_data["failed_recognitions"]
+    if total_attempts > 0:
+        success_rate = (session_data["successful_recognitions"] / total_attempts) * 100
+        print(
+            f"\nSession stats: {session_data['successful_recognitions']} successful recognitions out of {total_attempts} attempts ({success_rate:.1f}% success rate)")
+        print(f"Files exported: {len(session_data['exported_files'])}")
+        if transcription_cache is not None:
+            print(f"Transcription cache: {transcription_cache.summary()}")
+        if CASCADE_MODE and cascade_stats["requests"]:
+            escalation_rate = (cascade_stats["escalations"] / cascade_stats["requests"]) * 100
+            print(f"Cascade: {cascade_stats['escalations']} of {cascade_stats['requests']} requests "
+                  f"escalated to the larger model ({escalation_rate:.1f}%)")
+        if rejection_stats["silent"] or rejection_stats["low_confidence"]:
+            print(f"Rejected early: {rejection_stats['silent']} silent recordings, "
+                  f"{rejection_stats['low_confidence']} low-confidence transcriptions")
+        if request_metrics.requests:
+            print(f"Latency: {request_metrics.summary()}")
+
+
+def run_continuous(session_data, session_log, auto_export_json, duration=5):
+    """
+    Keep recording while the previous utterance is transcribed (stops on Ctrl+C).
+
+    Recording runs on a capture thread and transcription on a worker thread (see
+    voice_pipeline.py), so each utterance needs its own temp file. Its trace travels
+    with it from one thread to the other.
+
+    Args:
+        session_data (dict): Session statistics, updated in place
+        session_log (SessionLog): Log the recognitions are appended to
+        auto_export_json (bool): Whether to also write a JSON file per recognition
+        duration (int): Recording duration per utterance in seconds
+    """
+    counter = {"next": 0}
+
+    def capture():
+        audio_path = os.path.join(os.getcwd(), f"temp_audio_{counter['next'] % 8}.wav")
+        counter["next"] += 1
+        trace = RequestTrace()
+        with trace.activate():
+            audio_path = record_audio(duration=duration, audio_path=audio_path)
+        return (audio_path, trace) if audio_path else None
+
+    def recognize(item):
+        audio_path, trace = item
+        with trace.activate():
+            return recognize_with_details(audio_path), trace
+
+    def on_result(index, result, latency_s):
+        print(f"\n---------------- command {index + 1} ----------------")
+        details, trace = result if result is not None else (None, None)
+        if trace is not None:
+            trace.label = index + 1
+        handle_recognition(details["text"] if details else "", latency_s, session_data, session_log,
+                           auto_export_json, trace, details)
+        print_session_stats(session_data)
+
+    pipeline = VoicePipeline(capture, recognize, on_result).start()
+    print("Continuous mode: speak a command every few seconds, press Ctrl+C to stop.")
+    try:
+        while pipeline.capturing:
+            time.sleep(0.5)
+        print(f"\nRecording keeps failing ({pipeline.capture_error}), leaving continuous mode.")
+    except KeyboardInterrupt:
+        print("\nStopping... (finishing the commands that were already recorded)")
+    pipeline.stop()
+    session_data["failed_recognitions"] += pipeline.stats["capture_failures"]
+
+
 def main():
     print("\n======================================")
     print("  BATTLESHIP VOICE COMMAND RECOGNIZER  ")
@@ -450,17 +1054,26 @@ def main():
 
     # Pre-load the whisper model
     print("Initializing Whisper model...")
-    global whisper_model
-    whisper_model = whisper.load_model("small").to(device)
+    get_whisper_model("small")
+    if CASCADE_MODE:
+        get_whisper_model(CASCADE_FAST_MODEL)
     print("Whisper model initialized successfully!")
 
     # Configuration options
-    auto_export_json = True  # Set to True to automatically export JSON files
+    # Recognitions always go to the session log, the per-recognition JSON files are optional
+    auto_export_json = False  # Set to True to also write a JSON file for every recognition
 
     # Ask user if they want to auto-export JSON
-    auto_export_choice = input("Do you want to automatically export JSON files? (y/n, default: y): ")
-    if auto_export_choice.lower() == 'n':
-        auto_export_json = False
+    auto_export_choice = input("Do you also want one JSON file per recognition? (y/n, default: n): ")
+    if auto_export_choice.lower() == 'y':
+        auto_export_json = True
+
+    # Continuous mode records the next command while the previous one is transcribed
+    continuous_choice = input("Continuous mode (keep listening, no Enter between commands)? (y/n, default: n): ")
+    continuous = continuous_choice.lower() == 'y'
+
+    session_log = SessionLog(SESSION_LOG_PATH)
+    print(f"Logging recognitions to {SESSION_LOG_PATH} (session {session_log.session_id})")
 
     # Store session statistics
     session_data = {
@@ -470,61 +1083,31 @@ def main():
     }
 
     try:
-        while True:
+        if continuous:
+            run_continuous(session_data, session_log, auto_export_json)
+
+        while not continuous:
             print("\n----------------------------------")
             input("Press Enter to start recording...")
 
-            # Record audio
-            audio_file = record_audio(duration=5)
-            if not audio_file:
-                print("Failed to record audio. Please try again.")
-                session_data["failed_recognitions"] += 1
-                continue
-
-            # Recognize speech
-            text = recognize_with_whisper(audio_file)
-
-            if text:
-                print(f"Recognized text: '{text}'")
-
-                # Parse coordinates
-                coordinates = parse_battleship_coordinates(text)
-
-                if coordinates:
-                    print(f"✓ Successfully extracted coordinates: {coordinates}")
-                    session_data["successful_recognitions"] += 1
-
-                    # Create JSON output
-                    json_output = create_json_output(coordinates)
-                    print("\nJSON Output:")
-                    print(json_output)
-
-                    # Save JSON output (automatically if configured to do so)
-                    saved_file = save_json_output(json_output, auto_save=auto_export_json)
-                    if saved_file:
-                        session_data["exported_files"].append(saved_file)
-                else:
-                    print("❌ No battleship coordinates found in the speech.")
+            # Every stage of this command is timed into its trace
+            trace = RequestTrace()
+            with trace.activate():
+                # Record audio
+                audio_file = record_audio(duration=5)
+                if not audio_file:
+                    print("Failed to record audio. Please try again.")
                     session_data["failed_recognitions"] += 1
-                    print("Tips:")
-                    print("- Try speaking more clearly")
-                    print("- Say coordinates like 'A1', 'B5', 'C10'")
-                    print("- Try phrases like 'Fire at D4' or 'Target E5'")
-            else:
-                print("❌ No speech detected or recognized.")
-                session_data["failed_recognitions"] += 1
-                print("Tips:")
-                print("- Speak louder or closer to the microphone")
-                print("- Make sure your microphone isn't muted")
-                print("- Try speaking for longer (2-3 seconds)")
+                    continue
+
+                # Recognize speech
+                start_time = time.perf_counter()
+                details = recognize_with_details(audio_file)
+            handle_recognition(details["text"], time.perf_counter() - start_time, session_data, session_log,
+                               auto_export_json, trace, details)
 
             # Show session statistics
-            total_attempts = session_data["successful_recognitions"] + session_data["failed_recognitions"]
-            if total_attempts > 0:
-                success_rate = (session_data["successful_recognitions"] / total_attempts) * 100
-                print(
-                    f"\nSession stats: {session_data['successful_recognitions']} successful recognitions out of {total_attempts} attempts ({success_rate:.1f}% success rate)")
-                print(f"Files exported: {len(session_data['exported_files'])}")
+            print_session_stats(session_data)
 
             # Ask if the user wants to continue
             cont = input("\nContinue? (y/n): ")
@@ -539,12 +1122,25 @@ def main():
         traceback.print_exc()
 
     finally:
+        stop_capture_service()
+        stop_batching_transcribers()
+
+        # Write anything still buffered and show the aggregate stats for this session
+        session_log.close()
+        stats = query_stats(SESSION_LOG_PATH, session_log.session_id)
+        if stats["total"]:
+            print(f"\nSession log: {stats['successful']}/{stats['total']} recognitions, "
+                  f"average latency {stats['avg_latency_ms']:.0f} ms, p95 {stats['p95_latency_ms']:.0f} ms")
+        if request_metrics.requests and METRICS_PATH:
+            print(f"Latency metrics ({request_metrics.summary()}) written to {METRICS_PATH}")
+
         # Clean up any remaining temp files
-        if os.path.exists("temp_audio.wav"):
-            try:
-                os.remove("temp_audio.wav")
-            except:
-                pass
+        for temp_file in ["temp_audio.wav"] + [f"temp_audio_{i}.wav" for i in range(8)]:
+            if os.path.exists(temp_file):
+                try:
+                    os.remove(temp_file)
+                except:
+                    pass
 
         # Show summary of files exported
         if session_data["exported_files"]:
@@ -556,4 +1152,4 @@ def main():
             print(f"Total: {len(session_data['exported_files'])} files")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
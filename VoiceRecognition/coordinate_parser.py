@@ -0,0 +1,164 @@
+"""
+Battleship coordinate parser.
+
+All lookup tables and regular expressions are built once at import time so that
+parse_battleship_coordinates only does dict lookups and precompiled regex scans
+per call (it runs on every recognition, and on whole corpora in the test scripts).
+"""
+
+import re
+
+VALID_LETTERS = 'ABCDEFGHIJ'
+VALID_NUMBERS = frozenset(['1', '2', '3', '4', '5', '6', '7', '8', '9', '10'])
+
+# Regular expression to find battleship coordinates
+# This pattern looks for:
+# - A letter A-J (for rows)
+# - Followed by a number 1-10 (for columns)
+# - With optional spaces between
+COORDINATE_PATTERN = re.compile(r'([A-J])\s*?(10|[1-9])')
+
+# Words that Whisper tends to write instead of the spoken letter
+SUBSTITUTIONS = {
+    # A substitutions
+    'HA': 'A', 'KA': 'A', 'CA': 'A', 'AA': 'A', 'AY': 'A', 'EI': 'A', 'ACE': 'A', 'ALPHA': 'A',
+
+    # B substitutions
+    'BEE': 'B', 'BE': 'B', 'PEE': 'B', 'PETE': 'B', 'BRAVO': 'B', 'BEETLE': 'B', 'BEAT': 'B', 'BETA': 'B',
+
+    # C substitutions
+    'SEE': 'C', 'SEA': 'C', 'SI': 'C', 'CHARLIE': 'C', 'SIGHT': 'C', 'CESAR': 'C', 'SEAT': 'C',
+
+    # D substitutions
+    'DEE': 'D', 'DE': 'D', 'THE': 'D', 'DELTA': 'D', 'DEEP': 'D', 'DEAN': 'D', 'DEAL': 'D', 'DI': 'D',
+
+    # E substitutions
+    'HE': 'E', 'ME': 'E', 'ECHO': 'E', 'EAT': 'E', 'EASY': 'E', 'EVEN': 'E', 'EACH': 'E',
+
+    # F substitutions
+    'F': 'F', 'EF': 'F', 'IF': 'F', 'FOXTROT': 'F', 'EFFORT': 'F', 'HALF': 'F', 'LEAF': 'F',
+
+    # G substitutions
+    'G': 'G', 'GE': 'G', 'JEE': 'G', 'GOLF': 'G', 'JEEP': 'G', 'JI': 'G', 'GENE': 'G', 'JEEZ': 'G',
+
+    # H substitutions
+    'H': 'H', 'AGE': 'H', 'ITCH': 'H', 'HOTEL': 'H', 'AITCH': 'H', 'HEDGE': 'H', 'ETCH': 'H', 'HITCH': 'H',
+
+    # I substitutions
+    'I': 'I', 'EYE': 'I', 'AI': 'I', 'INDIA': 'I', 'WHY': 'I', 'IVE': 'I', 'AYE': 'I', 'HIGH': 'I',
+
+    # J substitutions
+    'J': 'J', 'JAY': 'J', 'JULIET': 'J', 'GEE': 'J', 'JET': 'J', 'JANE': 'J', 'JAIL': 'J', 'JAKE': 'J'
+}
+
+# Words that Whisper tends to write instead of the spoken number
+NUMBER_WORDS = {
+    'ONE': '1', 'WON': '1', 'ONCE': '1', 'WANT': '1',
+    'TU': '2', 'TWO': '2', 'TO': '2', 'TOO': '2', 'TUNE': '2', 'TOOTH': '2', 'YOU': '2',
+    'THREE': '3', 'TREE': '3', 'FREE': '3', 'DECREE': '3',
+    'FOUR': '4', 'FOR': '4', 'FORE': '4', 'FLOOR': '4', 'FOURTH': '4',
+    'FIVE': '5', 'HIVE': '5', 'FIFE': '5', 'FIGHT': '5', 'FIFTH': '5',
+    'SIX': '6', 'SICKS': '6', 'STICKS': '6', 'SICK': '6', 'SIXTH': '6',
+    'SEVEN': '7', 'HEAVEN': '7', 'KEVIN': '7', 'SEVERAL': '7', 'SEVENTH': '7',
+    'EIGHT': '8', 'ATE': '8', 'HATE': '8', 'FATE': '8', 'EIGHTH': '8',
+    'NINE': '9', 'WINE': '9', 'LINE': '9', 'SIGN': '9', 'NINTH': '9',
+    'TEN': '10', 'TENT': '10', 'TENTH': '10'
+}
+
+# Look for specific patterns like "B4" pronounced as "BEFORE"
+# NOTE: these are not matched against the text yet. The old parser only checked membership
+# in this table, which never changed its result, so the table is kept here for reference.
+SPECIAL_CASES = {
+    'BEFORE': 'B4', 'BEFOUR': 'B4', 'SEE YOU TOO': 'C2', 'SEE YOU': 'C2', 'BEE FOUR': 'B4', 'BE FOUR': 'B4', 'BEEF OR': 'B4', 'BE FOR': 'B4',
+    'SEA TOO': 'C2', 'SEE TOO': 'C2', 'SEE TWO': 'C2', 'SEA TWO': 'C2', 'SEAT OO': 'C2', 'SEAT WO': 'C2',
+    'ATE': 'A8', 'A ATE': 'A8', 'HATE': 'H8', 'GATE': 'G8', 'FATE': 'F8', 'DATE': 'D8',
+    'BENIGN': 'B9', 'SEIZE': 'C6', 'SEAVEN': 'C7', 'DEFEAT': 'D8', 'EFIVE': 'E5', 'EVEN': 'E1',
+    'AFORE': 'A4', 'AFIVE': 'A5', 'BETEN': 'B10', 'BIONE': 'B1', 'BITOO': 'B2',
+    'DEFORE': 'D4', 'DEFIVE': 'D5', 'DETOO': 'D2', 'DETHREE': 'D3',
+    'EYETEN': 'I10', 'EYEFIVE': 'I5', 'EYEONE': 'I1', 'JAYONE': 'J1', 'JAYTOO': 'J2'
+}
+
+_COMMAND_NUMBER = r'([1-9]|10|TEN|ONE|TWO|THREE|FOUR|FIVE|SIX|SEVEN|EIGHT|NINE)'
+
+# Additional phonetic parsing by scanning through the text for combined sounds.
+# Each entry is (keyword, compiled pattern, fixed result). The keyword is a cheap
+# substring check so the regex only runs when it can possibly match. Patterns with a
+# fixed result append it once per match, the others append letter + number from the groups.
+# The old "A WON", "BEE WON" and "A TREE" patterns only had one capture group, so re.findall
+# returned plain strings and the appended r'\g<1>1' / r'\g<1>3' never passed validation.
+# They are left out here since they could never produce a coordinate.
+PHONETIC_PATTERNS = [
+    ('WON', re.compile(r'SEE\s+WON'), 'C1'),  # SEE WON -> C1
+    ('TOO', re.compile(r'DEE\s+TOO'), 'D2'),  # DEE TOO -> D2
+    ('TARGET', re.compile(r'TARGET\s+([ABCDEFGHIJ])[\s-]*' + _COMMAND_NUMBER), None),  # TARGET A1 -> A1
+    ('FIRE', re.compile(r'FIRE\s+AT\s+([ABCDEFGHIJ])[\s-]*' + _COMMAND_NUMBER), None),  # FIRE AT B5 -> B5
+    ('SHOOT', re.compile(r'SHOOT\s+([ABCDEFGHIJ])[\s-]*' + _COMMAND_NUMBER), None),  # SHOOT C3 -> C3
+]
+
+_PUNCTUATION = str.maketrans('.,', '  ')
+
+
+def parse_battleship_coordinates(text, verbose=True):
+    """
+    Extract battleship coordinates from recognized text with enhanced parsing.
+
+    Args:
+        text (str): Recognized text
+        verbose (bool): Whether to print the text being parsed
+
+    Returns:
+        list: List of extracted coordinates
+    """
+    if not text:
+        return []
+
+    # Convert text to uppercase
+    text = text.upper()
+
+    if verbose:
+        print(f"Parsing text for coordinates: '{text}'")
+
+    # Direct matches like "B5" or "J 10"
+    coordinates = [letter + number for letter, number in COORDINATE_PATTERN.findall(text)]
+
+    # Single pass over the words: letter substitute followed by a number or number word
+    words = text.translate(_PUNCTUATION).split()
+    for i in range(len(words) - 1):
+        letter = SUBSTITUTIONS.get(words[i])
+        if letter is None:
+            continue
+
+        next_word = words[i + 1]
+
+        # Direct number
+        if next_word.isdigit() and 1 <= int(next_word) <= 10:
+            coordinates.append(f"{letter}{next_word}")
+
+        # Number word
+        elif next_word in NUMBER_WORDS:
+            coordinates.append(f"{letter}{NUMBER_WORDS[next_word]}")
+
+    # Apply phonetic patterns
+    for keyword, pattern, fixed in PHONETIC_PATTERNS:
+        if keyword not in text:
+            continue
+        if fixed is not None:
+            coordinates.extend(fixed for _ in pattern.finditer(text))
+        else:
+            for letter, number in pattern.findall(text):
+                coordinates.append(f"{letter}{NUMBER_WORDS.get(number, number)}")
+
+    # The old lowercase re-scan of the text found exactly the same matches as COORDINATE_PATTERN,
+    # and none of the collected coordinates can contain a number word, so both checks are gone.
+
+    # Remove duplicates (keeping the first occurrence) and ensure all coordinates are valid
+    unique_coords = []
+    seen = set()
+    for coord in coordinates:
+        if coord in seen:
+            continue
+        if coord[0] in VALID_LETTERS and coord[1:] in VALID_NUMBERS:
+            seen.add(coord)
+            unique_coords.append(coord)
+
+    return unique_coords
@@ -0,0 +1,428 @@
+"""
+Offline keyword recognizer for the 100 battleship coordinates (A1-J10).
+
+Each coordinate is learned from a few recorded samples. A command is matched
+against them with MFCC features and dynamic time warping (DTW):
+
+1. every template is also stored as a fixed-length "summary" vector, so one matrix
+   product ranks all templates and picks a shortlist of candidates
+2. only the shortlist is compared with the full DTW distance
+
+This answers in a few milliseconds on the CPU, without a network round trip. A
+command whose best DTW distance is above an absolute threshold (calibrated on the
+templates, see calibrate) is not a coordinate at all (noise, a cough, another
+phrase) and is rejected. Otherwise the confidence is the relative gap between the
+best coordinate and the runner-up, so callers can fall back to Whisper when it is low.
+
+The features of a template directory are cached in keyword_templates.npz next to the
+templates and rebuilt when a WAV file is added, removed or changed, so a new process
+(route.ts starts one per request) does not recompute every MFCC.
+
+Templates are WAV files (16-bit mono, 16kHz) named after the coordinate, either
+as <dir>/<COORD>/<anything>.wav or <dir>/<COORD>_<anything>.wav.
+
+Usage:
+    python keyword_recognizer.py templates/ command.wav
+"""
+
+import os
+import re
+import sys
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_LENGTH = 400  # 25 ms
+FRAME_STEP = 160  # 10 ms
+N_FFT = 512
+N_MELS = 26
+N_MFCC = 13
+SUMMARY_FRAMES = 20  # frames in the fixed-length summary vector used for the shortlist
+
+# Absolute rejection (see KeywordRecognizer.calibrate)
+# dtw_distance is per frame, so the threshold does not depend on the length of the command
+MAX_DISTANCE = 2.0  # used until there are enough held-out distances to calibrate
+MIN_CALIBRATION_SAMPLES = 5
+CALIBRATION_PERCENTILE = 95  # of the held-out distances of correct matches
+CALIBRATION_MARGIN = 1.25  # threshold = percentile * margin
+
+CACHE_NAME = "keyword_templates.npz"
+
+_COORDINATE_NAME = re.compile(r'^([A-J](?:10|[1-9]))(?:[_\-. ]|$)', re.IGNORECASE)
+
+
+def _mel_filterbank():
+    """Triangular mel filters, shape (N_MELS, N_FFT // 2 + 1)."""
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def mel_to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    mel_points = np.linspace(hz_to_mel(0), hz_to_mel(SAMPLE_RATE / 2), N_MELS + 2)
+    bins = np.floor((N_FFT + 1) * mel_to_hz(mel_points) / SAMPLE_RATE).astype(int)
+
+    filters = np.zeros((N_MELS, N_FFT // 2 + 1), dtype=np.float32)
+    for m in range(1, N_MELS + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        for k in range(left, center):
+            filters[m - 1, k] = (k - left) / max(center - left, 1)
+        for k in range(center, right):
+            filters[m - 1, k] = (right - k) / max(right - center, 1)
+    return filters
+
+
+def _dct_matrix():
+    """Orthonormal DCT-II matrix, shape (N_MELS, N_MFCC)."""
+    n = np.arange(N_MELS)
+    k = np.arange(N_MFCC)
+    dct = np.cos(np.pi / N_MELS * (n[:, None] + 0.5) * k[None, :]) * np.sqrt(2 / N_MELS)
+    dct[:, 0] /= np.sqrt(2)
+    return dct.astype(np.float32)
+
+
+# Built once at import so feature extraction is just a few matrix operations
+MEL_FILTERS = _mel_filterbank()
+DCT_MATRIX = _dct_matrix()
+WINDOW = np.hamming(FRAME_LENGTH).astype(np.float32)
+
+
+def voiced_bounds(audio_data, threshold_ratio=0.1, frame=FRAME_STEP):
+    """
+    Find the voiced part of a clip using the frame energy.
+
+    Args:
+        audio_data (numpy.ndarray): float32 samples
+        threshold_ratio (float): Frames quieter than this fraction of the loudest frame count as silence
+        frame (int): Frame size in samples
+
+    Returns:
+        tuple: (start, end) sample indices, the whole clip if everything is quiet
+    """
+    n_frames = len(audio_data) // frame
+    if n_frames == 0:
+        return 0, len(audio_data)
+    energy = np.sqrt(np.mean(audio_data[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+    voiced = np.nonzero(energy > energy.max() * threshold_ratio)[0]
+    if len(voiced) == 0:
+        return 0, len(audio_data)
+    return int(voiced[0]) * frame, (int(voiced[-1]) + 1) * frame
+
+
+def trim_silence(audio_data, threshold_ratio=0.1, frame=FRAME_STEP):
+    """
+    Cut leading and trailing silence using the frame energy.
+
+    Args:
+        audio_data (numpy.ndarray): float32 samples
+        threshold_ratio (float): Frames quieter than this fraction of the loudest frame count as silence
+        frame (int): Frame size in samples
+
+    Returns:
+        numpy.ndarray: The voiced part (the input if everything is quiet)
+    """
+    start, end = voiced_bounds(audio_data, threshold_ratio, frame)
+    return audio_data[start:end]
+
+
+def mfcc(audio_data):
+    """
+    Compute mean-normalized MFCC features.
+
+    Args:
+        audio_data (numpy.ndarray): float32 samples at 16kHz
+
+    Returns:
+        numpy.ndarray: Features, shape (frames, N_MFCC)
+    """
+    audio_data = np.asarray(audio_data, dtype=np.float32)
+    if len(audio_data) < FRAME_LENGTH:
+        audio_data = np.pad(audio_data, (0, FRAME_LENGTH - len(audio_data)))
+
+    # Pre-emphasis boosts the high frequencies that carry most of the consonants
+    emphasized = np.append(audio_data[0], audio_data[1:] - 0.97 * audio_data[:-1])
+
+    n_frames = 1 + (len(emphasized) - FRAME_LENGTH) // FRAME_STEP
+    strides = (emphasized.strides[0] * FRAME_STEP, emphasized.strides[0])
+    frames = np.lib.stride_tricks.as_strided(emphasized, (n_frames, FRAME_LENGTH), strides) * WINDOW
+
+    power = np.abs(np.fft.rfft(frames, N_FFT)) ** 2 / N_FFT
+    log_mel = np.log(power @ MEL_FILTERS.T + 1e-10)
+    features = log_mel @ DCT_MATRIX
+    return (features - features.mean(axis=0)).astype(np.float32)
+
+
+def summary_vector(features):
+    """Resample a feature sequence to SUMMARY_FRAMES frames and flatten it (unit length)."""
+    positions = np.linspace(0, len(features) - 1, SUMMARY_FRAMES)
+    indices = np.round(positions).astype(int)
+    vector = features[indices].ravel()
+    return vector / (np.linalg.norm(vector) + 1e-10)
+
+
+def dtw_distance(a, b):
+    """
+    DTW distance between two feature sequences, normalized by their total length.
+
+    Each row is computed with NumPy: the horizontal step is turned into a running
+    minimum with np.minimum.accumulate, so there is no Python loop over the columns.
+
+    Args:
+        a (numpy.ndarray): Features, shape (n, d)
+        b (numpy.ndarray): Features, shape (m, d)
+
+    Returns:
+        float: Normalized DTW distance
+    """
+    # Euclidean frame-to-frame costs, shape (n, m)
+    cost = np.sqrt(np.maximum(
+        (a * a).sum(axis=1)[:, None] + (b * b).sum(axis=1)[None, :] - 2 * a @ b.T, 0))
+
+    previous = np.cumsum(cost[0])
+    for i in range(1, len(a)):
+        row = cost[i]
+        # best of the diagonal and vertical steps into each cell
+        from_above = np.minimum(previous, np.concatenate(([np.inf], previous[:-1]))) + row
+        # D[j] = min(from_above[j], D[j - 1] + row[j]), solved with a running minimum
+        running = np.cumsum(row)
+        previous = np.minimum.accumulate(from_above - running) + running
+    return float(previous[-1] / (len(a) + len(b)))
+
+
+def template_files(template_dir):
+    """
+    Find the template WAV files of a directory.
+
+    Args:
+        template_dir (str): Directory laid out as <COORD>/<file>.wav or <COORD>_<file>.wav
+
+    Returns:
+        list: (coordinate, path) pairs, in a fixed order
+    """
+    files = []
+    for root, dirs, names in os.walk(template_dir):
+        dirs.sort()
+        folder = os.path.basename(root).upper()
+        for name in sorted(names):
+            if not name.lower().endswith(".wav"):
+                continue
+            match = _COORDINATE_NAME.match(name) or _COORDINATE_NAME.match(folder)
+            if match:
+                files.append((match.group(1).upper(), os.path.join(root, name)))
+    return files
+
+
+def _files_signature(files):
+    """Changes whenever a template file is added, removed or rewritten (name, size and mtime of every file)."""
+    entries = []
+    for coordinate, path in files:
+        stat = os.stat(path)
+        entries.append(f"{coordinate}|{path}|{stat.st_size}|{stat.st_mtime_ns}")
+    return "\n".join(entries)
+
+
+def read_wav(path):
+    """Read a 16-bit mono WAV file as float32 samples."""
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2 or wf.getnchannels() != 1 or wf.getframerate() != SAMPLE_RATE:
+            raise ValueError(f"{path}: templates must be 16-bit mono {SAMPLE_RATE}Hz WAV files")
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    return data.astype(np.float32) / 32768.0
+
+
+class KeywordRecognizer:
+    """
+    Template-matching recognizer for the battleship coordinates.
+
+    Args:
+        shortlist (int): Number of templates that get the full DTW comparison
+        max_distance (float): Commands further than this from every template are rejected, None uses
+            MAX_DISTANCE until calibrate() is called
+    """
+
+    def __init__(self, shortlist=8, max_distance=None):
+        self.shortlist = shortlist
+        self.max_distance = MAX_DISTANCE if max_distance is None else max_distance
+        self.labels = []
+        self.templates = []
+        self._summaries = np.zeros((0, SUMMARY_FRAMES * N_MFCC), dtype=np.float32)
+
+    def add_template(self, coordinate, audio_data):
+        """
+        Learn one recorded sample of a coordinate.
+
+        Args:
+            coordinate (str): Coordinate spoken in the sample, e.g. "B4"
+            audio_data (numpy.ndarray): float32 samples at 16kHz
+        """
+        features = mfcc(trim_silence(audio_data))
+        self.labels.append(coordinate.upper())
+        self.templates.append(features)
+        self._summaries = np.vstack([self._summaries, summary_vector(features)[None, :]])
+
+    def _label_distance(self, features, coordinate, skip=None):
+        """Smallest DTW distance to the templates of one coordinate (None if it has none besides skip)."""
+        distances = [dtw_distance(features, template) for i, (label, template)
+                     in enumerate(zip(self.labels, self.templates)) if label == coordinate and i != skip]
+        return min(distances) if distances else None
+
+    def calibrate(self, held_out=None):
+        """
+        Set max_distance from the distances of correctly matched commands.
+
+        Every held-out command is compared with the templates of its own coordinate, and the
+        threshold is CALIBRATION_MARGIN times the CALIBRATION_PERCENTILE of those distances.
+        Without held-out recordings every template is held out in turn against the other
+        templates of its coordinate (leave-one-out).
+
+        Args:
+            held_out (list): (coordinate, float32 samples) pairs that were not used as templates, or None
+
+        Returns:
+            float: The threshold (unchanged if there were fewer than MIN_CALIBRATION_SAMPLES distances)
+        """
+        distances = []
+        if held_out is None:
+            for i, (coordinate, features) in enumerate(zip(self.labels, self.templates)):
+                distances.append(self._label_distance(features, coordinate, skip=i))
+        else:
+            for coordinate, audio_data in held_out:
+                distances.append(self._label_distance(mfcc(trim_silence(audio_data)), coordinate.upper()))
+        distances = [distance for distance in distances if distance is not None]
+        if len(distances) >= MIN_CALIBRATION_SAMPLES:
+            self.max_distance = float(np.percentile(distances, CALIBRATION_PERCENTILE) * CALIBRATION_MARGIN)
+        return self.max_distance
+
+    def save_features(self, path, signature=""):
+        """Write the template features and the threshold to an .npz file (see load_features)."""
+        lengths = np.array([len(features) for features in self.templates], dtype=np.int64)
+        features = np.concatenate(self.templates) if self.templates else np.zeros((0, N_MFCC), dtype=np.float32)
+        # write next to the target and rename, so a process reading at the same time never sees half a file
+        temp_path = path + f".{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, labels=np.array(self.labels, dtype=str), lengths=lengths, features=features,
+                     summaries=self._summaries, max_distance=self.max_distance, signature=signature)
+        os.replace(temp_path, path)
+
+    def load_features(self, path, signature=None):
+        """
+        Load features written by save_features.
+
+        Args:
+            path (str): .npz file
+            signature (str): Only load it if it was saved with this signature
+
+        Returns:
+            bool: Whether the features were loaded
+        """
+        with np.load(path) as data:
+            if signature is not None and str(data["signature"]) != signature:
+                return False
+            boundaries = np.cumsum(data["lengths"])[:-1]
+            self.labels = [str(label) for label in data["labels"]]
+            self.templates = np.split(data["features"], boundaries) if self.labels else []
+            self._summaries = data["summaries"]
+            self.max_distance = float(data["max_distance"])
+        return True
+
+    @classmethod
+    def from_directory(cls, template_dir, verbose=True, cache=True, **kwargs):
+        """
+        Load every template WAV file in a directory.
+
+        The features and the calibrated threshold are cached in CACHE_NAME inside the directory,
+        and only recomputed when the template files change.
+
+        Args:
+            template_dir (str): Directory laid out as <COORD>/<file>.wav or <COORD>_<file>.wav
+            verbose (bool): Whether to print how many templates were loaded
+            cache (bool): Use and update the feature cache
+            **kwargs: Passed to KeywordRecognizer, an explicit max_distance is not calibrated
+
+        Returns:
+            KeywordRecognizer: Recognizer with all templates loaded
+        """
+        recognizer = cls(**kwargs)
+        files = template_files(template_dir)
+        signature = _files_signature(files)
+        cache_path = os.path.join(template_dir, CACHE_NAME)
+
+        loaded = False
+        if cache and os.path.exists(cache_path):
+            try:
+                loaded = recognizer.load_features(cache_path, signature)
+            except Exception as e:
+                if verbose:
+                    print(f"Keyword recognizer: ignoring unreadable cache {cache_path}: {e}")
+        if not loaded:
+            for coordinate, path in files:
+                recognizer.add_template(coordinate, read_wav(path))
+            recognizer.calibrate()
+            if cache:
+                try:
+                    recognizer.save_features(cache_path, signature)
+                except OSError as e:
+                    if verbose:
+                        print(f"Keyword recognizer: could not write cache {cache_path}: {e}")
+        if "max_distance" in kwargs and kwargs["max_distance"] is not None:
+            recognizer.max_distance = kwargs["max_distance"]
+
+        if verbose:
+            print(f"Keyword recognizer: {len(recognizer.templates)} templates for "
+                  f"{len(set(recognizer.labels))} coordinates, rejecting above distance "
+                  f"{recognizer.max_distance:.2f}" + (" (cached)" if loaded else ""))
+        return recognizer
+
+    def recognize(self, audio_data):
+        """
+        Match a command against the templates.
+
+        Args:
+            audio_data (numpy.ndarray): float32 samples at 16kHz
+
+        Returns:
+            tuple: (coordinate, confidence in [0, 1]), (None, 0.0) if there are no templates or the
+                command is further than max_distance from every template
+        """
+        if not self.templates:
+            return None, 0.0
+
+        features = mfcc(trim_silence(audio_data))
+
+        # Cheap ranking of every template with one matrix-vector product
+        similarity = self._summaries @ summary_vector(features)
+        candidates = np.argsort(-similarity)[:self.shortlist]
+
+        # Full DTW only for the shortlist, keeping the best distance per coordinate
+        best = {}
+        for index in candidates:
+            distance = dtw_distance(features, self.templates[index])
+            label = self.labels[index]
+            if distance < best.get(label, np.inf):
+                best[label] = distance
+
+        ranked = sorted(best.items(), key=lambda item: item[1])
+        coordinate, distance = ranked[0]
+        # not close to any template: noise or not a coordinate, however clear the ranking is
+        if distance > self.max_distance:
+            return None, 0.0
+        if len(ranked) == 1:
+            # no runner-up to compare with, so only the distance itself says how good the match is
+            return coordinate, float(1 - distance / self.max_distance)
+        confidence = 1 - distance / ranked[1][1] if ranked[1][1] > 0 else 0.0
+        return coordinate, float(confidence)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python keyword_recognizer.py <template_dir> <command.wav> [...]")
+        sys.exit(1)
+
+    keyword_recognizer = KeywordRecognizer.from_directory(sys.argv[1])
+    for wav_path in sys.argv[2:]:
+        start = time.perf_counter()
+        coord, conf = keyword_recognizer.recognize(read_wav(wav_path))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"{wav_path}: {coord} (confidence {conf:.2f}, {elapsed_ms:.1f} ms)")
@@ -0,0 +1,237 @@
+"""
+Per-stage latency tracing and rolling metrics for voice commands.
+
+A RequestTrace collects how long each stage of one command took (device open,
+recording, WAV write/read, resampling, model load, transcription, parsing, ...).
+The trace is made active on the current thread, so code deep in the pipeline can
+time itself with `with stage("transcribe"):` without passing the trace around;
+when no trace is active that is a no-op.
+
+LatencyMetrics keeps the last `window` values of every stage and the real-time
+factor, and writes their p50/p95 to a metrics file after every command, either in
+the Prometheus text format (.prom) or as JSON (.json).
+
+Usage (print a metrics file):
+    python latency_metrics.py [battleship_metrics.prom]
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Stages that wait for the speaker rather than compute, left out of the real-time factor
+CAPTURE_STAGES = ("device_open", "record")
+
+_active = threading.local()
+
+
+class RequestTrace:
+    """
+    Stage timings of a single voice command.
+
+    Args:
+        label (str): Name shown in the printed trace, e.g. the command number
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+        self.stages = {}
+        self.audio_seconds = None
+
+    def add(self, name, seconds):
+        """Add time to a stage (a stage that runs twice, e.g. in the cascade, is summed)."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time the body of the with-block as one stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @property
+    def total(self):
+        """Time spent in all stages in seconds."""
+        return sum(self.stages.values())
+
+    @property
+    def processing(self):
+        """Time spent in all stages except the capture stages in seconds."""
+        return sum(seconds for name, seconds in self.stages.items() if name not in CAPTURE_STAGES)
+
+    @property
+    def rtf(self):
+        """Real-time factor (processing time / audio duration, lower is better), None if unknown."""
+        if not self.audio_seconds:
+            return None
+        return self.processing / self.audio_seconds
+
+    def summary(self):
+        """
+        Format the trace as one line.
+
+        Returns:
+            str: e.g. "record 5003 ms | wav_read 1 ms | transcribe 412 ms | total 5417 ms | RTF 0.08"
+        """
+        parts = [f"{name} {seconds * 1000:.0f} ms" if seconds >= 0.001 else f"{name} {seconds * 1000:.2f} ms"
+                 for name, seconds in self.stages.items()]
+        parts.append(f"total {self.total * 1000:.0f} ms")
+        if self.rtf is not None:
+            parts.append(f"RTF {self.rtf:.2f}")
+        prefix = f"Trace [{self.label}]" if self.label is not None else "Trace"
+        return f"{prefix}: " + " | ".join(parts)
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Make this the trace that stage() records into on the current thread."""
+        previous = getattr(_active, "trace", None)
+        _active.trace = self
+        try:
+            yield self
+        finally:
+            _active.trace = previous
+
+
+def current_trace():
+    """Return the trace active on this thread, or None."""
+    return getattr(_active, "trace", None)
+
+
+@contextlib.contextmanager
+def activate(trace):
+    """Like trace.activate(), but does nothing when trace is None."""
+    if trace is None:
+        yield None
+    else:
+        with trace.activate():
+            yield trace
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time the body of the with-block in the active trace (no-op without one)."""
+    trace = current_trace()
+    if trace is None:
+        yield
+    else:
+        with trace.stage(name):
+            yield
+
+
+def _percentile(values, p):
+    """Nearest-rank percentile of a list of numbers (same method as session_log.query_stats)."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+class LatencyMetrics:
+    """
+    Rolling per-stage latency statistics.
+
+    Args:
+        window (int): Number of recent commands the percentiles are computed over
+    """
+
+    def __init__(self, window=100):
+        self.window = window
+        self.requests = 0
+        self._recent = {}
+        self._counts = {}
+        self._sums = {}
+        self._rtf = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, trace):
+        """Add the stages of a finished trace."""
+        with self._lock:
+            self.requests += 1
+            for name, seconds in list(trace.stages.items()) + [("total", trace.total)]:
+                self._recent.setdefault(name, deque(maxlen=self.window)).append(seconds)
+                self._counts[name] = self._counts.get(name, 0) + 1
+                self._sums[name] = self._sums.get(name, 0.0) + seconds
+            if trace.rtf is not None:
+                self._rtf.append(trace.rtf)
+
+    def snapshot(self):
+        """
+        Get the current percentiles.
+
+        Returns:
+            dict: Request count, per-stage p50/p95 (ms) over the window and the RTF percentiles
+        """
+        with self._lock:
+            stages = {name: {"p50_ms": _percentile(list(values), 50) * 1000,
+                             "p95_ms": _percentile(list(values), 95) * 1000,
+                             "count": self._counts[name],
+                             "sum_ms": self._sums[name] * 1000}
+                      for name, values in self._recent.items()}
+            rtf = list(self._rtf)
+            return {
+                "updated": datetime.now().isoformat(),
+                "requests": self.requests,
+                "window": self.window,
+                "stages": stages,
+                "rtf": {"p50": _percentile(rtf, 50), "p95": _percentile(rtf, 95)},
+            }
+
+    def to_prometheus(self):
+        """Format the snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = ["# HELP battleship_voice_requests_total Voice commands processed",
+                 "# TYPE battleship_voice_requests_total counter",
+                 f"battleship_voice_requests_total {snapshot['requests']}",
+                 "# HELP battleship_voice_stage_seconds Per-stage latency, quantiles over the last "
+                 f"{snapshot['window']} commands",
+                 "# TYPE battleship_voice_stage_seconds summary"]
+        for name, values in snapshot["stages"].items():
+            lines.append(f'battleship_voice_stage_seconds{{stage="{name}",quantile="0.5"}} {values["p50_ms"] / 1000:.6f}')
+            lines.append(f'battleship_voice_stage_seconds{{stage="{name}",quantile="0.95"}} {values["p95_ms"] / 1000:.6f}')
+            lines.append(f'battleship_voice_stage_seconds_sum{{stage="{name}"}} {values["sum_ms"] / 1000:.6f}')
+            lines.append(f'battleship_voice_stage_seconds_count{{stage="{name}"}} {values["count"]}')
+        if snapshot["rtf"]["p50"] is not None:
+            lines += ["# HELP battleship_voice_rtf Real-time factor (processing time / audio duration)",
+                      "# TYPE battleship_voice_rtf gauge",
+                      f'battleship_voice_rtf{{quantile="0.5"}} {snapshot["rtf"]["p50"]:.4f}',
+                      f'battleship_voice_rtf{{quantile="0.95"}} {snapshot["rtf"]["p95"]:.4f}']
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """
+        Write the metrics file, as JSON when the path ends in .json and in the Prometheus format otherwise.
+
+        The file is written next to the target and renamed, so a reader never sees half a file.
+
+        Args:
+            path (str): Output path
+        """
+        if path.endswith(".json"):
+            content = json.dumps(self.snapshot(), indent=2)
+        else:
+            content = self.to_prometheus()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    def summary(self, stages=("transcribe", "total")):
+        """One-line p50/p95 summary of a few stages for the console."""
+        snapshot = self.snapshot()
+        parts = [f"{name} {snapshot['stages'][name]['p50_ms']:.0f}/{snapshot['stages'][name]['p95_ms']:.0f} ms"
+                 for name in stages if name in snapshot["stages"]]
+        if snapshot["rtf"]["p50"] is not None:
+            parts.append(f"RTF {snapshot['rtf']['p50']:.2f}/{snapshot['rtf']['p95']:.2f}")
+        return "p50/p95 " + ", ".join(parts)
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1] if len(sys.argv) > 1 else "battleship_metrics.prom") as metrics_file:
+        print(metrics_file.read())
@@ -0,0 +1,123 @@
+"""
+Cached, memory-mappable Whisper model artifacts for fast cold starts.
+
+whisper.load_model reads the checkpoint, builds the model with freshly initialized
+weights and then copies the checkpoint weights into it, every time a process starts.
+The preparation step here does that once and saves the finished model (optionally
+already int8 quantized) with torch.save in a local cache directory. Later processes
+load it with torch.load(mmap=True): the weights stay in the page cache and are only
+paged in when a layer first touches them, and there is no re-initialization, no
+state-dict copy and no quantization pass.
+
+Nothing here needs the network once the cache is populated. The artifacts are
+pickled models, so only load artifacts you prepared yourself. Quantized linear
+layers repack their weights when they are loaded, so for int8 the saving comes
+from skipping the checkpoint load and the quantization, not from lazy paging.
+
+Usage (prepare the artifacts, needs the Whisper checkpoint once):
+    python model_artifacts.py small [tiny ...] [--quantize] [--cache-dir model_cache]
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+import torch
+import whisper
+
+# Bumped when the layout of the artifacts changes, older artifacts are then ignored
+ARTIFACT_FORMAT = 1
+
+
+def artifact_path(model_name, quantized=False, cache_dir="model_cache"):
+    """Return the path of the artifact for a model and precision."""
+    return os.path.join(cache_dir, f"whisper-{model_name}-{'int8' if quantized else 'fp32'}.pt")
+
+
+def save_model_artifact(model, model_name, quantized=False, cache_dir="model_cache"):
+    """
+    Save a ready-to-run model to the cache.
+
+    Args:
+        model: Whisper model on the CPU (already quantized when quantized is True)
+        model_name (str): Whisper model name ('tiny', 'base', 'small', etc.)
+        quantized (bool): Whether the model was int8 quantized
+        cache_dir (str): Cache directory (created if missing)
+
+    Returns:
+        str: Path to the artifact
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = artifact_path(model_name, quantized, cache_dir)
+
+    # Written next to the target and renamed, so a crash never leaves half an artifact behind
+    temp_path = f"{path}.tmp"
+    torch.save(model.cpu(), temp_path)
+    os.replace(temp_path, path)
+
+    metadata = {
+        "format": ARTIFACT_FORMAT,
+        "model_name": model_name,
+        "quantized": quantized,
+        "torch_version": torch.__version__,
+        "whisper_version": getattr(whisper, "__version__", None),
+        "created": datetime.now().isoformat(),
+        "size_bytes": os.path.getsize(path),
+    }
+    with open(f"{path}.json", "w") as f:
+        json.dump(metadata, f, indent=2)
+    return path
+
+
+def load_model_artifact(model_name, quantized=False, cache_dir="model_cache"):
+    """
+    Load a prepared model from the cache with memory mapping.
+
+    Args:
+        model_name (str): Whisper model name ('tiny', 'base', 'small', etc.)
+        quantized (bool): Load the int8 artifact instead of the fp32 one
+        cache_dir (str): Cache directory
+
+    Returns:
+        The model on the CPU, or None if there is no usable artifact
+    """
+    path = artifact_path(model_name, quantized, cache_dir)
+    if not os.path.exists(path) or not os.path.exists(f"{path}.json"):
+        return None
+
+    with open(f"{path}.json") as f:
+        metadata = json.load(f)
+    if metadata.get("format") != ARTIFACT_FORMAT or metadata.get("torch_version") != torch.__version__:
+        # Pickled (and especially quantized) modules are not portable across torch versions
+        print(f"Warning: {path} was prepared with torch {metadata.get('torch_version')}, "
+              f"this is torch {torch.__version__}. Run model_artifacts.py again.")
+        return None
+
+    try:
+        model = torch.load(path, map_location="cpu", mmap=True, weights_only=False)
+    except TypeError:
+        # torch < 2.1 has no mmap option, the artifact still skips the rebuild
+        model = torch.load(path, map_location="cpu")
+    return model.eval()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare memory-mappable Whisper model artifacts")
+    parser.add_argument("models", nargs="+", help="Whisper model names, e.g. small tiny")
+    parser.add_argument("--quantize", action="store_true", help="Save the int8 quantized model (CPU only)")
+    parser.add_argument("--cache-dir", default="model_cache", help="Cache directory")
+    args = parser.parse_args()
+
+    import battleship_voice
+
+    # Quantization only happens on the CPU, load_whisper_model falls back to fp32 on the GPU
+    quantized = args.quantize and battleship_voice.device == 'cpu'
+    for model_name in args.models:
+        model = battleship_voice.load_whisper_model(model_name, cpu_optimized=quantized)
+        path = save_model_artifact(model, model_name, quantized, args.cache_dir)
+        print(f"Saved {path} ({os.path.getsize(path) / (1024 * 1024):.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
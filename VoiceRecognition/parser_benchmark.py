@@ -0,0 +1,160 @@
+"""
+Micro-benchmark for parse_battleship_coordinates.
+
+Compares the precompiled parser in coordinate_parser.py against the original
+implementation (copied below as legacy_parse_battleship_coordinates), checks that
+both return exactly the same coordinates and prints the per-call time for short
+commands and long transcripts.
+
+Usage:
+    python parser_benchmark.py [--calls 2000] [--seed 0]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from coordinate_parser import NUMBER_WORDS, SUBSTITUTIONS, parse_battleship_coordinates
+
+
+def legacy_parse_battleship_coordinates(text):
+    """Original parser from battleship_voice.py (print removed), used as the reference."""
+    if not text:
+        return []
+
+    text = text.upper()
+
+    pattern = r'([A-J])\s*?(10|[1-9])'
+    matches = re.findall(pattern, text)
+    coordinates = [''.join(match) for match in matches]
+
+    substitutions = dict(SUBSTITUTIONS)
+    words = text.replace('.', ' ').replace(',', ' ').split()
+    number_words = dict(NUMBER_WORDS)
+
+    for i, word in enumerate(words):
+        for sub_key, sub_value in substitutions.items():
+            if word == sub_key:
+                if i + 1 < len(words):
+                    next_word = words[i + 1]
+                    if next_word.isdigit() and 1 <= int(next_word) <= 10:
+                        coordinates.append(f"{sub_value}{next_word}")
+                    elif next_word in number_words:
+                        coordinates.append(f"{sub_value}{number_words[next_word]}")
+
+    special_cases = {
+        'BEFORE': 'B4', 'BEFOUR': 'B4', 'SEE YOU TOO': 'C2', 'SEE YOU': 'C2', 'BEE FOUR': 'B4', 'BE FOUR': 'B4', 'BEEF OR': 'B4', 'BE FOR': 'B4',
+        'SEA TOO': 'C2', 'SEE TOO': 'C2', 'SEE TWO': 'C2', 'SEA TWO': 'C2', 'SEAT OO': 'C2', 'SEAT WO': 'C2',
+        'ATE': 'A8', 'A ATE': 'A8', 'HATE': 'H8', 'GATE': 'G8', 'FATE': 'F8', 'DATE': 'D8',
+        'BENIGN': 'B9', 'SEIZE': 'C6', 'SEAVEN': 'C7', 'DEFEAT': 'D8', 'EFIVE': 'E5', 'EVEN': 'E1',
+        'AFORE': 'A4', 'AFIVE': 'A5', 'BETEN': 'B10', 'BIONE': 'B1', 'BITOO': 'B2',
+        'DEFORE': 'D4', 'DEFIVE': 'D5', 'DETOO': 'D2', 'DETHREE': 'D3',
+        'EYETEN': 'I10', 'EYEFIVE': 'I5', 'EYEONE': 'I1', 'JAYONE': 'J1', 'JAYTOO': 'J2'
+    }
+
+    phonetic_patterns = [
+        (r'([AEI])\s*WON', r'\g<1>1'),
+        (r'([BCDEFGHIJ])[EI]+\s+WON', r'\g<1>1'),
+        (r'SEE\s+WON', 'C1'),
+        (r'DEE\s+TOO', 'D2'),
+        (r'([ABCDEFGHIJ])\s+TREE', r'\g<1>3'),
+        (r'TARGET\s+([ABCDEFGHIJ])[\s-]*([1-9]|10|TEN|ONE|TWO|THREE|FOUR|FIVE|SIX|SEVEN|EIGHT|NINE)', r'\g<1>\g<2>'),
+        (r'FIRE\s+AT\s+([ABCDEFGHIJ])[\s-]*([1-9]|10|TEN|ONE|TWO|THREE|FOUR|FIVE|SIX|SEVEN|EIGHT|NINE)', r'\g<1>\g<2>'),
+        (r'SHOOT\s+([ABCDEFGHIJ])[\s-]*([1-9]|10|TEN|ONE|TWO|THREE|FOUR|FIVE|SIX|SEVEN|EIGHT|NINE)', r'\g<1>\g<2>')
+    ]
+
+    for pattern, replacement in phonetic_patterns:
+        matches = re.findall(pattern, text)
+        if matches:
+            for match in matches:
+                if isinstance(match, tuple):
+                    letter = match[0]
+                    number = match[1]
+                    if number in number_words:
+                        number = number_words[number]
+                    coordinates.append(f"{letter}{number}")
+                else:
+                    coordinates.append(replacement)
+
+    lowercase_pattern = r'([a-j])\s*?(10|[1-9])'
+    lowercase_matches = re.findall(lowercase_pattern, text.lower())
+    lowercase_coords = [f"{match[0].upper()}{match[1]}" for match in lowercase_matches]
+    coordinates.extend(lowercase_coords)
+
+    unique_coords = []
+    for coord in coordinates:
+        if len(coord) > 2 and coord not in special_cases.keys():
+            for num_word, num_val in number_words.items():
+                if num_word in coord:
+                    letter_part = coord[0]
+                    if letter_part in 'ABCDEFGHIJ':
+                        potential_coord = f"{letter_part}{num_val}"
+                        if potential_coord not in unique_coords:
+                            unique_coords.append(potential_coord)
+
+        if coord not in unique_coords and len(coord) >= 2:
+            if coord[0] in 'ABCDEFGHIJ' and coord[1:] in ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10']:
+                unique_coords.append(coord)
+
+    return unique_coords
+
+
+# Phrasings seen in testing (see the comments in coordinate_parser.py) plus filler words
+COMMAND_PHRASES = [
+    'B2', 'A1', 'J 10', 'C7.', 'Fire at C7', 'Target E5', 'Shoot C3', 'fire at d four',
+    'target a ten', 'Bee four', 'See won', 'Dee too', 'Charlie seven', 'Golf nine',
+    'Jay one', 'Hotel 8', 'India ten', 'Echo 3', 'Delta, two', 'the 5', 'see you too',
+    'before', 'A won', 'B tree', 'shoot j-10', 'half five', 'eye ten',
+]
+FILLER_WORDS = ['okay', 'um', 'so', 'let', 'me', 'try', 'again', 'please', 'now', 'next', 'and', 'then']
+
+
+def make_transcript(rng, n_phrases):
+    """Build a random transcript of n_phrases commands separated by filler words."""
+    parts = []
+    for _ in range(n_phrases):
+        parts.extend(rng.sample(FILLER_WORDS, rng.randint(0, 3)))
+        parts.append(rng.choice(COMMAND_PHRASES))
+    return ' '.join(parts)
+
+
+def time_per_call(parse, transcripts, calls):
+    """Return the average time per call in microseconds."""
+    n = len(transcripts)
+    start = time.perf_counter()
+    for i in range(calls):
+        parse(transcripts[i % n])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the battleship coordinate parser")
+    parser.add_argument("--calls", type=int, default=2000, help="Parser calls per measurement")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the transcripts")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    def fast_parse(text):
+        return parse_battleship_coordinates(text, verbose=False)
+
+    print(f"{'transcript':>22} | {'legacy (us)':>12} | {'precompiled (us)':>16} | {'speedup':>7}")
+    for n_phrases in (1, 5, 25, 100):
+        transcripts = [make_transcript(rng, n_phrases) for _ in range(200)]
+
+        # Both parsers must agree before any timing is reported
+        for transcript in transcripts:
+            expected = legacy_parse_battleship_coordinates(transcript)
+            actual = fast_parse(transcript)
+            if expected != actual:
+                raise AssertionError(f"Parser mismatch for {transcript!r}: {expected} != {actual}")
+
+        legacy_us = time_per_call(legacy_parse_battleship_coordinates, transcripts, args.calls)
+        fast_us = time_per_call(fast_parse, transcripts, args.calls)
+        label = f"{n_phrases} phrase(s)"
+        print(f"{label:>22} | {legacy_us:12.1f} | {fast_us:16.1f} | {legacy_us / fast_us:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Accuracy and throughput harness for parse_battleship_coordinates.
+
+Runs the parser over a labelled corpus of transcripts (parser_corpus.jsonl, one
+{"text", "expected", "category"} object per line) and reports:
+
+- precision and recall per coordinate (true / false positives and misses)
+- the exact-match rate per category of phrasing
+- every transcript whose result differs from its label
+- the parse throughput in calls per second
+
+Every transcript in the corpus is hand-written: the coordinates of the recorded
+battleship_coordinates_*.json outputs (those files keep the parsed coordinates, not
+what Whisper heard) and the phrasings mentioned in coordinate_parser.py. Real
+transcripts from a session log can be added with --session-log.
+
+Save a baseline once and compare against it after a parser change, the harness
+exits with status 1 when a transcript that used to be parsed correctly no longer
+is. parser_baseline.json holds the baseline of the current parser.
+
+Usage:
+    python parser_harness.py [--corpus parser_corpus.jsonl] [--session-log battleship_session.db]
+                             [--write-baseline parser_baseline.json | --baseline parser_baseline.json]
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+
+from coordinate_parser import parse_battleship_coordinates
+
+
+def load_corpus(path):
+    """
+    Read the labelled transcripts.
+
+    Args:
+        path (str): JSONL file with "text", "expected" and "category" per line
+
+    Returns:
+        list: Corpus entries (dicts)
+    """
+    corpus = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                corpus.append(json.loads(line))
+    return corpus
+
+
+def load_session_log(db_path):
+    """
+    Use the transcripts of a session log as extra corpus entries.
+
+    The logged coordinates are what the parser returned at the time, so these entries
+    catch changes in behaviour rather than prove that the old result was right.
+
+    Args:
+        db_path (str): SQLite session log (see session_log.py)
+
+    Returns:
+        list: Corpus entries (dicts) with category "session_log"
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT DISTINCT transcript, coordinates FROM recognitions WHERE transcript != ''").fetchall()
+    finally:
+        conn.close()
+    return [{"text": text, "expected": json.loads(coordinates), "category": "session_log"}
+            for text, coordinates in rows]
+
+
+def evaluate(parse, corpus):
+    """
+    Compare the parser output with the labels.
+
+    Args:
+        parse (callable): Takes a transcript and returns a list of coordinates
+        corpus (list): Corpus entries
+
+    Returns:
+        dict: "coordinates" (per-coordinate tp/fp/fn counts), "categories" (correct/total per
+            category), "failures" (entries with their actual output) and "passing" (texts parsed correctly)
+    """
+    coordinates = {}
+    categories = {}
+    failures = []
+    passing = []
+
+    for entry in corpus:
+        expected = set(entry["expected"])
+        actual = parse(entry["text"])
+        predicted = set(actual)
+
+        for coord in expected | predicted:
+            counts = coordinates.setdefault(coord, {"tp": 0, "fp": 0, "fn": 0})
+            if coord in expected and coord in predicted:
+                counts["tp"] += 1
+            elif coord in predicted:
+                counts["fp"] += 1
+            else:
+                counts["fn"] += 1
+
+        category = categories.setdefault(entry.get("category", "other"), {"correct": 0, "total": 0})
+        category["total"] += 1
+        if predicted == expected:
+            category["correct"] += 1
+            passing.append(entry["text"])
+        else:
+            failures.append({**entry, "actual": actual})
+
+    return {"coordinates": coordinates, "categories": categories, "failures": failures, "passing": passing}
+
+
+def precision_recall(counts):
+    """Return (precision, recall) for tp/fp/fn counts, None where it is undefined."""
+    precision = counts["tp"] / (counts["tp"] + counts["fp"]) if counts["tp"] + counts["fp"] else None
+    recall = counts["tp"] / (counts["tp"] + counts["fn"]) if counts["tp"] + counts["fn"] else None
+    return precision, recall
+
+
+def measure_throughput(parse, texts, seconds=1.0):
+    """
+    Call the parser over the texts for about `seconds` seconds.
+
+    Returns:
+        float: Calls per second
+    """
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        for text in texts:
+            parse(text)
+        calls += len(texts)
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+
+def print_report(results, show_all=False):
+    """Print the per-coordinate, per-category and failure sections."""
+    def fmt(value):
+        return f"{value:9.2f}" if value is not None else f"{'-':>9}"
+
+    print(f"{'coord':>5} | {'tp':>4} | {'fp':>4} | {'fn':>4} | {'precision':>9} | {'recall':>9}")
+    totals = {"tp": 0, "fp": 0, "fn": 0}
+    for coord in sorted(results["coordinates"], key=lambda c: (c[0], int(c[1:]) if c[1:].isdigit() else 0)):
+        counts = results["coordinates"][coord]
+        for key in totals:
+            totals[key] += counts[key]
+        precision, recall = precision_recall(counts)
+        if show_all or counts["fp"] or counts["fn"]:
+            print(f"{coord:>5} | {counts['tp']:4d} | {counts['fp']:4d} | {counts['fn']:4d} | "
+                  f"{fmt(precision)} | {fmt(recall)}")
+    precision, recall = precision_recall(totals)
+    print(f"{'all':>5} | {totals['tp']:4d} | {totals['fp']:4d} | {totals['fn']:4d} | "
+          f"{fmt(precision)} | {fmt(recall)}")
+    if not show_all:
+        print("(coordinates without errors are hidden, use --all to list them)")
+
+    print(f"\n{'category':>14} | exact matches")
+    for category, counts in sorted(results["categories"].items()):
+        print(f"{category:>14} | {counts['correct']}/{counts['total']}")
+
+    if results["failures"]:
+        print("\nMismatches:")
+        for failure in results["failures"]:
+            print(f"  {failure['text']!r}: expected {failure['expected']}, got {failure['actual']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the accuracy and throughput of the coordinate parser")
+    parser.add_argument("--corpus", default="parser_corpus.jsonl", help="Labelled transcripts (JSONL)")
+    parser.add_argument("--session-log", help="Also use the transcripts of this SQLite session log")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Duration of the throughput measurement")
+    parser.add_argument("--all", action="store_true", help="List every coordinate, not only the ones with errors")
+    parser.add_argument("--write-baseline", help="Save the transcripts that are parsed correctly to this file")
+    parser.add_argument("--baseline", help="Fail when a transcript that passed in this baseline now fails")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if args.session_log:
+        corpus += load_session_log(args.session_log)
+
+    def parse(text):
+        return parse_battleship_coordinates(text, verbose=False)
+
+    results = evaluate(parse, corpus)
+    print(f"Corpus: {len(corpus)} transcripts\n")
+    print_report(results, show_all=args.all)
+
+    throughput = measure_throughput(parse, [entry["text"] for entry in corpus], args.seconds)
+    print(f"\nThroughput: {throughput:,.0f} calls/s ({1e6 / throughput:.1f} us per call)")
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as f:
+            json.dump({"passing": results["passing"]}, f, indent=2)
+        print(f"Baseline with {len(results['passing'])} passing transcripts saved to {args.write_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = set(json.load(f)["passing"])
+        regressions = sorted(baseline - set(results["passing"]))
+        if regressions:
+            print(f"\n{len(regressions)} transcript(s) passed in {args.baseline} but fail now:")
+            for text in regressions:
+                print(f"  {text!r}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
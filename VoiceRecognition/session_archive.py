@@ -0,0 +1,235 @@
+"""
+Capture archive: every camera frame and voice command of a session in one file.
+
+route.ts deletes the captured image as soon as process_board.py has read it, and
+recognize_with_details deletes the recorded WAV after transcription, so a session
+cannot be looked at or run again afterwards. When recording is on (see
+RECORD_ARCHIVE in battleship_voice.py and --record in process_board.py) the raw
+bytes are appended to an archive first; session_replay.py feeds an archive back
+through both pipelines.
+
+Layout (little endian, every part starts on an 8-byte boundary):
+
+    header   b"BSARCHV1"
+    records  per record: b"REC1", kind (u32), timestamp (f64, time.time()), size (u64),
+             the payload (JPEG or WAV bytes) and zero padding
+    index    one INDEX_DTYPE entry per record
+    footer   index offset (u64), record count (u64), b"BSINDEX1"
+
+An append replaces the index and footer with the new record, a new index and a new
+footer, under an exclusive file lock, so the voice process and process_board.py can
+record into the same file. The reader maps the file once and takes the index and the
+payloads straight from the mapping without copying them. If a writer died before the
+footer was written the records are found by walking the record headers instead.
+
+Usage (list the records of an archive):
+    python session_archive.py session.bsa
+"""
+
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows, appends from several processes at once are not locked there
+    fcntl = None
+
+MAGIC = b"BSARCHV1"
+RECORD_MAGIC = b"REC1"
+FOOTER_MAGIC = b"BSINDEX1"
+RECORD_HEADER = struct.Struct("<4sIdQ")
+FOOTER = struct.Struct("<QQ8s")
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("size", "<u8"), ("timestamp", "<f8"), ("kind", "<u4"), ("pad", "<u4")])
+
+KINDS = {"frame": 1, "audio": 2}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+Record = namedtuple("Record", ["kind", "timestamp", "payload"])
+
+
+def _aligned(size):
+    return (size + 7) & ~7
+
+
+def _scan(buffer):
+    """Walk the record headers, returns the index entries of every complete record."""
+    entries = []
+    offset = len(MAGIC)
+    while offset + RECORD_HEADER.size <= len(buffer):
+        magic, kind, timestamp, size = RECORD_HEADER.unpack_from(buffer, offset)
+        payload = offset + RECORD_HEADER.size
+        if magic != RECORD_MAGIC or payload + size > len(buffer):
+            break
+        entries.append((payload, size, timestamp, kind, 0))
+        offset = _aligned(payload + size)
+    return np.array(entries, dtype=INDEX_DTYPE)
+
+
+def _read_index(buffer):
+    """
+    Find the index of an archive.
+
+    Args:
+        buffer (bytes-like): The whole archive
+
+    Returns:
+        tuple: (index entries, offset the next record goes to)
+    """
+    if len(buffer) >= len(MAGIC) + FOOTER.size:
+        index_offset, count, magic = FOOTER.unpack_from(buffer, len(buffer) - FOOTER.size)
+        if magic == FOOTER_MAGIC and index_offset + count * INDEX_DTYPE.itemsize + FOOTER.size == len(buffer):
+            return np.frombuffer(buffer, dtype=INDEX_DTYPE, count=count, offset=index_offset), index_offset
+    # no valid footer: a writer stopped halfway, keep the complete records
+    index = _scan(buffer)
+    end = _aligned(int(index["offset"][-1] + index["size"][-1])) if len(index) else len(MAGIC)
+    return index, end
+
+
+def _read_file_index(f):
+    """Same as _read_index for an open archive, only reads the footer and the index unless they are missing."""
+    size = f.seek(0, os.SEEK_END)
+    if size >= len(MAGIC) + FOOTER.size:
+        f.seek(size - FOOTER.size)
+        index_offset, count, magic = FOOTER.unpack(f.read(FOOTER.size))
+        if magic == FOOTER_MAGIC and index_offset + count * INDEX_DTYPE.itemsize + FOOTER.size == size:
+            f.seek(index_offset)
+            return np.frombuffer(f.read(count * INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE), index_offset
+    f.seek(0)
+    return _read_index(f.read())
+
+
+def append_record(path, kind, payload, timestamp=None):
+    """
+    Append a frame or an audio clip to an archive (created if missing).
+
+    Args:
+        path (str): Archive path
+        kind (str): "frame" or "audio"
+        payload (bytes-like): Encoded image or WAV file
+        timestamp (float): Capture time (time.time()), None for now
+
+    Returns:
+        int: Number of records in the archive
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    code = KINDS[kind]
+    payload = memoryview(payload).cast("B")
+
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        header = f.read(len(MAGIC))
+        if header != MAGIC:
+            if header:
+                raise ValueError(f"{path} is not a capture archive")
+            f.write(MAGIC)
+        index, end = _read_file_index(f)
+
+        offset = end + RECORD_HEADER.size
+        entry = np.array([(offset, len(payload), timestamp, code, 0)], dtype=INDEX_DTYPE)
+        index = np.concatenate([index, entry])
+        index_offset = _aligned(offset + len(payload))
+
+        # "a+b" only appends, so cut the old index off first and write everything after the last record
+        f.truncate(end)
+        f.write(RECORD_HEADER.pack(RECORD_MAGIC, code, timestamp, len(payload)))
+        f.write(payload)
+        f.write(b"\0" * (index_offset - offset - len(payload)))
+        f.write(index.tobytes())
+        f.write(FOOTER.pack(index_offset, len(index), FOOTER_MAGIC))
+        f.flush()
+    return len(index)
+
+
+def append_file(path, kind, source, timestamp=None):
+    """Append the contents of a file (e.g. tmp/captured.jpg or temp_audio.wav), see append_record."""
+    with open(source, "rb") as f:
+        return append_record(path, kind, f.read(), timestamp)
+
+
+class CaptureArchive:
+    """
+    Memory-mapped reader for an archive.
+
+    Payloads are memoryviews into the mapping, copy them (bytes(...)) to keep them after close().
+
+    Args:
+        path (str): Archive path
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a capture archive")
+        self.index, _ = _read_index(self._map)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        offset, size, timestamp, kind, _ = self.index[i]
+        return Record(KIND_NAMES.get(int(kind), str(kind)), float(timestamp),
+                      memoryview(self._map)[int(offset):int(offset + size)])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def counts(self):
+        """Number of records per kind."""
+        kinds, counts = np.unique(self.index["kind"], return_counts=True)
+        return {KIND_NAMES.get(int(kind), str(kind)): int(count) for kind, count in zip(kinds, counts)}
+
+    def duration(self):
+        """Seconds between the first and the last record."""
+        if not len(self):
+            return 0.0
+        return float(self.index["timestamp"].max() - self.index["timestamp"].min())
+
+    def close(self):
+        """Unmap the file."""
+        self.index = self.index[:0].copy()
+        try:
+            self._map.close()
+        except BufferError:
+            # a payload view is still alive, the mapping goes when it does
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python session_archive.py <archive>")
+        return
+
+    path = sys.argv[1]
+    with CaptureArchive(path) as archive:
+        if not len(archive):
+            print(f"{path}: no records")
+            return
+        start = float(archive.index["timestamp"].min())
+        for kind, timestamp, payload in archive:
+            print(f"{timestamp - start:9.2f} s  {kind:5}  {len(payload) / 1024:8.1f} KB")
+            del payload
+        counts = ", ".join(f"{count} {kind}" for kind, count in archive.counts().items())
+        print(f"{path}: {counts} over {archive.duration():.1f} s, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
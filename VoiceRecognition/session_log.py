@@ -0,0 +1,164 @@
+"""
+Append-only session log for voice recognitions.
+
+Every recognition (timestamp, transcript, coordinates, latency) is appended to one
+SQLite database in WAL mode instead of writing a new battleship_coordinates_<timestamp>.json
+file each time. Rows are buffered and written in batches, so a command costs a list
+append instead of an open/write/close.
+
+Usage (aggregate stats for a log):
+    python session_log.py [battleship_session.db]
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recognitions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    transcript TEXT NOT NULL,
+    coordinates TEXT NOT NULL,
+    latency_ms REAL,
+    success INTEGER NOT NULL
+)
+"""
+
+
+class SessionLog:
+    """
+    Buffered writer for the recognitions table.
+
+    Args:
+        db_path (str): Path to the SQLite database (created if missing)
+        flush_every (int): Write the buffer once it holds this many rows
+        flush_interval (float): Also write the buffer when the oldest row is this many seconds old
+    """
+
+    def __init__(self, db_path="battleship_session.db", flush_every=20, flush_interval=5.0):
+        self.db_path = db_path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.session_id = uuid.uuid4().hex[:12]
+
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    def log(self, transcript, coordinates, latency_s=None, timestamp=None):
+        """
+        Add a recognition to the log (written on the next flush).
+
+        Args:
+            transcript (str): Recognized text
+            coordinates (list): Parsed coordinates (empty when nothing was recognized)
+            latency_s (float): Time from the end of the recording to the parsed result in seconds
+            timestamp (str): ISO timestamp, defaults to now
+        """
+        row = (self.session_id,
+               timestamp or datetime.now().isoformat(),
+               transcript or "",
+               json.dumps(coordinates),
+               latency_s * 1000 if latency_s is not None else None,
+               1 if coordinates else 0)
+        with self._lock:
+            self._buffer.append(row)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if (len(self._buffer) >= self.flush_every
+                    or time.monotonic() - self._oldest >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        """Write all buffered rows in a single transaction."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO recognitions (session_id, timestamp, transcript, coordinates, latency_ms, success) "
+                "VALUES (?, ?, ?, ?, ?, ?)", self._buffer)
+        self._buffer = []
+        self._oldest = None
+
+    def close(self):
+        """Flush the buffer and close the database."""
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def query_stats(db_path="battleship_session.db", session_id=None):
+    """
+    Aggregate statistics over the log.
+
+    Args:
+        db_path (str): Path to the SQLite database
+        session_id (str): Only include this session, None for all sessions
+
+    Returns:
+        dict: Counts, success rate, latency stats and the most common coordinates
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        where, params = ("WHERE session_id = ?", (session_id,)) if session_id else ("", ())
+
+        total, successful, avg_latency, max_latency, sessions, first, last = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(success), 0), AVG(latency_ms), MAX(latency_ms), "
+            f"COUNT(DISTINCT session_id), MIN(timestamp), MAX(timestamp) FROM recognitions {where}",
+            params).fetchone()
+
+        latencies = [row[0] for row in conn.execute(
+            f"SELECT latency_ms FROM recognitions {where} "
+            f"{'AND' if where else 'WHERE'} latency_ms IS NOT NULL ORDER BY latency_ms", params)]
+
+        coordinate_counts = {}
+        for (coordinates,) in conn.execute(f"SELECT coordinates FROM recognitions {where}", params):
+            for coord in json.loads(coordinates):
+                coordinate_counts[coord] = coordinate_counts.get(coord, 0) + 1
+    finally:
+        conn.close()
+
+    def percentile(p):
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+    return {
+        "sessions": sessions,
+        "total": total,
+        "successful": successful,
+        "failed": total - successful,
+        "success_rate": successful / total if total else 0.0,
+        "avg_latency_ms": avg_latency,
+        "p50_latency_ms": percentile(50),
+        "p95_latency_ms": percentile(95),
+        "max_latency_ms": max_latency,
+        "first": first,
+        "last": last,
+        "top_coordinates": sorted(coordinate_counts.items(), key=lambda item: -item[1])[:10],
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(query_stats(sys.argv[1] if len(sys.argv) > 1 else "battleship_session.db"), indent=2))
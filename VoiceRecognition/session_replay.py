@@ -0,0 +1,199 @@
+"""
+Replay a capture archive through the board and voice pipelines.
+
+Every frame of the archive (see session_archive.py) goes through the same steps as
+process_board.py (decode, quality check, process_board) and every audio clip through
+recognize_with_whisper, in the order they were captured. At --speed 1 a record is
+only handed over when it is due, so the pipelines see the original timing of the
+session (and the lag shows when they fall behind it); --speed 0 runs every record
+straight after the previous one, which gives the throughput of the pipelines on
+real captures.
+
+Usage:
+    python session_replay.py session.bsa                  # original speed
+    python session_replay.py session.bsa --speed 0        # as fast as possible
+    python session_replay.py session.bsa --kind frame --mode cells --snap
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from session_archive import CaptureArchive
+
+
+def load_board_pipeline():
+    """Import process_board.py from the web app (it is not next to this file)."""
+    board_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "app", "api", "processBoard")
+    sys.path.insert(0, os.path.normpath(board_dir))
+    import process_board
+    return process_board
+
+
+def load_voice_pipeline():
+    """Import battleship_voice.py (loads torch and Whisper), with recording off so the replay is not recorded again."""
+    import battleship_voice
+    battleship_voice.RECORD_ARCHIVE = None
+    return battleship_voice
+
+
+def run_frame(board, payload, scale=1, mode="contours", snap=False, quality_check=True):
+    """
+    Run one frame the way process_board.py main() does.
+
+    Args:
+        board (module): process_board
+        payload (bytes-like): Encoded image
+        scale (int): Decode scale (1, 2, 4 or 8)
+        mode (str): "contours" or "cells"
+        snap (bool): Snap to the most likely legal fleet
+        quality_check (bool): Reject bad captures first
+
+    Returns:
+        dict: The JSON process_board.py would print, {"error": ...} when the pipeline failed
+    """
+    image = board.decode_image(payload, scale)
+    if image is None:
+        return {"error": "could not decode"}
+    if quality_check:
+        quality = board.check_quality(image)
+        if not quality["ok"]:
+            return {"boats": [], "rejected": quality["reason"], "quality": quality["metrics"]}
+    try:
+        return board.process_board(image, scale, mode, snap)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def run_audio(voice, payload, model_name="small"):
+    """
+    Run one clip through recognize_with_whisper.
+
+    Args:
+        voice (module): battleship_voice
+        payload (bytes-like): WAV file
+        model_name (str): Whisper model name
+
+    Returns:
+        str: Recognized text
+    """
+    # recognize_with_whisper takes a path and deletes the file when it is done
+    fd, audio_path = tempfile.mkstemp(suffix=".wav")
+    with os.fdopen(fd, "wb") as f:
+        f.write(payload)
+    try:
+        return voice.recognize_with_whisper(audio_path, model_name)
+    finally:
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+
+
+def replay(archive, handlers, speed=1.0):
+    """
+    Hand the records of an archive to their handlers in capture order.
+
+    Args:
+        archive (CaptureArchive): Open archive
+        handlers (dict): {kind: callable taking the payload}, records of other kinds are skipped
+        speed (float): 1 replays at the original pace, 2 twice as fast, 0 as fast as possible
+
+    Yields:
+        tuple: (record, handler result, processing seconds, seconds the record was handed over late)
+    """
+    timestamps = archive.index["timestamp"]
+    # the voice process and process_board.py append independently, so the file order can be slightly off
+    order = np.argsort(timestamps, kind="stable")
+    first = float(timestamps.min()) if len(timestamps) else 0.0
+    start = time.perf_counter()
+    for i in order:
+        record = archive[int(i)]
+        handler = handlers.get(record.kind)
+        if handler is None:
+            continue
+        lag = 0.0
+        if speed > 0:
+            due = start + (record.timestamp - first) / speed
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            lag = max(0.0, time.perf_counter() - due)
+        handed_over = time.perf_counter()
+        result = handler(record.payload)
+        yield record, result, time.perf_counter() - handed_over, lag
+
+
+def describe(kind, result):
+    """One-line summary of a pipeline result."""
+    if kind == "audio":
+        return repr(result)
+    if "rejected" in result:
+        return f"rejected ({result['rejected']})"
+    if "error" in result:
+        return f"error ({result['error']})"
+    summary = f"{len(result['boats'])} boats"
+    if "valid" in result:
+        if not result.get("snapped", True):
+            summary += ", not a full fleet"
+        else:
+            summary += ", legal fleet" if result["valid"] else f", {len(result['corrected_cells'])} cells corrected"
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a capture archive through process_board and Whisper")
+    parser.add_argument("archive", help="Archive recorded with BATTLESHIP_RECORD_ARCHIVE")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1 replays at the original pace, 2 twice as fast, 0 as fast as possible")
+    parser.add_argument("--kind", default="all", choices=["all", "frame", "audio"], help="Records to replay")
+    parser.add_argument("--model", default="small", help="Whisper model for the audio")
+    parser.add_argument("--scale", type=int, default=1, choices=[1, 2, 4, 8], help="Decode scale of the frames")
+    parser.add_argument("--mode", default="contours", choices=["contours", "cells"], help="Board pipeline mode")
+    parser.add_argument("--snap", action="store_true", help="Snap the boards to the most likely legal fleet")
+    parser.add_argument("--skip-quality-check", action="store_true", help="Run the full pipeline on every frame")
+    args = parser.parse_args()
+
+    with CaptureArchive(args.archive) as archive:
+        counts = archive.counts()
+        handlers = {}
+        if args.kind in ("all", "frame") and counts.get("frame"):
+            board = load_board_pipeline()
+            handlers["frame"] = lambda payload: run_frame(board, payload, args.scale, args.mode, args.snap,
+                                                          not args.skip_quality_check)
+        if args.kind in ("all", "audio") and counts.get("audio"):
+            voice = load_voice_pipeline()
+            # load the model before the clock starts, like main() in battleship_voice.py
+            voice.get_whisper_model(args.model)
+            handlers["audio"] = lambda payload: run_audio(voice, payload, args.model)
+        if not handlers:
+            print(f"{args.archive}: nothing to replay ({counts})")
+            return
+
+        pace = "as fast as possible" if args.speed <= 0 else f"at {args.speed:g}x speed"
+        print(f"Replaying {args.archive} {pace} ({archive.duration():.1f} s recorded)")
+        times = {kind: [] for kind in handlers}
+        max_lag = 0.0
+        first = float(archive.index["timestamp"].min())
+        start = time.perf_counter()
+        for record, result, seconds, lag in replay(archive, handlers, args.speed):
+            times[record.kind].append(seconds)
+            max_lag = max(max_lag, lag)
+            print(f"{record.timestamp - first:9.2f} s  {record.kind:5}  {seconds * 1000:8.1f} ms  "
+                  f"{describe(record.kind, result)}")
+            del record
+        elapsed = time.perf_counter() - start
+
+    print("======================================")
+    for kind, kind_times in times.items():
+        if kind_times:
+            print(f"{kind:5}: {len(kind_times)} records, median {np.median(kind_times) * 1000:.1f} ms, "
+                  f"p95 {np.percentile(kind_times, 95) * 1000:.1f} ms, {len(kind_times) / sum(kind_times):.1f} per second")
+    print(f"Replayed in {elapsed:.1f} s" + (f", at most {max_lag * 1000:.0f} ms behind the recording"
+                                           if args.speed > 0 else ""))
+
+
+if __name__ == "__main__":
+    main()
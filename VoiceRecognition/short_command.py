@@ -0,0 +1,145 @@
+"""
+Short-utterance fast path for Whisper.
+
+model.transcribe pads every input to a 30-second mel window (3000 frames), so a
+one-second "C7" costs as much encoder compute as 30 seconds of speech. For short
+commands this module:
+
+1. trims the silence around the command
+2. computes the mel spectrogram only for the trimmed audio, rounded up to whole seconds
+3. runs the encoder on those frames only (the positional embedding is sliced to match)
+4. decodes a single short segment without timestamps
+
+The decoder's cross-attention works with any number of audio frames, so the rest of
+Whisper is unchanged. Inputs longer than max_seconds return None so the caller can
+use the normal transcribe path.
+"""
+
+import contextlib
+import threading
+
+import numpy as np
+import whisper
+
+from keyword_recognizer import voiced_bounds
+
+HOP_LENGTH = 160  # samples per mel frame (whisper.audio.HOP_LENGTH)
+FRAMES_PER_SECOND = 100
+MIN_SECONDS = 1  # shortest window the encoder gets, very short windows decode poorly
+MARGIN_SECONDS = 0.2  # silence kept on both sides of the command after trimming
+MAX_TOKENS = 24  # a command is a few words, this stops runaway decoding on noise
+
+# The positional embedding is swapped on the shared model, so only one caller at a time,
+# and full-length passes take the same lock so they never run with a sliced embedding
+_encoder_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def truncated_audio_context(model, n_frames):
+    """
+    Let the encoder accept n_frames mel frames instead of the full 3000.
+
+    Args:
+        model: Whisper model
+        n_frames (int): Number of mel frames (even, at most 3000)
+    """
+    encoder = model.encoder
+    full_embedding = encoder.positional_embedding
+    with _encoder_lock:
+        # The second conv layer has stride 2, so the encoder sees half as many positions
+        encoder.positional_embedding = full_embedding[:n_frames // 2]
+        try:
+            yield
+        finally:
+            encoder.positional_embedding = full_embedding
+
+
+@contextlib.contextmanager
+def full_audio_context(model):
+    """
+    Keep the full positional embedding in place for a normal 30 second pass.
+
+    Without this a fast-path call on another thread could slice the embedding while
+    model.transcribe is running on the same model.
+
+    Args:
+        model: Whisper model
+    """
+    with _encoder_lock:
+        yield
+
+
+def prepare_short_command(audio_data, max_seconds=8):
+    """
+    Trim a command and pad it to whole seconds.
+
+    Args:
+        audio_data (numpy.ndarray): Audio samples (float32, 16kHz)
+        max_seconds (int): Longest command handled by the fast path
+
+    Returns:
+        tuple: (padded audio, number of mel frames), or (None, 0) if the command is too long
+    """
+    start, end = voiced_bounds(audio_data)
+    margin = int(MARGIN_SECONDS * 16000)
+    audio = np.asarray(audio_data[max(0, start - margin):end + margin], dtype=np.float32)
+
+    seconds = max(MIN_SECONDS, int(np.ceil(len(audio) / 16000)))
+    if seconds > max_seconds:
+        return None, 0
+    n_frames = seconds * FRAMES_PER_SECOND
+    return whisper.pad_or_trim(audio, n_frames * HOP_LENGTH), n_frames
+
+
+def transcribe_short(model, audio_data, max_seconds=8, language="en"):
+    """
+    Transcribe a short command with the encoder running on the trimmed audio only.
+
+    Args:
+        model: Whisper model
+        audio_data (numpy.ndarray): Audio samples (float32, 16kHz)
+        max_seconds (int): Longest command handled by the fast path
+        language (str): Language code passed to the decoder
+
+    Returns:
+        dict: Result in the same shape as model.transcribe ("text" and one entry in "segments"),
+            or None if the command is too long for the fast path
+    """
+    audio, n_frames = prepare_short_command(audio_data, max_seconds)
+    if audio is None:
+        return None
+
+    mel = whisper.log_mel_spectrogram(audio, model.dims.n_mels).to(model.device)
+    options = whisper.DecodingOptions(language=language, without_timestamps=True, fp16=False,
+                                      sample_len=MAX_TOKENS)
+    with truncated_audio_context(model, n_frames):
+        decoded = whisper.decode(model, mel, options)
+
+    return decoding_to_result(decoded, n_frames, language)
+
+
+def decoding_to_result(decoded, n_frames, language="en"):
+    """
+    Wrap a whisper.DecodingResult in the same shape as the result of model.transcribe.
+
+    Args:
+        decoded: Result of whisper.decode for one clip
+        n_frames (int): Number of mel frames that were decoded
+        language (str): Language code the decoder used
+
+    Returns:
+        dict: "text", "language" and one entry in "segments" with the confidence values
+    """
+    return {
+        "text": decoded.text,
+        "language": language,
+        "segments": [{
+            "text": decoded.text,
+            "start": 0.0,
+            "end": n_frames / FRAMES_PER_SECOND,
+            "avg_logprob": decoded.avg_logprob,
+            "no_speech_prob": decoded.no_speech_prob,
+            "compression_ratio": decoded.compression_ratio,
+            "temperature": decoded.temperature,
+        }],
+    }
@@ -0,0 +1,88 @@
+"""
+Benchmark for the short-command fast path (short_command.py).
+
+Every WAV clip is transcribed twice with the same model: once with the normal
+model.transcribe (30 second window) and once with transcribe_short. For each clip
+it prints both latencies and the parsed coordinates, so a speed-up that changes the
+result is easy to spot.
+
+Usage:
+    python short_command_benchmark.py recordings/ [--model small] [--runs 3] [--cpu-optimized]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+import battleship_voice
+from coordinate_parser import parse_battleship_coordinates
+from short_command import transcribe_short
+
+
+def time_best(function, runs):
+    """Run a function several times and return (best time in seconds, last result)."""
+    best = float("inf")
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full Whisper transcription with the short-command fast path")
+    parser.add_argument("wav_dir", help="Directory with 16-bit mono 16kHz WAV command clips")
+    parser.add_argument("--model", default="small", help="Whisper model size")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per clip, the best time is reported")
+    parser.add_argument("--max-seconds", type=int, default=8, help="Longest command handled by the fast path")
+    parser.add_argument("--cpu-optimized", action="store_true", help="Use the int8 quantized model")
+    args = parser.parse_args()
+
+    wav_files = sorted(os.path.join(args.wav_dir, name) for name in os.listdir(args.wav_dir)
+                       if name.lower().endswith(".wav"))
+    if not wav_files:
+        print(f"No WAV files found in {args.wav_dir}")
+        return
+
+    model = battleship_voice.load_whisper_model(args.model, cpu_optimized=args.cpu_optimized)
+
+    full_times = []
+    short_times = []
+    mismatches = 0
+    for path in wav_files:
+        audio_data = battleship_voice.load_wav_audio(path)
+        if audio_data is None:
+            continue
+
+        full_time, full_result = time_best(
+            lambda: model.transcribe(audio_data, fp16=False, language='English'), args.runs)
+        short_time, short_result = time_best(
+            lambda: transcribe_short(model, audio_data, max_seconds=args.max_seconds), args.runs)
+
+        full_coords = parse_battleship_coordinates(full_result["text"], verbose=False)
+        if short_result is None:
+            print(f"{os.path.basename(path)}: too long for the fast path ({full_time * 1000:.0f} ms full)")
+            continue
+        short_coords = parse_battleship_coordinates(short_result["text"], verbose=False)
+
+        full_times.append(full_time)
+        short_times.append(short_time)
+        if full_coords != short_coords:
+            mismatches += 1
+        print(f"{os.path.basename(path)}: full {full_time * 1000:.0f} ms {full_coords}, "
+              f"short {short_time * 1000:.0f} ms {short_coords}, "
+              f"speed-up {full_time / short_time:.1f}x")
+
+    if short_times:
+        print(f"\nClips: {len(short_times)}")
+        print(f"Median full transcribe: {np.median(full_times) * 1000:.0f} ms")
+        print(f"Median fast path:       {np.median(short_times) * 1000:.0f} ms")
+        print(f"Median speed-up:        {np.median(np.array(full_times) / np.array(short_times)):.1f}x")
+        print(f"Different coordinates:  {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Tests for keyword_recognizer.py, on synthetic "words" (sequences of harmonic syllables) instead of recordings.
+
+Run with:
+    python -m pytest VoiceRecognition
+"""
+
+import wave
+
+import numpy as np
+import pytest
+
+import keyword_recognizer
+from keyword_recognizer import CACHE_NAME, SAMPLE_RATE, KeywordRecognizer
+
+COORDINATES = ["A1", "B5", "C7", "J10"]
+
+
+def synthetic_word(syllables, rng, stretch=1.0, noise=0.01):
+    """A few voiced syllables (pitch, formant) with silence around them, like a recorded command."""
+    parts = []
+    for pitch, formant in syllables:
+        n = int(SAMPLE_RATE * 0.5 * stretch / len(syllables))
+        t = np.arange(n) / SAMPLE_RATE
+        harmonics = sum(np.sin(2 * np.pi * pitch * h * t) * np.exp(-((pitch * h - formant) / 400) ** 2)
+                        for h in range(1, 20))
+        # every syllable equally loud, so trim_silence never cuts one off
+        parts.append(harmonics / np.abs(harmonics).max() * np.hanning(n) * 0.3)
+    voiced = np.concatenate(parts)
+    audio = np.concatenate([np.zeros(1600), voiced, np.zeros(1600)])
+    return (audio + rng.normal(0, noise, len(audio))).astype(np.float32)
+
+
+def random_syllables(rng):
+    return [(rng.uniform(100, 200), rng.uniform(300, 2500)) for _ in range(3)]
+
+
+@pytest.fixture
+def vocabulary():
+    rng = np.random.default_rng(0)
+    return {coordinate: random_syllables(rng) for coordinate in COORDINATES}
+
+
+def write_wav(path, audio_data):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes((audio_data * 32767).astype(np.int16).tobytes())
+
+
+@pytest.fixture
+def template_dir(tmp_path, vocabulary):
+    rng = np.random.default_rng(1)
+    for coordinate, syllables in vocabulary.items():
+        for take in range(3):
+            write_wav(tmp_path / f"{coordinate}_{take}.wav", synthetic_word(syllables, rng, rng.uniform(0.85, 1.15)))
+    return tmp_path
+
+
+def test_recognizes_a_known_command(template_dir, vocabulary):
+    recognizer = KeywordRecognizer.from_directory(str(template_dir), verbose=False)
+    rng = np.random.default_rng(2)
+    for coordinate, syllables in vocabulary.items():
+        found, confidence = recognizer.recognize(synthetic_word(syllables, rng, rng.uniform(0.9, 1.1)))
+        assert found == coordinate
+        assert confidence > 0
+
+
+def test_rejects_audio_that_is_not_a_command(template_dir):
+    recognizer = KeywordRecognizer.from_directory(str(template_dir), verbose=False)
+    rng = np.random.default_rng(3)
+    noise = rng.normal(0, 0.1, SAMPLE_RATE).astype(np.float32)
+    assert recognizer.recognize(noise) == (None, 0.0)
+    for _ in range(5):
+        assert recognizer.recognize(synthetic_word(random_syllables(rng), rng)) == (None, 0.0)
+
+
+def test_single_coordinate_confidence_comes_from_the_distance(vocabulary):
+    rng = np.random.default_rng(4)
+    recognizer = KeywordRecognizer()
+    for _ in range(6):
+        recognizer.add_template("A1", synthetic_word(vocabulary["A1"], rng, rng.uniform(0.85, 1.15)))
+    recognizer.calibrate()
+
+    found, confidence = recognizer.recognize(synthetic_word(vocabulary["A1"], rng))
+    assert found == "A1"
+    assert 0 < confidence < 1
+    assert recognizer.recognize(rng.normal(0, 0.1, SAMPLE_RATE).astype(np.float32)) == (None, 0.0)
+
+
+def test_calibrate_on_held_out_recordings(vocabulary):
+    rng = np.random.default_rng(5)
+    recognizer = KeywordRecognizer()
+    for coordinate, syllables in vocabulary.items():
+        recognizer.add_template(coordinate, synthetic_word(syllables, rng))
+    held_out = [(coordinate, synthetic_word(syllables, rng, rng.uniform(0.85, 1.15)))
+                for coordinate, syllables in vocabulary.items() for _ in range(2)]
+
+    threshold = recognizer.calibrate(held_out)
+    assert threshold != keyword_recognizer.MAX_DISTANCE
+    for coordinate, audio_data in held_out:
+        assert recognizer.recognize(audio_data)[0] == coordinate
+
+
+def test_features_are_cached_until_the_templates_change(template_dir, vocabulary, monkeypatch):
+    first = KeywordRecognizer.from_directory(str(template_dir), verbose=False)
+    assert (template_dir / CACHE_NAME).exists()
+
+    # a second process must not read or featurize a single WAV file
+    def fail(path):
+        raise AssertionError(f"{path} was read again")
+
+    monkeypatch.setattr(keyword_recognizer, "read_wav", fail)
+    cached = KeywordRecognizer.from_directory(str(template_dir), verbose=False)
+    assert cached.labels == first.labels
+    assert cached.max_distance == first.max_distance
+    assert all(np.array_equal(a, b) for a, b in zip(cached.templates, first.templates))
+    monkeypatch.undo()
+
+    write_wav(template_dir / "A1_extra.wav", synthetic_word(vocabulary["A1"], np.random.default_rng(6)))
+    rebuilt = KeywordRecognizer.from_directory(str(template_dir), verbose=False)
+    assert len(rebuilt.templates) == len(first.templates) + 1
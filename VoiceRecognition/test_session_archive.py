@@ -0,0 +1,80 @@
+"""
+Tests for session_archive.py.
+
+Run with:
+    python -m pytest VoiceRecognition
+"""
+
+import multiprocessing
+import os
+
+from session_archive import FOOTER, INDEX_DTYPE, CaptureArchive, append_record
+
+
+def _append_many(job):
+    path, writer, count = job
+    for i in range(count):
+        # every payload says who wrote it, so torn or mixed up records show
+        append_record(path, "frame" if writer % 2 else "audio", bytes([writer]) * (100 + i), timestamp=writer * 1000 + i)
+
+
+def test_concurrent_appends_lose_nothing(tmp_path):
+    path = str(tmp_path / "session.bsa")
+    with multiprocessing.Pool(4) as pool:
+        pool.map(_append_many, [(path, writer, 50) for writer in range(4)])
+
+    with CaptureArchive(path) as archive:
+        assert len(archive) == 200
+        assert archive.counts() == {"frame": 100, "audio": 100}
+        seen = set()
+        for kind, timestamp, payload in archive:
+            writer, i = divmod(int(timestamp), 1000)
+            assert kind == ("frame" if writer % 2 else "audio")
+            assert bytes(payload) == bytes([writer]) * (100 + i)
+            seen.add((writer, i))
+            del payload
+        assert len(seen) == 200
+
+
+def test_archive_cut_off_mid_index_is_recovered(tmp_path):
+    path = str(tmp_path / "session.bsa")
+    for i in range(5):
+        append_record(path, "frame", bytes([i]) * 37, timestamp=i)
+    # a writer died while writing the index: no footer and half of the index
+    os.truncate(path, os.path.getsize(path) - FOOTER.size - 2 * INDEX_DTYPE.itemsize)
+
+    with CaptureArchive(path) as archive:
+        assert len(archive) == 5
+        assert [bytes(record.payload) for record in archive] == [bytes([i]) * 37 for i in range(5)]
+
+    # the next append writes a fresh index and footer after the last complete record
+    assert append_record(path, "audio", b"wav", timestamp=5) == 6
+    with CaptureArchive(path) as archive:
+        assert len(archive) == 6
+        assert archive[5].kind == "audio" and bytes(archive[5].payload) == b"wav"
+
+
+def test_archive_cut_off_mid_record_keeps_the_complete_records(tmp_path):
+    path = str(tmp_path / "session.bsa")
+    for i in range(3):
+        append_record(path, "frame", bytes([i]) * 1000, timestamp=i)
+    with CaptureArchive(path) as archive:
+        last_offset = int(archive.index["offset"][-1])
+    os.truncate(path, last_offset + 10)
+
+    with CaptureArchive(path) as archive:
+        assert len(archive) == 2
+    assert append_record(path, "frame", b"new") == 3
+
+
+def test_close_with_a_payload_view_still_alive(tmp_path):
+    path = str(tmp_path / "session.bsa")
+    append_record(path, "frame", b"jpeg bytes")
+
+    archive = CaptureArchive(path)
+    payload = archive[0].payload
+    archive.close()  # must not raise while the view exists
+
+    assert len(archive) == 0
+    assert bytes(payload) == b"jpeg bytes"
+    del payload
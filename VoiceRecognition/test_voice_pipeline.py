@@ -0,0 +1,90 @@
+"""
+Tests for voice_pipeline.py with stand-in capture and recognize functions.
+
+Run with:
+    python -m pytest VoiceRecognition
+"""
+
+import time
+
+from voice_pipeline import VoicePipeline
+
+
+def test_results_come_back_in_capture_order():
+    items = iter(range(5))
+
+    def capture():
+        try:
+            return next(items)
+        except StopIteration:
+            time.sleep(0.01)
+            return "done"
+
+    with VoicePipeline(capture, lambda item: item * 10) as pipeline:
+        results = []
+        for index, result, _ in pipeline:
+            results.append((index, result))
+            if len(results) == 5:
+                pipeline.stop(wait=False)
+                break
+    assert results == [(i, i * 10) for i in range(5)]
+
+
+def test_failing_capture_backs_off_and_stops():
+    calls = []
+
+    def capture():
+        calls.append(time.perf_counter())
+        return None
+
+    pipeline = VoicePipeline(capture, lambda item: item, failure_backoff=0.02, max_capture_failures=4).start()
+    pipeline._capture_thread.join(timeout=2)
+
+    assert not pipeline.capturing
+    assert pipeline.capture_error is not None
+    assert pipeline.stats["capture_failures"] == 4
+    assert len(calls) == 4
+    # waits of 0.02, 0.04 and 0.08 s between the attempts instead of retrying straight away
+    gaps = [later - earlier for earlier, later in zip(calls, calls[1:])]
+    assert all(gap >= wait * 0.9 for gap, wait in zip(gaps, [0.02, 0.04, 0.08]))
+    pipeline.stop()
+    assert list(pipeline) == []
+
+
+def test_failing_capture_does_not_spin():
+    calls = []
+
+    def capture():
+        calls.append(1)
+        return None
+
+    pipeline = VoicePipeline(capture, lambda item: item, failure_backoff=0.05, max_backoff=0.1,
+                             max_capture_failures=None).start()
+    time.sleep(0.5)
+    assert pipeline.capturing
+    pipeline.stop()
+    # about 6 attempts in half a second, a busy loop would make millions
+    assert len(calls) <= 10
+
+
+def test_stop_interrupts_the_backoff():
+    pipeline = VoicePipeline(lambda: None, lambda item: item, failure_backoff=10,
+                             max_capture_failures=None).start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    pipeline.stop()
+    assert time.perf_counter() - start < 1
+
+
+def test_a_successful_capture_resets_the_failure_count():
+    outcomes = iter([None, None, "a", None, None, "b"])
+
+    def capture():
+        return next(outcomes, None)
+
+    pipeline = VoicePipeline(capture, lambda item: item, failure_backoff=0.001, max_capture_failures=3).start()
+    results = [result for _, result, _ in pipeline]
+    assert results == ["a", "b"]
+    # 2 + 2 failures between the captures, then 3 in a row after the last one
+    assert pipeline.stats["capture_failures"] == 7
+    assert pipeline.capture_error is not None
@@ -0,0 +1,173 @@
+"""
+Content-addressed cache for Whisper transcriptions.
+
+The key is a SHA-256 hash of the normalized PCM (16-bit, 16kHz mono) plus the model
+name and decoding options, so replaying the same clip skips the model entirely.
+There are two layers: an in-memory LRU and an on-disk directory of JSON files with
+a size cap (least recently used files are evicted first).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _json_default(value):
+    # numpy scalars and arrays can end up in the segment data
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class TranscriptionCache:
+    """
+    Two-layer (memory LRU + disk) cache of Whisper transcription results.
+
+    Args:
+        cache_dir (str): Directory for the on-disk layer, None for memory only
+        max_memory_entries (int): Number of results kept in memory
+        max_disk_bytes (int): Size cap of the on-disk layer in bytes
+    """
+
+    def __init__(self, cache_dir="transcription_cache", max_memory_entries=128, max_disk_bytes=50 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "disk_evictions": 0}
+
+        # Size of every file in the on-disk layer, least recently used first.
+        # The directory is scanned once (ordered by modification time) so put() never has to list it.
+        self._disk_sizes = OrderedDict()
+        self._disk_total = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            files = []
+            for name in os.listdir(cache_dir):
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(cache_dir, name))
+                    files.append((stat.st_mtime, name[:-5], stat.st_size))
+            for _, key, size in sorted(files):
+                self._disk_sizes[key] = size
+                self._disk_total += size
+
+    @staticmethod
+    def make_key(audio_data, model_name, options=None):
+        """
+        Build the cache key for a clip.
+
+        Args:
+            audio_data (numpy.ndarray): Audio samples (float32 in [-1, 1], 16kHz mono)
+            model_name (str): Whisper model name
+            options (dict): Decoding options that change the result (language, cascade, ...)
+
+        Returns:
+            str: Hex digest used as the cache key
+        """
+        # Normalize to 16-bit PCM so tiny float differences from loading don't change the key
+        pcm = np.clip(np.round(np.asarray(audio_data, dtype=np.float32) * 32767), -32768, 32767).astype('<i2')
+
+        digest = hashlib.sha256()
+        digest.update(pcm.tobytes())
+        digest.update(model_name.encode())
+        digest.update(json.dumps(options or {}, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    @property
+    def hits(self):
+        return self.stats["memory_hits"] + self.stats["disk_hits"]
+
+    @property
+    def misses(self):
+        return self.stats["misses"]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """
+        Look up a result, first in memory and then on disk.
+
+        Args:
+            key (str): Cache key from make_key
+
+        Returns:
+            dict: Cached transcription result, or None on a miss
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                if key in self._disk_sizes:
+                    self._disk_sizes.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key]
+
+            if self.cache_dir and key in self._disk_sizes:
+                try:
+                    with open(self._path(key)) as f:
+                        result = json.load(f)
+                    # Touch the file so the order survives a restart
+                    os.utime(self._path(key))
+                except (OSError, ValueError):
+                    self._disk_total -= self._disk_sizes.pop(key, 0)
+                else:
+                    self._disk_sizes.move_to_end(key)
+                    self.stats["disk_hits"] += 1
+                    self._remember(key, result)
+                    return result
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, result):
+        """
+        Store a result in both layers.
+
+        Args:
+            key (str): Cache key from make_key
+            result (dict): Whisper transcription result (must be JSON serializable)
+        """
+        with self._lock:
+            self._remember(key, result)
+
+            if not self.cache_dir:
+                return
+
+            data = json.dumps(result, default=_json_default)
+            with open(self._path(key), "w") as f:
+                f.write(data)
+            self._disk_total += len(data.encode()) - self._disk_sizes.get(key, 0)
+            self._disk_sizes[key] = len(data.encode())
+            self._disk_sizes.move_to_end(key)
+            self._evict_disk()
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Remove the least recently used files until the on-disk layer fits the size cap."""
+        # Never evict the entry that was just written
+        while self._disk_total > self.max_disk_bytes and len(self._disk_sizes) > 1:
+            key, size = self._disk_sizes.popitem(last=False)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self._disk_total -= size
+            self.stats["disk_evictions"] += 1
+
+    def summary(self):
+        """Return a one-line description of the hit and miss counters."""
+        lookups = self.hits + self.misses
+        rate = (self.hits / lookups * 100) if lookups else 0.0
+        return (f"{self.hits} hits ({self.stats['memory_hits']} memory, {self.stats['disk_hits']} disk), "
+                f"{self.misses} misses ({rate:.1f}% hit rate), {self.stats['disk_evictions']} evicted")
@@ -0,0 +1,139 @@
+"""
+Producer/consumer pipeline for continuous voice commands.
+
+A capture thread keeps recording utterances into a bounded queue while a worker
+thread transcribes and parses them, so the microphone is not idle while Whisper
+runs. Results are delivered in capture order, either to a callback or by iterating
+over the pipeline. When the worker falls behind the queue fills up and the capture
+thread waits, so throughput is limited by the slower of the two stages.
+
+A failed capture (e.g. the microphone was unplugged) is retried after a growing
+pause instead of straight away, and after max_capture_failures failures in a row
+the capture thread gives up and the pipeline stops.
+"""
+
+import queue
+import threading
+import time
+
+# Marks the end of the stream in the queues
+_STOP = object()
+
+
+class VoicePipeline:
+    """
+    Run capture and recognition on two threads.
+
+    Args:
+        capture (callable): Records one utterance and returns it (for example a WAV path),
+            returns None when recording failed
+        recognize (callable): Takes a captured utterance and returns the result
+        on_result (callable): Called as on_result(index, result, latency_s) in capture order,
+            None to consume the results by iterating over the pipeline instead
+        max_pending (int): Captured utterances that may wait for the worker before capture blocks
+        failure_backoff (float): Seconds to wait after a failed capture, doubled for every further failure
+        max_backoff (float): Longest wait between two capture attempts
+        max_capture_failures (int): Failures in a row after which capturing stops, None to never give up
+    """
+
+    def __init__(self, capture, recognize, on_result=None, max_pending=2, failure_backoff=0.5, max_backoff=5.0,
+                 max_capture_failures=5):
+        self.capture = capture
+        self.recognize = recognize
+        self.on_result = on_result
+        self.failure_backoff = failure_backoff
+        self.max_backoff = max_backoff
+        self.max_capture_failures = max_capture_failures
+        # set when the capture thread gave up after too many failures
+        self.capture_error = None
+
+        self._captured = queue.Queue(maxsize=max_pending)
+        self._results = queue.Queue()
+        self._stop_event = threading.Event()
+        self._capture_thread = threading.Thread(target=self._capture_loop, name="voice-capture", daemon=True)
+        self._worker_thread = threading.Thread(target=self._worker_loop, name="voice-worker", daemon=True)
+
+        self.stats = {"captured": 0, "capture_failures": 0, "recognized": 0, "errors": 0}
+
+    def start(self):
+        """Start the capture and worker threads."""
+        self._capture_thread.start()
+        self._worker_thread.start()
+        return self
+
+    def stop(self, wait=True):
+        """
+        Stop capturing. Utterances that were already captured are still recognized.
+
+        Args:
+            wait (bool): Block until the worker has delivered the last result
+        """
+        self._stop_event.set()
+        if wait:
+            self._capture_thread.join()
+            self._worker_thread.join()
+
+    @property
+    def capturing(self):
+        """False once the pipeline was stopped or the capture thread gave up."""
+        return self._capture_thread.is_alive() and not self._stop_event.is_set()
+
+    def _capture_loop(self):
+        index = 0
+        failures = 0
+        try:
+            while not self._stop_event.is_set():
+                item = self.capture()
+                if item is None:
+                    self.stats["capture_failures"] += 1
+                    failures += 1
+                    if self.max_capture_failures is not None and failures >= self.max_capture_failures:
+                        self.capture_error = f"{failures} captures in a row failed"
+                        print(f"Voice pipeline: {self.capture_error}, stopping capture.")
+                        break
+                    # wait before trying again (returns early on stop), a dead device fails straight away
+                    self._stop_event.wait(min(self.failure_backoff * 2 ** (failures - 1), self.max_backoff))
+                    continue
+                failures = 0
+                self.stats["captured"] += 1
+                # Blocks while the worker is behind (backpressure)
+                self._captured.put((index, item, time.perf_counter()))
+                index += 1
+        finally:
+            self._captured.put(_STOP)
+
+    def _worker_loop(self):
+        # There is a single worker, so results come out in the same order they were captured
+        while True:
+            entry = self._captured.get()
+            if entry is _STOP:
+                break
+            index, item, captured_at = entry
+            try:
+                result = self.recognize(item)
+                self.stats["recognized"] += 1
+            except Exception as e:
+                print(f"Error in voice pipeline worker: {e}")
+                self.stats["errors"] += 1
+                result = None
+            latency = time.perf_counter() - captured_at
+
+            if self.on_result is not None:
+                self.on_result(index, result, latency)
+            else:
+                self._results.put((index, result, latency))
+        self._results.put(_STOP)
+
+    def __iter__(self):
+        """Yield (index, result, latency_s) in capture order until the pipeline is stopped."""
+        while True:
+            entry = self._results.get()
+            if entry is _STOP:
+                return
+            yield entry
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
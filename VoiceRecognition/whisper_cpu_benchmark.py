@@ -0,0 +1,132 @@
+"""
+Benchmark for the Whisper inference modes in battleship_voice.py.
+
+Every mode is measured in its own Python process so the peak RSS of one mode does
+not leak into the next. For each mode it reports the model load time (including
+warm-up, use --warmup-runs 0 for the pure start-up time), the first and average
+transcription time, the real-time factor (transcription time / audio duration,
+lower is better) and the peak RSS.
+
+Usage:
+    python whisper_cpu_benchmark.py --wav command.wav [--model small] [--runs 5]
+                                    [--intra-op-threads 4] [--inter-op-threads 1]
+
+Start-up time with the prepared artifacts (see model_artifacts.py):
+    python whisper_cpu_benchmark.py --warmup-runs 0 --modes fp32 fp32-cached int8 int8-cached
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+MODES = {
+    "fp32": {"cpu_optimized": False},
+    "int8": {"cpu_optimized": True},
+    # memory-mapped from the artifacts prepared by model_artifacts.py
+    "fp32-cached": {"cpu_optimized": False, "use_cache": True},
+    "int8-cached": {"cpu_optimized": True, "use_cache": True},
+}
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB (None if it cannot be measured)."""
+    try:
+        import resource
+    except ImportError:
+        # resource is not available on Windows, use psutil if it is installed
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def run_mode(args):
+    """Measure a single mode in this process and print the result as one JSON line."""
+    import numpy as np
+    import battleship_voice
+
+    if args.wav:
+        audio_data = battleship_voice.load_wav_audio(args.wav)
+    else:
+        # No clip given: 2 seconds of low level noise, about the length of a command
+        audio_data = np.random.default_rng(0).normal(0, 0.01, 32000).astype(np.float32)
+    duration = len(audio_data) / 16000
+
+    start = time.perf_counter()
+    model = battleship_voice.load_whisper_model(args.model, intra_op_threads=args.intra_op_threads,
+                                                inter_op_threads=args.inter_op_threads,
+                                                warmup_runs=args.warmup_runs, **MODES[args.child])
+    load_time = time.perf_counter() - start
+
+    times = []
+    text = ""
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        result = model.transcribe(audio_data, fp16=False, language='English')
+        times.append(time.perf_counter() - start)
+        text = result["text"].strip()
+
+    average = sum(times) / len(times)
+    print(json.dumps({
+        "mode": args.child,
+        "load_s": load_time,
+        "first_s": times[0],
+        "avg_s": average,
+        "rtf": average / duration,
+        "peak_rss_mb": peak_rss_mb(),
+        "text": text,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper CPU inference modes")
+    parser.add_argument("--wav", help="16-bit WAV clip to transcribe (default: 2 s of noise)")
+    parser.add_argument("--model", default="small", help="Whisper model name")
+    parser.add_argument("--modes", nargs="+", default=["fp32", "int8"], choices=list(MODES),
+                        help="Modes to compare (the -cached modes need model_artifacts.py to have run)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed transcriptions per mode")
+    parser.add_argument("--warmup-runs", type=int, default=1, help="Warm-up inferences at load time")
+    parser.add_argument("--intra-op-threads", type=int, default=None, help="Torch intra-op threads")
+    parser.add_argument("--inter-op-threads", type=int, default=None, help="Torch inter-op threads")
+    parser.add_argument("--child", choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args)
+        return
+
+    results = []
+    for mode in args.modes:
+        print(f"Measuring {mode}...")
+        command = [sys.executable, os.path.abspath(__file__), "--child", mode, "--model", args.model,
+                   "--runs", str(args.runs), "--warmup-runs", str(args.warmup_runs)]
+        if args.wav:
+            command += ["--wav", args.wav]
+        if args.intra_op_threads:
+            command += ["--intra-op-threads", str(args.intra_op_threads)]
+        if args.inter_op_threads:
+            command += ["--inter-op-threads", str(args.inter_op_threads)]
+
+        output = subprocess.run(command, capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    print(f"\n{'mode':>11} | {'load (s)':>8} | {'first (s)':>9} | {'avg (s)':>7} | {'RTF':>6} | {'peak RSS (MB)':>13} | text")
+    for r in results:
+        rss = f"{r['peak_rss_mb']:13.0f}" if r["peak_rss_mb"] is not None else f"{'n/a':>13}"
+        print(f"{r['mode']:>11} | {r['load_s']:8.2f} | {r['first_s']:9.3f} | {r['avg_s']:7.3f} | "
+              f"{r['rtf']:6.3f} | {rss} | {r['text']!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Battleship boards as 100-bit integers and the precomputed ship placements.
+
+Cell (row, col) is bit row * 10 + col. A ship placement is the mask of the cells it
+covers, so overlap tests, "does this placement avoid every miss" and "are all hits
+covered" are single AND / OR operations on Python ints. Every legal placement of
+every ship length is computed once per process.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+GRID = 10
+FLEET = [5, 4, 3, 3, 2]  # same ships as generateBoard in actions/functions.ts
+FULL_BOARD = (1 << (GRID * GRID)) - 1
+
+
+def cell_bit(row, col):
+    """Mask of a single cell."""
+    return 1 << (row * GRID + col)
+
+
+def board_to_mask(matrix):
+    """
+    Turn a 10x10 matrix into a mask.
+
+    Args:
+        matrix (array-like): 10x10, non-zero cells are set
+
+    Returns:
+        int: 100-bit mask
+    """
+    flat = np.asarray(matrix).reshape(GRID * GRID) != 0
+    # packbits with little bit order puts cell 0 in the lowest bit
+    return int.from_bytes(np.packbits(flat, bitorder="little").tobytes(), "little")
+
+
+def mask_to_matrix(mask):
+    """
+    Turn a mask into a 10x10 uint8 matrix.
+
+    Args:
+        mask (int): 100-bit mask
+
+    Returns:
+        numpy.ndarray: 10x10 matrix with 1 where the bit is set
+    """
+    data = np.frombuffer(mask.to_bytes(13, "little"), dtype=np.uint8)
+    return np.unpackbits(data, bitorder="little")[:GRID * GRID].reshape(GRID, GRID)
+
+
+def mask_cells(mask):
+    """List the (row, col) cells of a mask."""
+    cells = []
+    while mask:
+        low = mask & -mask
+        index = low.bit_length() - 1
+        cells.append(divmod(index, GRID))
+        mask ^= low
+    return cells
+
+
+def popcount(mask):
+    """Number of set cells."""
+    return bin(mask).count("1")
+
+
+@lru_cache(maxsize=None)
+def placements(length):
+    """
+    Every placement of a ship of this length on an empty board.
+
+    Args:
+        length (int): Ship length
+
+    Returns:
+        tuple: Masks, the horizontal placements first (row-major), then the vertical ones
+    """
+    horizontal = sum(cell_bit(0, i) for i in range(length))
+    vertical = sum(cell_bit(i, 0) for i in range(length))
+    masks = [horizontal << (row * GRID + col) for row in range(GRID) for col in range(GRID - length + 1)]
+    masks += [vertical << (row * GRID + col) for row in range(GRID - length + 1) for col in range(GRID)]
+    return tuple(masks)
+
+
+@lru_cache(maxsize=None)
+def placement_matrix(length):
+    """
+    The placements of a length as a (placements, 100) uint8 array, for turning placement counts into cell counts.
+    """
+    return np.stack([mask_to_matrix(mask).reshape(GRID * GRID) for mask in placements(length)])
+
+
+@lru_cache(maxsize=None)
+def covering_placements(length):
+    """
+    For every cell, the placements of a length that cover it.
+
+    Returns:
+        tuple: 100 tuples of indices into placements(length)
+    """
+    masks = placements(length)
+    return tuple(tuple(i for i, mask in enumerate(masks) if mask >> cell & 1) for cell in range(GRID * GRID))
+
+
+def legal_placements(length, blocked):
+    """
+    Placements of a length that do not touch any blocked cell.
+
+    Args:
+        length (int): Ship length
+        blocked (int): Mask of cells the ship may not cover (misses, other ships)
+
+    Returns:
+        list: Indices into placements(length)
+    """
+    return [i for i, mask in enumerate(placements(length)) if not mask & blocked]
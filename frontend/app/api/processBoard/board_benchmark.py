@@ -0,0 +1,130 @@
+"""
+Benchmark for the decode scales of process_board.py.
+
+Every image is decoded and processed at each scale (1 = full resolution, 2/4/8 =
+IMREAD_REDUCED_COLOR_*). For each scale it reports the median decode time, the
+median time of the rest of the pipeline, and how many of the 100 cells agree with
+the reference. The reference is the ground truth when a labelled .json file sits
+next to the image (as written by board_generator.py), otherwise the full-resolution
+contours result (images where that fails are skipped for the accuracy).
+
+Usage:
+    python board_benchmark.py [images or directories ...] [--scales 1 2 4 8] [--runs 5] [--limit N]
+                              [--mode contours|cells] [--snap]
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from process_board import DECODE_FLAGS, boats_to_matrix, load_image, process_board
+
+DEFAULT_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "ImageProcessing")
+
+
+def find_images(paths):
+    """Expand directories to the .png/.jpg files in them."""
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images += sorted(glob.glob(os.path.join(path, "*.png")) + glob.glob(os.path.join(path, "*.jpg")))
+        else:
+            images.append(path)
+    return images
+
+
+def load_label(path):
+    """
+    Read the ground truth next to an image (board_generator.py format).
+
+    Returns:
+        numpy.ndarray: 10x10 occupancy matrix, None if the image has no label
+    """
+    label_path = os.path.splitext(path)[0] + ".json"
+    if not os.path.exists(label_path):
+        return None
+    with open(label_path) as f:
+        label = json.load(f)
+    if "occupancy" not in label:
+        return None
+    return np.array(label["occupancy"], dtype=np.uint8)
+
+
+def run_image(path, scale, runs, mode="contours", snap=False):
+    """
+    Decode and process one image several times.
+
+    Returns:
+        tuple: (median decode time, median processing time, occupancy matrix or None if processing failed)
+    """
+    decode_times = []
+    process_times = []
+    matrix = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        image = load_image(path, scale)
+        decode_times.append(time.perf_counter() - start)
+        if image is None:
+            return float(np.median(decode_times)), None, None
+
+        start = time.perf_counter()
+        try:
+            matrix = boats_to_matrix(process_board(image, scale, mode, snap))
+        except (cv2.error, ValueError):
+            # not 4 usable corner markers (the CLI crashes the same way), counted as a failure
+            matrix = None
+        process_times.append(time.perf_counter() - start)
+    return float(np.median(decode_times)), float(np.median(process_times)), matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode time and accuracy of process_board.py per decode scale")
+    parser.add_argument("images", nargs="*", help="Board images or directories (default: the samples in ImageProcessing/)")
+    parser.add_argument("--scales", nargs="+", type=int, default=sorted(DECODE_FLAGS), choices=sorted(DECODE_FLAGS),
+                        help="Decode scales to compare")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per image and scale, the median is reported")
+    parser.add_argument("--mode", default="contours", choices=["contours", "cells"], help="process_board.py mode")
+    parser.add_argument("--snap", action="store_true", help="Snap the boats to the most likely legal fleet")
+    parser.add_argument("--limit", type=int, help="Only use the first N images")
+    args = parser.parse_args()
+
+    images = find_images(args.images or [DEFAULT_IMAGES])[:args.limit]
+
+    reference = {}
+    for path in images:
+        label = load_label(path)
+        reference[path] = label if label is not None else run_image(path, 1, 1)[2]
+    labelled = sum(load_label(path) is not None for path in images)
+    print(f"{len(images)} images, {labelled} with ground truth")
+
+    print(f"{'scale':>5} | {'decode (ms)':>11} | {'process (ms)':>12} | {'failed':>6} | "
+          f"{'cells agreeing':>14} | {'boards identical':>16}")
+    for scale in args.scales:
+        decode_times = []
+        process_times = []
+        failed = agreeing = compared = identical = 0
+        for path in images:
+            decode_time, process_time, matrix = run_image(path, scale, args.runs, args.mode, args.snap)
+            decode_times.append(decode_time)
+            if process_time is not None:
+                process_times.append(process_time)
+            if matrix is None:
+                failed += 1
+                continue
+            if reference[path] is not None:
+                compared += 1
+                agreeing += int((matrix == reference[path]).sum())
+                identical += int((matrix == reference[path]).all())
+
+        cells = f"{agreeing / (compared * 100):.1%}" if compared else "-"
+        print(f"{scale:>5} | {np.median(decode_times) * 1000:11.2f} | {np.median(process_times) * 1000:12.2f} | "
+              f"{failed:>6} | {cells:>14} | {f'{identical}/{compared}':>16}")
+
+
+if __name__ == "__main__":
+    main()
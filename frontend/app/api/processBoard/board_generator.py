@@ -0,0 +1,293 @@
+"""
+Synthetic board images with ground truth, for benchmarks and accuracy tests of process_board.py.
+
+Every frame is a board with red corner markers, a grid of dark holes and a random
+legal fleet (ships [5, 4, 3, 3, 2], placed like generateBoard in actions/functions.ts)
+of green boats. The board is rendered straight on, then warped into a 640x480
+camera frame with a random perspective, given a lighting gradient, sensor noise and
+a little blur, mirrored like the ESP32 image and saved as a JPEG of random quality.
+
+Next to every frame_XXXXXX.jpg a frame_XXXXXX.json holds the ground truth:
+    {"occupancy": 10x10 list of 0/1, "boats": [...], "params": {...}}
+"boats" has the same format as the output of process_board.py, so board_benchmark.py
+and other tests can compare against it directly. Frames are rendered in a process
+pool, and frame i only depends on (seed, i), so a set can be regenerated exactly.
+
+Usage:
+    python board_generator.py --out synthetic_boards --count 20000 [--workers 8] [--seed 0]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+import cv2
+import numpy as np
+
+FLEET = [5, 4, 3, 3, 2]
+GRID = 10
+FRAME_SIZE = (640, 480)  # width, height of the ESP32 VGA frames
+
+# board drawn straight on: CELL pixels per cell and a MARGIN around the grid (marker centres sit on the grid corners)
+CELL = 40
+MARGIN = 40
+BOARD_SIZE = GRID * CELL + 2 * MARGIN
+
+# colours (BGR), each one is jittered per frame
+BOARD_COLOUR = (190, 205, 225)
+HOLE_COLOUR = (70, 70, 75)
+MARKER_COLOUR = (45, 40, 220)
+BOAT_COLOUR = (60, 160, 35)
+
+
+def random_fleet(rng, fleet=FLEET):
+    """
+    Place a fleet at random without overlaps (same rules as generateBoard in functions.ts).
+
+    Args:
+        rng (numpy.random.Generator): Random generator
+        fleet (list): Ship lengths
+
+    Returns:
+        list: One list of (row, col) cells per ship
+    """
+    board = np.zeros((GRID, GRID), dtype=bool)
+    ships = []
+    for length in fleet:
+        while True:
+            horizontal = rng.random() > 0.5
+            row, col = rng.integers(0, GRID, size=2)
+            if horizontal and col + length <= GRID and not board[row, col:col + length].any():
+                cells = [(int(row), int(col + i)) for i in range(length)]
+                break
+            if not horizontal and row + length <= GRID and not board[row:row + length, col].any():
+                cells = [(int(row + i), int(col)) for i in range(length)]
+                break
+        for r, c in cells:
+            board[r, c] = True
+        ships.append(cells)
+    return ships
+
+
+def ground_truth(ships):
+    """
+    Build the label for a fleet.
+
+    Returns:
+        dict: "occupancy" (10x10 list of 0/1) and "boats" (in the format of process_board.py)
+    """
+    occupancy = np.zeros((GRID, GRID), dtype=np.uint8)
+    boats = []
+    for cells in ships:
+        for r, c in cells:
+            occupancy[r, c] = 1
+        rows = {r for r, _ in cells}
+        boats.append({
+            "occupied_cells": sorted(cells),
+            "size": len(cells),
+            "orientation": "Horizontal" if len(rows) == 1 else "Vertical",
+        })
+    return {"occupancy": occupancy.tolist(), "boats": boats}
+
+
+def _jitter(colour, rng, amount=20):
+    return tuple(int(v) for v in np.clip(np.array(colour) + rng.integers(-amount, amount + 1, size=3), 0, 255))
+
+
+def render_board(ships, rng):
+    """
+    Draw the board straight on, in the orientation process_board.py reports cells in.
+
+    Returns:
+        numpy.ndarray: BOARD_SIZE x BOARD_SIZE BGR image
+    """
+    board = np.empty((BOARD_SIZE, BOARD_SIZE, 3), dtype=np.uint8)
+    board[:] = _jitter(BOARD_COLOUR, rng)
+
+    # holes of the pegboard
+    hole = _jitter(HOLE_COLOUR, rng, 15)
+    inset = CELL // 3
+    for row in range(GRID):
+        for col in range(GRID):
+            x, y = MARGIN + col * CELL, MARGIN + row * CELL
+            cv2.rectangle(board, (x + inset, y + inset), (x + CELL - inset, y + CELL - inset), hole, -1)
+
+    # corner markers, their centres are the grid corners the pipeline warps to
+    marker = _jitter(MARKER_COLOUR, rng, 15)
+    radius = int(rng.integers(7, 12))
+    for x in (MARGIN, MARGIN + GRID * CELL):
+        for y in (MARGIN, MARGIN + GRID * CELL):
+            cv2.circle(board, (x, y), radius, marker, -1, cv2.LINE_AA)
+
+    # boats cover their cells with a small gap, so touching ships stay separate blobs
+    boat = _jitter(BOAT_COLOUR, rng)
+    gap = int(rng.integers(3, 7))
+    for cells in ships:
+        (r0, c0), (r1, c1) = min(cells), max(cells)
+        cv2.rectangle(board, (MARGIN + c0 * CELL + gap, MARGIN + r0 * CELL + gap),
+                      (MARGIN + (c1 + 1) * CELL - gap, MARGIN + (r1 + 1) * CELL - gap), boat, -1)
+    return board
+
+
+def random_perspective(rng, frame_size=FRAME_SIZE):
+    """
+    Pick where the grid corners land in the camera frame.
+
+    Returns:
+        numpy.ndarray: Homography from the straight-on board to the frame
+    """
+    width, height = frame_size
+    side = rng.uniform(0.55, 0.85) * height
+    angle = np.radians(rng.uniform(-12, 12))
+    centre = np.array([width / 2, height / 2]) + rng.uniform(-0.1, 0.1, size=2) * (width, height)
+
+    square = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]], dtype=np.float64) * side / 2
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    # moving the corners independently gives the keystone of a tilted camera
+    corners = square @ rotation.T + centre + rng.uniform(-0.08, 0.08, size=(4, 2)) * side
+    corners = np.clip(corners, 15, np.array(frame_size) - 15)
+
+    grid = np.float32([[MARGIN, MARGIN], [MARGIN + GRID * CELL, MARGIN],
+                       [MARGIN + GRID * CELL, MARGIN + GRID * CELL], [MARGIN, MARGIN + GRID * CELL]])
+    return cv2.getPerspectiveTransform(grid, corners.astype(np.float32))
+
+
+_noise_fields = {}
+
+
+def _noise_field(frame_size):
+    """Gaussian noise twice the frame size, created once per process (always from the same seed)."""
+    if frame_size not in _noise_fields:
+        width, height = frame_size
+        rng = np.random.default_rng(12345)
+        _noise_fields[frame_size] = rng.standard_normal((2 * height, 2 * width, 3), dtype=np.float32)
+    return _noise_fields[frame_size]
+
+
+def render_frame(ships, rng, frame_size=FRAME_SIZE):
+    """
+    Render a camera frame of a fleet.
+
+    Returns:
+        tuple: (BGR frame as the ESP32 would send it, dict with the random parameters)
+    """
+    width, height = frame_size
+    board = render_board(ships, rng)
+    homography = random_perspective(rng, frame_size)
+
+    # dark, slightly noisy background like the table around the board
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:] = _jitter((40, 30, 30), rng, 25)
+    cv2.warpPerspective(board, homography, frame_size, dst=frame, borderMode=cv2.BORDER_TRANSPARENT)
+
+    # lighting gradient in a random direction
+    strength = rng.uniform(0.0, 0.5)
+    direction = rng.uniform(0, 2 * np.pi)
+    xs = np.linspace(-0.5, 0.5, width, dtype=np.float32)
+    ys = np.linspace(-0.5, 0.5, height, dtype=np.float32)
+    gain = rng.uniform(0.75, 1.15) + strength * (np.cos(direction) * xs[None, :] + np.sin(direction) * ys[:, None])
+    image = cv2.multiply(frame.astype(np.float32), cv2.merge([gain.astype(np.float32)] * 3))
+
+    # sensor noise: a random window of a fixed noise field, drawing fresh Gaussian noise per frame costs more than the rest
+    noise = rng.uniform(0, 8)
+    field = _noise_field(frame_size)
+    x, y = rng.integers(0, width), rng.integers(0, height)
+    cv2.scaleAdd(field[y:y + height, x:x + width], noise, image, dst=image)
+    image = np.clip(image, 0, 255, out=image).astype(np.uint8)
+
+    blur = int(rng.choice([0, 0, 3, 5]))
+    if blur:
+        image = cv2.GaussianBlur(image, (blur, blur), 0)
+
+    # the pipeline mirrors the camera image back, so store it mirrored
+    image = cv2.flip(image, 1)
+    params = {"gain_strength": round(float(strength), 3), "noise": round(float(noise), 2), "blur": blur,
+              "corners": np.round(cv2.perspectiveTransform(
+                  np.float32([[[MARGIN, MARGIN]], [[MARGIN + GRID * CELL, MARGIN + GRID * CELL]]]),
+                  homography).reshape(-1, 2), 1).tolist()}
+    return image, params
+
+
+def generate_frame(index, seed=0, frame_size=FRAME_SIZE, quality=(40, 95)):
+    """
+    Generate one labelled frame. The result only depends on (seed, index).
+
+    Returns:
+        tuple: (JPEG bytes, label dict)
+    """
+    rng = np.random.default_rng([seed, index])
+    ships = random_fleet(rng)
+    image, params = render_frame(ships, rng, frame_size)
+    params["jpeg_quality"] = int(rng.integers(quality[0], quality[1] + 1))
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, params["jpeg_quality"]])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    label = ground_truth(ships)
+    label["params"] = params
+    return encoded.tobytes(), label
+
+
+def _write_frames(job):
+    """Pool worker: generate and save a range of frames."""
+    out_dir, start, stop, seed, quality = job
+    for index in range(start, stop):
+        data, label = generate_frame(index, seed, quality=quality)
+        name = os.path.join(out_dir, f"frame_{index:06d}")
+        with open(f"{name}.jpg", "wb") as f:
+            f.write(data)
+        with open(f"{name}.json", "w") as f:
+            json.dump(label, f)
+    return stop - start
+
+
+def _init_worker():
+    # one process per core already, OpenCV's own threads would only compete with the other workers
+    cv2.setNumThreads(1)
+
+
+def generate_dataset(out_dir, count, workers=None, seed=0, quality=(40, 95), chunk=250):
+    """
+    Generate count labelled frames into out_dir on a process pool.
+
+    Args:
+        out_dir (str): Output directory (created if missing)
+        count (int): Number of frames
+        workers (int): Worker processes, None uses every core
+        seed (int): Seed of the set
+        quality (tuple): Range of the JPEG quality
+        chunk (int): Frames per pool task
+
+    Returns:
+        int: Number of frames written
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(out_dir, start, min(start + chunk, count), seed, quality) for start in range(0, count, chunk)]
+    written = 0
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        for n in pool.imap_unordered(_write_frames, jobs):
+            written += n
+            print(f"\r{written}/{count} frames", end="", flush=True)
+    print()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic labelled board images")
+    parser.add_argument("--out", default="synthetic_boards", help="Output directory")
+    parser.add_argument("--count", type=int, default=1000, help="Number of frames")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed, the same seed gives the same frames")
+    parser.add_argument("--quality", type=int, nargs=2, default=(40, 95), metavar=("MIN", "MAX"),
+                        help="Range of the JPEG quality")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = generate_dataset(args.out, args.count, args.workers, args.seed, tuple(args.quality))
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {written} frames to {args.out} in {elapsed:.1f} s ({written / elapsed:.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
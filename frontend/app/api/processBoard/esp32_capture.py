@@ -0,0 +1,291 @@
+"""
+Capture client for the ESP32 camera (same protocol as app/api/captureImage/route.ts).
+
+The client sends "CAPTURE" and the camera answers with a 4-byte frame length
+followed by the JPEG data. Unlike route.ts this client:
+
+- keeps one TCP connection open for all captures (and reconnects transparently if
+  the camera closed it after the previous frame)
+- reads the length prefix and receives exactly that many bytes with recv_into,
+  straight into one preallocated buffer that is reused for every frame
+- hands that buffer to cv2.imdecode without copying it
+
+StandInCameraServer answers the same protocol with JPEG files from disk, so the
+client (and everything after it) can be tested without the hardware.
+
+Usage:
+    python esp32_capture.py --out frame.jpg                     # capture from the ESP32
+    python esp32_capture.py --stand-in board.png --count 50     # local stand-in camera, prints the frame rate
+    python esp32_capture.py --serve board.png --port 8080       # only run the stand-in camera
+"""
+
+import argparse
+import socket
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+ESP32_IP = "192.168.4.1"  # same address and port as route.ts
+ESP32_PORT = 8080
+CAPTURE_COMMAND = b"CAPTURE"
+MAX_FRAME_BYTES = 4 * 1024 * 1024  # a VGA JPEG is well below this, anything bigger is a framing error
+
+
+class ESP32CaptureClient:
+    """
+    Persistent connection to the camera.
+
+    Args:
+        host (str): Camera address
+        port (int): Camera TCP port
+        timeout (float): Socket timeout in seconds
+        byte_order (str): struct byte order of the length prefix, "<" (little-endian, what the ESP32 sends) or ">"
+        initial_buffer (int): Initial size of the receive buffer in bytes, grown when a frame is bigger
+    """
+
+    def __init__(self, host=ESP32_IP, port=ESP32_PORT, timeout=5.0, byte_order="<", initial_buffer=256 * 1024):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._header = struct.Struct(f"{byte_order}I")
+        self._sock = None
+        self._buffer = bytearray(initial_buffer)
+        self._header_buffer = bytearray(self._header.size)
+
+        self.stats = {"frames": 0, "bytes": 0, "connects": 0}
+
+    def connect(self):
+        """Open the connection (done automatically by the first capture)."""
+        self.close()
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stats["connects"] += 1
+        return self
+
+    def close(self):
+        """Close the connection."""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _recv_exact(self, view):
+        """Fill a memoryview completely from the socket."""
+        received = 0
+        while received < len(view):
+            n = self._sock.recv_into(view[received:])
+            if n == 0:
+                raise ConnectionError("camera closed the connection")
+            received += n
+
+    def _request_frame(self):
+        self._sock.sendall(CAPTURE_COMMAND)
+
+        self._recv_exact(memoryview(self._header_buffer))
+        (size,) = self._header.unpack(self._header_buffer)
+        if size == 0 or size > MAX_FRAME_BYTES:
+            raise ValueError(f"invalid frame length {size} (wrong byte order?)")
+
+        if size > len(self._buffer):
+            self._buffer = bytearray(size)
+        view = memoryview(self._buffer)[:size]
+        self._recv_exact(view)
+        return view
+
+    def capture_bytes(self):
+        """
+        Capture one JPEG frame.
+
+        Returns:
+            memoryview: The JPEG data. It points into the client's receive buffer, so it is only
+                valid until the next capture (copy it with bytes() to keep it)
+        """
+        for attempt in range(2):
+            if self._sock is None:
+                self.connect()
+            try:
+                view = self._request_frame()
+                break
+            except ValueError:
+                # The stream is out of sync, the next capture starts on a new connection
+                self.close()
+                raise
+            except OSError:
+                # The camera may close the socket after every frame, so one retry on a fresh connection
+                self.close()
+                if attempt == 1:
+                    raise
+        self.stats["frames"] += 1
+        self.stats["bytes"] += len(view)
+        return view
+
+    def capture(self, flags=cv2.IMREAD_COLOR):
+        """
+        Capture and decode one frame.
+
+        Args:
+            flags (int): cv2.imdecode flags
+
+        Returns:
+            numpy.ndarray: The decoded image, None if the JPEG could not be decoded
+        """
+        # np.frombuffer wraps the receive buffer, the JPEG bytes are not copied before decoding
+        return cv2.imdecode(np.frombuffer(self.capture_bytes(), dtype=np.uint8), flags)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class StandInCameraServer:
+    """
+    Local TCP server that answers "CAPTURE" like the ESP32.
+
+    Args:
+        images (list): Image paths; JPEG files are sent as they are, other formats are encoded to JPEG.
+            Consecutive captures cycle through them
+        host (str): Address to listen on
+        port (int): Port to listen on, 0 picks a free port (see self.port)
+        close_after_frame (bool): Close the connection after every frame, like route.ts expects
+        byte_order (str): struct byte order of the length prefix
+    """
+
+    def __init__(self, images, host="127.0.0.1", port=0, close_after_frame=False, byte_order="<"):
+        self.frames = [self._load_jpeg(path) for path in images]
+        self.close_after_frame = close_after_frame
+        self._header = struct.Struct(f"{byte_order}I")
+
+        self._server = socket.create_server((host, port))
+        self.host, self.port = self._server.getsockname()[:2]
+        self._running = threading.Event()
+        self._thread = None
+        self._next = 0
+        self.requests = 0
+
+    @staticmethod
+    def _load_jpeg(path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:2] == b"\xff\xd8":
+            return data
+        ok, encoded = cv2.imencode(".jpg", cv2.imread(path))
+        if not ok:
+            raise ValueError(f"{path}: could not encode as JPEG")
+        return encoded.tobytes()
+
+    def start(self):
+        """Start accepting connections on a background thread."""
+        self._running.set()
+        self._thread = threading.Thread(target=self._accept_loop, name="stand-in-camera", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        self._running.clear()
+        self._server.close()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _accept_loop(self):
+        while self._running.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        pending = b""
+        with conn:
+            while self._running.is_set():
+                try:
+                    data = conn.recv(64)
+                except OSError:
+                    return
+                if not data:
+                    return
+                pending += data
+                while CAPTURE_COMMAND in pending:
+                    pending = pending.split(CAPTURE_COMMAND, 1)[1]
+                    frame = self.frames[self._next % len(self.frames)]
+                    self._next += 1
+                    self.requests += 1
+                    conn.sendall(self._header.pack(len(frame)) + frame)
+                    if self.close_after_frame:
+                        return
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def measure(client, count):
+    """Capture and decode count frames and print the frame rate."""
+    start = time.perf_counter()
+    image = None
+    for _ in range(count):
+        image = client.capture()
+    elapsed = time.perf_counter() - start
+    print(f"{count} frames in {elapsed:.2f} s ({count / elapsed:.1f} fps), "
+          f"last frame {image.shape if image is not None else None}, "
+          f"{client.stats['connects']} connection(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture frames from the ESP32 camera")
+    parser.add_argument("--host", default=ESP32_IP, help="Camera address")
+    parser.add_argument("--port", type=int, default=ESP32_PORT, help="Camera TCP port")
+    parser.add_argument("--out", help="Save the captured JPEG here")
+    parser.add_argument("--count", type=int, default=1, help="Number of frames to capture")
+    parser.add_argument("--big-endian", action="store_true", help="The length prefix is big-endian")
+    parser.add_argument("--stand-in", nargs="+", metavar="IMAGE", help="Capture from a local stand-in camera")
+    parser.add_argument("--serve", nargs="+", metavar="IMAGE", help="Only run the stand-in camera")
+    parser.add_argument("--close-after-frame", action="store_true",
+                        help="Stand-in camera closes the connection after each frame")
+    args = parser.parse_args()
+
+    byte_order = ">" if args.big_endian else "<"
+
+    if args.serve:
+        with StandInCameraServer(args.serve, host="0.0.0.0", port=args.port,
+                                 close_after_frame=args.close_after_frame, byte_order=byte_order) as server:
+            print(f"Stand-in camera listening on port {server.port}, Ctrl+C to stop")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+        return
+
+    server = None
+    host, port = args.host, args.port
+    if args.stand_in:
+        server = StandInCameraServer(args.stand_in, close_after_frame=args.close_after_frame,
+                                     byte_order=byte_order).start()
+        host, port = server.host, server.port
+
+    try:
+        with ESP32CaptureClient(host, port, byte_order=byte_order) as client:
+            if args.out:
+                with open(args.out, "wb") as f:
+                    f.write(client.capture_bytes())
+                print(f"Saved {args.out}")
+            if args.count > 1 or not args.out:
+                measure(client, args.count)
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Snap noisy vision output to the most likely legal fleet.
+
+process_board.py reports whatever green blobs it finds, so a shadow, a missed cell
+or two touching boats can give a board no real fleet could produce. Given a hit
+probability per cell, this module finds the legal layout of the fleet
+[5, 4, 3, 3, 2] (no overlaps, straight ships, same rules as generateBoard) with the
+highest likelihood, i.e. the highest sum of log-odds over the cells it covers.
+
+The placements of every ship length come from the precomputed 100-bit masks of
+bitboard.py. Their scores are one matrix product, and the search is a depth-first
+branch and bound: ships are placed largest first, placements are tried best first,
+and a branch is cut as soon as even the best free placement of every remaining ship
+could not beat the best layout found so far.
+
+Snapping only makes sense when the vision output is a complete fleet with a few
+mistakes. A board that is still being set up (or a photo of a few boats) is left
+alone: when the number of detected cells is more than MAX_CELL_DIFFERENCE away
+from sum(fleet), snap_fleet keeps the detection and only reports it as not valid.
+
+Usage (corrupts random fleets and checks how many are recovered; board_benchmark.py --snap
+measures it on real pipeline output):
+    python fleet_index.py [--boards 500] [--flip 0.05]
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from bitboard import FLEET, GRID, mask_cells, mask_to_matrix, placement_matrix, placements
+
+# probabilities are clipped to this range, so one cell can never outweigh a whole ship
+MIN_PROBABILITY = 0.02
+
+# snap only when the detected cells are at most this many away from the 17 cells of the fleet
+MAX_CELL_DIFFERENCE = 4
+
+
+def cell_log_odds(probability):
+    """
+    Log-odds of the cell probabilities.
+
+    Args:
+        probability (array-like): 10x10 probability that a boat covers each cell
+
+    Returns:
+        numpy.ndarray: 100 log-odds (row-major)
+    """
+    p = np.clip(np.asarray(probability, dtype=np.float64).reshape(GRID * GRID), MIN_PROBABILITY, 1 - MIN_PROBABILITY)
+    return np.log(p / (1 - p))
+
+
+def best_fleet(probability, fleet=FLEET):
+    """
+    Find the legal layout with the highest likelihood.
+
+    Args:
+        probability (array-like): 10x10 probability that a boat covers each cell
+        fleet (list): Ship lengths
+
+    Returns:
+        tuple: (list of placement masks in the order of the fleet sorted by length, score)
+    """
+    scores = cell_log_odds(probability)
+    order = sorted(fleet, reverse=True)
+
+    # placements of every ship, best first
+    ranked = []
+    for length in order:
+        placement_scores = placement_matrix(length) @ scores
+        ranking = np.argsort(-placement_scores, kind="stable")
+        masks = placements(length)
+        ranked.append([(float(placement_scores[i]), masks[i], int(i)) for i in ranking])
+
+    # cheap bound: the best placement of every remaining ship, ignoring all overlaps
+    remaining_bound = [0.0] * (len(order) + 1)
+    for position in range(len(order) - 1, -1, -1):
+        remaining_bound[position] = remaining_bound[position + 1] + ranked[position][0][0]
+
+    # tighter bound: per remaining length, the best placements that avoid the ships placed so far
+    # (k placements for a length that is k times in the rest of the fleet, they may overlap each other)
+    bound_terms = [[(ranked[order.index(length)], order[position:].count(length)) for length in set(order[position:])]
+                   for position in range(len(order) + 1)]
+
+    def occupied_bound(position, occupied):
+        total = 0.0
+        for candidates, needed in bound_terms[position]:
+            for placement_score, mask, _ in candidates:
+                if not mask & occupied:
+                    total += placement_score
+                    needed -= 1
+                    if not needed:
+                        break
+            else:
+                return -np.inf
+        return total
+
+    # a fleet covers sum(fleet) cells, so no layout beats the best cells taken on their own. When the
+    # vision output already is a legal fleet, the first layout found reaches this and the search stops
+    ceiling = float(np.sort(scores)[-sum(order):].sum()) - 1e-9
+
+    best = {"score": -np.inf, "layout": None}
+    layout = []
+
+    def search(position, occupied, score, min_index):
+        if position == len(order):
+            if score > best["score"]:
+                best["score"] = score
+                best["layout"] = list(layout)
+            return
+        for placement_score, mask, index in ranked[position]:
+            if best["score"] >= ceiling:
+                return
+            # the list is sorted, so no later placement can do better either
+            if score + placement_score + remaining_bound[position + 1] <= best["score"]:
+                return
+            if mask & occupied:
+                continue
+            # two ships of the same length: only one order of their placements, the other is the same layout
+            if index <= min_index:
+                continue
+            if score + placement_score + occupied_bound(position + 1, occupied | mask) <= best["score"]:
+                continue
+            layout.append(mask)
+            same_length = position + 1 < len(order) and order[position + 1] == order[position]
+            search(position + 1, occupied | mask, score + placement_score, index if same_length else -1)
+            layout.pop()
+
+    search(0, 0, 0.0, -1)
+    return best["layout"], best["score"]
+
+
+def snap_fleet(probability, fleet=FLEET, max_cell_difference=MAX_CELL_DIFFERENCE):
+    """
+    Correct a vision result to the most likely legal fleet.
+
+    Args:
+        probability (array-like): 10x10 probability that a boat covers each cell (e.g. 0.9 / 0.1 for a
+            plain occupancy matrix)
+        fleet (list): Ship lengths
+        max_cell_difference (int): Leave the detection alone when its number of cells is further than this
+            from sum(fleet), None to always snap
+
+    Returns:
+        dict: "snapped" (False when the detection was left alone), "occupancy" (10x10 uint8 of the legal
+            fleet, the detection when not snapped), "boats" (in the format of process_board.py, None when not
+            snapped), "valid" (True if the input, thresholded at 0.5, already was that legal fleet) and
+            "corrected_cells" (cells that were flipped)
+    """
+    probability = np.asarray(probability, dtype=np.float64)
+    detected = (probability > 0.5).astype(np.uint8)
+    if max_cell_difference is not None and abs(int(detected.sum()) - sum(fleet)) > max_cell_difference:
+        # not a fleet with a few mistakes, any "correction" would invent ships
+        return {"snapped": False, "occupancy": detected, "boats": None, "valid": False, "corrected_cells": []}
+
+    layout, _ = best_fleet(probability, fleet)
+
+    occupancy = np.zeros((GRID, GRID), dtype=np.uint8)
+    boats = []
+    for mask in layout:
+        occupancy |= mask_to_matrix(mask)
+        cells = sorted(mask_cells(mask))
+        boats.append({
+            "occupied_cells": cells,
+            "size": len(cells),
+            "orientation": "Horizontal" if len({row for row, _ in cells}) == 1 else "Vertical",
+        })
+
+    corrected = [(int(row), int(col)) for row, col in zip(*np.nonzero(detected != occupancy))]
+    return {"snapped": True, "occupancy": occupancy, "boats": boats, "valid": not corrected,
+            "corrected_cells": corrected}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check how well noisy fleets are snapped back to the real one")
+    parser.add_argument("--boards", type=int, default=500, help="Random fleets")
+    parser.add_argument("--flip", type=float, default=0.05, help="Fraction of cells flipped by the noise")
+    parser.add_argument("--seed", type=int, default=0, help="Seed")
+    args = parser.parse_args()
+
+    from montecarlo_bot import random_layout
+
+    rng = random.Random(args.seed)
+    noise = np.random.default_rng(args.seed)
+    recovered = raw_correct = left_alone = 0
+    times = []
+    for _ in range(args.boards):
+        truth = mask_to_matrix(random_layout(rng))
+        # a noisy detector: about 0.8 / 0.2, and the flipped cells land just on the wrong side of 0.5
+        # (a shadow or a partly covered cell is rarely detected with full confidence)
+        probability = np.clip(np.where(truth == 1, 0.8, 0.2) + noise.normal(0, 0.1, truth.shape), 0, 1)
+        flipped = noise.random(truth.shape) < args.flip
+        probability[flipped] = 0.5 + np.where(truth == 1, -1, 1)[flipped] * noise.uniform(0.01, 0.3, flipped.sum())
+        raw_correct += int(((probability > 0.5) == truth).all())
+
+        start = time.perf_counter()
+        result = snap_fleet(probability)
+        times.append(time.perf_counter() - start)
+        recovered += int((result["occupancy"] == truth).all())
+        left_alone += int(not result["snapped"])
+
+    print(f"{args.boards} fleets with {args.flip:.0%} of the cells flipped:")
+    print(f"  raw detection correct : {raw_correct}/{args.boards}")
+    print(f"  snapped fleet correct : {recovered}/{args.boards} ({left_alone} left alone, more than "
+          f"{MAX_CELL_DIFFERENCE} cells away from a full fleet)")
+    print(f"  snap time             : median {np.median(times) * 1000:.2f} ms, max {max(times) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Shared-memory frame ring for handing camera frames to vision worker processes.
+
+The capture process writes every decoded frame into one of a few fixed-size slots
+in a multiprocessing.shared_memory block. Vision workers attach to the block by
+name and map the newest frame as a NumPy array, so a 640x480x3 frame is never
+pickled or piped between processes.
+
+Every slot carries the sequence number of the frame in it (a seqlock): the writer
+marks the slot as being written, copies the frame, then publishes the new sequence
+number. A reader takes the newest published frame and, after using it, checks with
+still_valid() that the writer has not started overwriting that slot in the
+meantime. The writer never waits for readers, so a worker that falls behind skips
+frames and always gets the most recent one.
+
+Usage (benchmark against a multiprocessing.Queue):
+    python frame_ring.py [--frames 300] [--workers 2] [--slots 4]
+"""
+
+import argparse
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_MAGIC = 0x46524D52  # "FRMR"
+_HEADER_FIELDS = 6  # magic, slots, height, width, channels, latest sequence
+_WRITING = -1  # slot sequence while the writer is copying into it
+
+
+def _attach(name):
+    """Attach to an existing block without letting this process's resource tracker delete it at exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument and registers every attached block with the resource
+        # tracker. Processes started by multiprocessing share their parent's tracker (which already
+        # knows the block), but the tracker of an unrelated process would unlink it when that exits.
+        shm = shared_memory.SharedMemory(name=name)
+        if multiprocessing.parent_process() is None:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class FrameRing:
+    """
+    Ring of frame slots in shared memory.
+
+    Create it in the capture process with FrameRing.create() and attach to it in the
+    workers with FrameRing.attach(ring.name).
+
+    Args:
+        shm (SharedMemory): The shared memory block (use create() or attach())
+        owner (bool): Whether close() should also free the block
+    """
+
+    def __init__(self, shm, owner=False):
+        self._shm = shm
+        self.owner = owner
+
+        header = np.ndarray(_HEADER_FIELDS, dtype=np.int64, buffer=shm.buf)
+        if header[0] != _MAGIC:
+            raise ValueError(f"{shm.name} is not a frame ring")
+        self.slots = int(header[1])
+        self.shape = (int(header[2]), int(header[3]), int(header[4]))
+
+        self._header = header
+        self._sequences = np.ndarray(self.slots, dtype=np.int64, buffer=shm.buf, offset=_HEADER_FIELDS * 8)
+        data_offset = self._data_offset(self.slots)
+        self._frames = np.ndarray((self.slots,) + self.shape, dtype=np.uint8, buffer=shm.buf, offset=data_offset)
+
+    @staticmethod
+    def _data_offset(slots):
+        # Frames start on a cache line boundary after the header and the slot sequence numbers
+        return ((_HEADER_FIELDS + slots) * 8 + 63) // 64 * 64
+
+    @classmethod
+    def create(cls, shape=(480, 640, 3), slots=4, name=None):
+        """
+        Allocate a new ring.
+
+        Args:
+            shape (tuple): Frame shape (height, width, channels), frames are uint8
+            slots (int): Number of frame slots, readers can hold a frame for slots - 1 writes
+            name (str): Name of the shared memory block, None picks a unique one
+
+        Returns:
+            FrameRing: The ring, owned by this process
+        """
+        height, width, channels = shape
+        size = cls._data_offset(slots) + slots * height * width * channels
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray(_HEADER_FIELDS, dtype=np.int64, buffer=shm.buf)
+        header[:] = (_MAGIC, slots, height, width, channels, 0)
+        np.ndarray(slots, dtype=np.int64, buffer=shm.buf, offset=_HEADER_FIELDS * 8)[:] = 0
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a ring created by another process."""
+        return cls(_attach(name))
+
+    @property
+    def name(self):
+        """Name of the shared memory block, pass it to FrameRing.attach in the workers."""
+        return self._shm.name
+
+    @property
+    def latest_sequence(self):
+        """Sequence number of the newest frame (0 before the first write)."""
+        return int(self._header[5])
+
+    def write(self, frame):
+        """
+        Publish a new frame (single writer only).
+
+        Args:
+            frame (numpy.ndarray): uint8 frame with the ring's shape
+
+        Returns:
+            int: Sequence number of the frame
+        """
+        sequence = self.latest_sequence + 1
+        slot = sequence % self.slots
+        # Aligned 8-byte stores are atomic on the platforms we run on, readers see either value
+        self._sequences[slot] = _WRITING
+        np.copyto(self._frames[slot], frame)
+        self._sequences[slot] = sequence
+        self._header[5] = sequence
+        return sequence
+
+    def read_latest(self, after=0):
+        """
+        Map the newest frame without copying it.
+
+        Args:
+            after (int): Only return a frame newer than this sequence number
+
+        Returns:
+            tuple: (sequence, frame view), or (None, None) if there is no newer frame. The view stays
+                valid while still_valid(sequence) is True
+        """
+        sequence = self.latest_sequence
+        if sequence <= after:
+            return None, None
+        slot = sequence % self.slots
+        if self._sequences[slot] != sequence:
+            # The writer already moved on to this slot again, the next call gets the newer frame
+            return None, None
+        return sequence, self._frames[slot]
+
+    def wait_latest(self, after=0, timeout=None, poll=0.001):
+        """
+        Block until there is a frame newer than `after` and map it.
+
+        Returns:
+            tuple: (sequence, frame view), (None, None) on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sequence, frame = self.read_latest(after)
+            if frame is not None:
+                return sequence, frame
+            if deadline is not None and time.monotonic() > deadline:
+                return None, None
+            time.sleep(poll)
+
+    def still_valid(self, sequence):
+        """Check that the slot of a frame was not overwritten since it was read."""
+        return self._sequences[sequence % self.slots] == sequence
+
+    def close(self):
+        """Detach from the block (and free it if this process created it)."""
+        # The NumPy views must go before the buffer can be released
+        self._header = self._sequences = self._frames = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _ring_worker(name, stop, results):
+    """Benchmark worker: reduce each new frame to a green-pixel count, like a cheap board check."""
+    ring = FrameRing.attach(name)
+    seen = processed = torn = 0
+    last = 0
+    while not stop.is_set() or ring.latest_sequence > last:
+        sequence, frame = ring.wait_latest(last, timeout=0.1)
+        if frame is None:
+            continue
+        int(frame[:, :, 1].sum())
+        seen += sequence - last
+        last = sequence
+        processed += 1
+        if not ring.still_valid(sequence):
+            torn += 1
+    ring.close()
+    results.put(("ring", processed, seen, torn))
+
+
+def _queue_worker(frames, results):
+    processed = 0
+    while True:
+        frame = frames.get()
+        if frame is None:
+            break
+        int(frame[:, :, 1].sum())
+        processed += 1
+    results.put(("queue", processed, processed, 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the shared-memory frame ring with a multiprocessing.Queue")
+    parser.add_argument("--frames", type=int, default=300, help="Frames written by the capture process")
+    parser.add_argument("--workers", type=int, default=2, help="Vision worker processes")
+    parser.add_argument("--slots", type=int, default=4, help="Slots in the ring")
+    args = parser.parse_args()
+
+    shape = (480, 640, 3)
+    frames = [np.random.default_rng(i).integers(0, 255, shape, dtype=np.uint8) for i in range(4)]
+    results = multiprocessing.Queue()
+
+    # Shared-memory ring: every worker looks at the newest frame
+    with FrameRing.create(shape, args.slots) as ring:
+        stop = multiprocessing.Event()
+        workers = [multiprocessing.Process(target=_ring_worker, args=(ring.name, stop, results))
+                   for _ in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        start = time.perf_counter()
+        for i in range(args.frames):
+            ring.write(frames[i % len(frames)])
+        write_time = time.perf_counter() - start
+        stop.set()
+        ring_stats = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+    print(f"ring : {args.frames / write_time:8.0f} frames/s written, per worker "
+          + ", ".join(f"{processed} processed / {seen - processed} skipped / {torn} overwritten while in use"
+                     for _, processed, seen, torn in ring_stats))
+
+    # Queue: every frame is pickled and sent to one worker
+    queue = multiprocessing.Queue(maxsize=args.slots)
+    workers = [multiprocessing.Process(target=_queue_worker, args=(queue, results)) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    start = time.perf_counter()
+    for i in range(args.frames):
+        queue.put(frames[i % len(frames)])
+    for _ in workers:
+        queue.put(None)
+    queue_stats = [results.get() for _ in workers]
+    queue_time = time.perf_counter() - start
+    for worker in workers:
+        worker.join()
+    print(f"queue: {args.frames / queue_time:8.0f} frames/s delivered, per worker "
+          + ", ".join(f"{processed} processed" for _, processed, _, _ in queue_stats))
+
+
+if __name__ == "__main__":
+    main()
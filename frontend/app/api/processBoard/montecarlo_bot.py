@@ -0,0 +1,279 @@
+"""
+Monte Carlo bot for a stronger "hard" mode.
+
+Instead of the fixed placement heatmap of actions/probability.ts (targeting.py),
+the bot samples complete fleet layouts that agree with every shot so far: no ship
+on a miss, no overlapping ships, and every hit covered by a ship. The fraction of
+sampled layouts with a ship on a cell is the probability of a hit there, and the
+bot shoots the most likely cell it has not shot yet.
+
+Layouts are sampled with the bitboards of bitboard.py. Plain rejection sampling
+(place the fleet at random, keep the layout if it covers every hit) almost never
+succeeds after a few hits, so the ships covering the hits are placed first and
+every layout is weighted to undo that bias (see sample_layouts). Sampling runs on
+a process pool until the per-move time budget is used up. With too few layouts
+(e.g. hits no fleet can explain) the bot falls back to the targeting heatmap.
+
+Usage (plays games against random fleets and compares with the heatmap bot):
+    python montecarlo_bot.py [--games 10] [--budget 0.1] [--workers 4]
+"""
+
+import argparse
+import multiprocessing
+import random
+import time
+
+import numpy as np
+
+from bitboard import FLEET, GRID, board_to_mask, covering_placements, placement_matrix, placements, popcount
+from targeting import next_move, placement_heatmap
+
+
+def sample_layouts(hits, misses, fleet, budget, seed, max_samples=None):
+    """
+    Sample consistent layouts for `budget` seconds.
+
+    Every layout is built so that it is consistent: while a hit is uncovered, a ship and a
+    placement covering the lowest uncovered hit are picked uniformly among the options
+    that avoid the misses and the ships placed so far; the remaining ships are then placed
+    one by one, uniformly among their non-overlapping placements. Layouts are not equally
+    likely to be built this way, so each one is weighted with the product of the number of
+    options at every step (importance sampling), which makes the weighted counts those of
+    the uniform distribution over consistent layouts. A dead end (no option left) is dropped.
+
+    Args:
+        hits (int): Mask of the hits
+        misses (int): Mask of the misses
+        fleet (list): Ship lengths still to place
+        budget (float): Sampling time in seconds
+        seed (int): Seed of the random generator
+        max_samples (int): Stop after this many layouts, None for no limit
+
+    Returns:
+        tuple: (number of layouts, total weight, {length: weighted placement counts as a float64 array})
+    """
+    rng = random.Random(seed)
+    lengths = set(fleet)
+    masks = {length: placements(length) for length in lengths}
+    # the placements that avoid every miss never change during the move
+    candidates = {length: [(i, mask) for i, mask in enumerate(masks[length]) if not mask & misses]
+                  for length in lengths}
+    covering = {length: covering_placements(length) for length in lengths}
+    counts = {length: np.zeros(len(placements(length)), dtype=np.float64) for length in lengths}
+
+    samples = 0
+    total_weight = 0.0
+    deadline = time.monotonic() + budget
+    attempts = 0
+    while max_samples is None or samples < max_samples:
+        # checking the clock costs about as much as a sample, so only every 16 attempts
+        if attempts % 16 == 0 and time.monotonic() > deadline:
+            break
+        attempts += 1
+
+        occupied = 0
+        uncovered = hits
+        free = list(fleet)
+        chosen = []
+        weight = 1.0
+        while uncovered:
+            cell = (uncovered & -uncovered).bit_length() - 1
+            blocked = occupied | misses
+            options = [(length, i, masks[length][i]) for length in set(free)
+                       for i in covering[length][cell] if not masks[length][i] & blocked]
+            if not options:
+                break
+            # a length that is in the fleet twice has twice the options
+            options = [option for option in options for _ in range(free.count(option[0]))]
+            weight *= len(options)
+            length, index, mask = options[rng.randrange(len(options))]
+            free.remove(length)
+            occupied |= mask
+            uncovered &= ~mask
+            chosen.append((length, index))
+        if uncovered:
+            continue
+
+        for length in free:
+            options = [(i, mask) for i, mask in candidates[length] if not mask & occupied]
+            if not options:
+                break
+            weight *= len(options)
+            index, mask = options[rng.randrange(len(options))]
+            occupied |= mask
+            chosen.append((length, index))
+        else:
+            samples += 1
+            total_weight += weight
+            for length, index in chosen:
+                counts[length][index] += weight
+    return samples, total_weight, counts
+
+
+def _sample_worker(job):
+    hits, misses, fleet, budget, seed, max_samples = job
+    return sample_layouts(hits, misses, fleet, budget, seed, max_samples)
+
+
+class MonteCarloBot:
+    """
+    Hard-mode bot that samples consistent fleet layouts on a process pool.
+
+    Args:
+        workers (int): Worker processes, 0 samples in the calling process, None uses every core
+        time_budget (float): Sampling time per move in seconds
+        min_samples (int): Below this many layouts the targeting heatmap picks the move
+    """
+
+    def __init__(self, workers=None, time_budget=0.2, min_samples=100):
+        self.workers = multiprocessing.cpu_count() if workers is None else workers
+        self.time_budget = time_budget
+        self.min_samples = min_samples
+        self._pool = multiprocessing.Pool(self.workers) if self.workers > 0 else None
+        self._seeds = np.random.SeedSequence()
+        self.last_samples = 0
+
+    def probabilities(self, hits, misses, fleet=FLEET):
+        """
+        Hit probability of every cell.
+
+        Args:
+            hits (array-like): 10x10, 1 where a shot hit (same as boardHits in page.tsx)
+            misses (array-like): 10x10, non-zero where a shot missed (same as boardMisses)
+            fleet (list): Ship lengths that can still be on the board
+
+        Returns:
+            tuple: (10x10 float array of probabilities, number of sampled layouts)
+        """
+        hit_mask = board_to_mask(np.asarray(hits) == 1)
+        miss_mask = board_to_mask(misses)
+        seeds = [int(seed.generate_state(1)[0]) for seed in self._seeds.spawn(max(self.workers, 1))]
+        jobs = [(hit_mask, miss_mask, list(fleet), self.time_budget, seed, None) for seed in seeds]
+        if self._pool is None:
+            results = [_sample_worker(jobs[0])]
+        else:
+            results = self._pool.map(_sample_worker, jobs)
+
+        samples = sum(result[0] for result in results)
+        total_weight = sum(result[1] for result in results)
+        self.last_samples = samples
+
+        cell_weights = np.zeros(GRID * GRID, dtype=np.float64)
+        for _, _, counts in results:
+            for length, placement_counts in counts.items():
+                cell_weights += placement_counts @ placement_matrix(length)
+        return cell_weights.reshape(GRID, GRID) / max(total_weight, 1.0), samples
+
+    def choose_move(self, hits, misses, fleet=FLEET):
+        """
+        Pick the next shot.
+
+        Args:
+            hits (array-like): 10x10, 1 where a shot hit
+            misses (array-like): 10x10, non-zero where a shot missed
+            fleet (list): Ship lengths that can still be on the board
+
+        Returns:
+            tuple: (row, col)
+        """
+        hits = np.asarray(hits)
+        misses = np.asarray(misses)
+        shot = (hits == 1) | (misses != 0)
+
+        probabilities, samples = self.probabilities(hits, misses, fleet)
+        if samples < self.min_samples:
+            probabilities = placement_heatmap(hits, misses, fleet).astype(float)
+        # never shoot the same cell twice, even where every remaining value is 0
+        probabilities = np.where(shot, -1.0, probabilities)
+        return next_move(probabilities)
+
+    def close(self):
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def random_layout(rng, fleet=FLEET):
+    """Place a fleet at random without overlaps (like generateBoard in functions.ts)."""
+    occupied = 0
+    for length in fleet:
+        options = placements(length)
+        while True:
+            mask = options[rng.randrange(len(options))]
+            if not mask & occupied:
+                break
+        occupied |= mask
+    return occupied
+
+
+def play_game(choose, layout):
+    """
+    Shoot at a layout until every ship cell is hit.
+
+    Args:
+        choose (callable): Takes (hits, misses) matrices and returns (row, col)
+        layout (int): Mask of the ship cells
+
+    Returns:
+        int: Number of shots
+    """
+    hits = np.zeros((GRID, GRID), dtype=np.int8)
+    misses = np.zeros((GRID, GRID), dtype=np.int8)
+    remaining = popcount(layout)
+    shots = 0
+    while remaining:
+        row, col = choose(hits, misses)
+        shots += 1
+        if layout >> (row * GRID + col) & 1:
+            hits[row, col] = 1
+            remaining -= 1
+        else:
+            misses[row, col] = 1
+    return shots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Monte Carlo bot with the targeting heatmap bot")
+    parser.add_argument("--games", type=int, default=10, help="Games per bot")
+    parser.add_argument("--budget", type=float, default=0.1, help="Sampling time per move in seconds")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the fleets")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    layouts = [random_layout(rng) for _ in range(args.games)]
+
+    def heatmap_move(hits, misses):
+        shot = (hits == 1) | (misses != 0)
+        return next_move(np.where(shot, -1, placement_heatmap(hits, misses)))
+
+    heatmap_shots = [play_game(heatmap_move, layout) for layout in layouts]
+    print(f"heatmap bot    : {np.mean(heatmap_shots):5.1f} shots per game (best {min(heatmap_shots)}, "
+          f"worst {max(heatmap_shots)})")
+
+    with MonteCarloBot(args.workers, args.budget) as bot:
+        samples = []
+
+        def monte_carlo_move(hits, misses):
+            move = bot.choose_move(hits, misses)
+            samples.append(bot.last_samples)
+            return move
+
+        start = time.perf_counter()
+        monte_carlo_shots = [play_game(monte_carlo_move, layout) for layout in layouts]
+        elapsed = time.perf_counter() - start
+    print(f"Monte Carlo bot: {np.mean(monte_carlo_shots):5.1f} shots per game (best {min(monte_carlo_shots)}, "
+          f"worst {max(monte_carlo_shots)}), median {np.median(samples):.0f} layouts per move, "
+          f"{elapsed / len(samples) * 1000:.0f} ms per move with {bot.workers} worker(s)")
+
+
+if __name__ == "__main__":
+    main()
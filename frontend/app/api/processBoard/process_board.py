@@ -2,205 +2,626 @@ import cv2
 import numpy as np
 import argparse
 import json
+import os
+import struct
+import sys
+import time
 
-# Parse command-line argument for image path.
-parser = argparse.ArgumentParser(description="Process board image to JSON")
-parser.add_argument("--image", required=True, help="Path to input image")
-args = parser.parse_args()
-
-imageName = args.image  # Use the image path provided
-image = cv2.imread(imageName)
-image = cv2.flip(image, 1)
-
-boats_data = []
+from fleet_index import snap_fleet
 
 ##need to make code more robust and check for conditions.
 
-##show OG pic
-# cv2.imshow("Board State", image)
-# cv2.waitKey(2000)  #shows image briefly
-
-####################### DETECT GRID AREA AND CREATE GRID #######################
-
-# Convert to HSV
-hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+####################### SETTINGS #######################
 
 # Detect corners of board (red, may change)
 # this defines the range for red we are searching for
 #test pics in GT to see how the lighting affects the performance.
-lower_red_1 = np.array([0, 80, 80])
-upper_red_1 = np.array([15, 255, 255])
-lower_red_2 = np.array([150, 80, 80])
-upper_red_2 = np.array([180, 255, 255])
-
-#red has 2 colour ranges so we create a mask for both
-# mask sets all red pixels to white and all other pixels to black (0)
-mask1 = cv2.inRange(hsv, lower_red_1, upper_red_1)
-mask2 = cv2.inRange(hsv, lower_red_2, upper_red_2)
-mask = cv2.bitwise_or(mask1, mask2) #OR combines masks
-contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE) #finds boundaries of regions in mask
-
-#purely visual:
-# cv2.imshow("Board State", mask)
-# cv2.waitKey(2000)  #shows image briefly
-
-#get central coordinates of red regions, these will be used as corners of the grid.
-coordinates = []
-for contour in contours:
-    if cv2.contourArea(contour) > 10:  # Ignore small red areas (adjust according to more testing)
-        M = cv2.moments(contour)
-        if M["m00"] != 0:
-            cx = int(M["m10"] / M["m00"])
-            cy = int(M["m01"] / M["m00"])
-            coordinates.append((cx, cy))
-            #print(cx, cy)
-
-# # Sort the corners (Top-left, Top-right, Bottom-right, Bottom-left)
-# coordinates = sorted(coordinates, key=lambda p: (p[1], p[0]))  # Sort by Y, then X
-# if len(coordinates) != 4:
-#     raise ValueError("Could not detect 4 red corner points!")
-# print(coordinates)
-#
-# #now we have 4 sorted points that can be used as the corners of the grid.
-#
-# #define the ideal grid corner positions
-width, height = 500, 500  #defines fixed board size. (not sure if this is ideal but let's see)
-# ideal_corners = np.float32([[0, 0], [width, 0], [width, height], [0, height]]) #standard corner pos
-# actual_corners = np.float32(coordinates)
-#
-# #Map the actual corners on to the ideal corners (perspective transformation matrix)
-# matrix = cv2.getPerspectiveTransform(actual_corners, ideal_corners)
-# warped = cv2.warpPerspective(image, matrix, (width, height))
-
-pts = np.array(coordinates, dtype="float32")
-
-# the idea: sum and diff of (x,y) give you unique signatures
-s = pts.sum(axis=1)
-diff = np.diff(pts, axis=1)
-
-ordered = np.zeros((4,2), dtype="float32")
-ordered[0] = pts[np.argmin(s)]       # top-left  has smallest  x+y
-ordered[2] = pts[np.argmax(s)]       # bot-right has largest   x+y
-ordered[1] = pts[np.argmin(diff)]    # top-right has smallest  x−y
-ordered[3] = pts[np.argmax(diff)]    # bot-left has largest   x−y
-
-ideal = np.float32([[0,0],
-                    [width,0],
-                    [width,height],
-                    [0,height]])
-M = cv2.getPerspectiveTransform(ordered, ideal)
-warped = cv2.warpPerspective(image, M, (width, height))
-
-
-#calc size of grid cell
-cell_size = width // 10
-
-#create 2D grid array with actual coordinates of the grid (used later to map where the boats are)
-grid = [[(col * cell_size, row * cell_size) for col in range(10)] for row in range(10)]
-
-# cv2.imshow("Board State", warped) #purely visualisation
-# cv2.waitKey(2000)  #shows image briefly
-
-####################### DETECT GRID AREA AND CREATE GRID #######################
-
-#convert warped image to HSV for green boat detection
-warped_hsv = cv2.cvtColor(warped, cv2.COLOR_BGR2HSV)
+LOWER_RED_1 = np.array([0, 80, 80])
+UPPER_RED_1 = np.array([15, 255, 255])
+LOWER_RED_2 = np.array([150, 80, 80])
+UPPER_RED_2 = np.array([180, 255, 255])
 
 #define the range for green boats (this may need to be changed depending on testing and we may change boat colour)
-lower_green = np.array([30, 80, 80])
-upper_green = np.array([90, 255, 255])
-
-# Create mask for green color
-green_mask = cv2.inRange(warped_hsv, lower_green, upper_green)
-
-# Find contours of green boats
-boat_contours, _ = cv2.findContours(green_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-#if not boat_contours:
-    #print("No green boats detected!")
-
-#purely visual:
-# cv2.imshow("Board State", green_mask)
-# cv2.waitKey(4000)  #shows image briefly
+LOWER_GREEN = np.array([30, 80, 80])
+UPPER_GREEN = np.array([90, 255, 255])
+
+#sizes below are for the full resolution image, they are scaled with the decode scale
+MIN_MARKER_AREA = 10  # Ignore small red areas (adjust according to more testing)
+WARP_SIZE = 500  #defines fixed board size. (not sure if this is ideal but let's see)
+
+#define a threshold (will need to be adjusted with testing)
+#fraction of a grid cell a boat has to cover, this does not depend on the scale
+OCCUPANCY_THRESHOLD = 0.5
+
+#cell mode: the board is warped to CELL_SAMPLES x CELL_SAMPLES pixels per cell and every cell is classified on its own
+CELL_SAMPLES = 8
+#fraction of green pixels that makes a cell occupied (boats leave a small gap at the cell edges, so lower than above)
+CELL_GREEN_THRESHOLD = 0.35
+
+#decode scale: 1 decodes the full image, 2/4/8 let libjpeg decode at 1/2, 1/4 or 1/8 resolution
+#(much less work for a 10x10 grid, see board_benchmark.py for the speed and accuracy per scale)
+DECODE_SCALE = 1
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+#capture recording: every image is appended to this archive (VoiceRecognition/session_archive.py) before it is
+#processed, route.ts deletes it afterwards. set the env var for the web app, replay with session_replay.py
+RECORD_ARCHIVE = os.environ.get("BATTLESHIP_RECORD_ARCHIVE")
+
+
+def load_image(image_path, scale=DECODE_SCALE):
+    """
+    Read and mirror a board image, decoded at 1/scale resolution.
+
+    Args:
+        image_path (str): Path to the image
+        scale (int): Decode scale (1, 2, 4 or 8)
+
+    Returns:
+        numpy.ndarray: BGR image, None if it could not be read
+    """
+    image = cv2.imread(image_path, DECODE_FLAGS[scale])
+    if image is None:
+        return None
+    return cv2.flip(image, 1)
+
+
+def decode_image(data, scale=DECODE_SCALE):
+    """
+    Decode and mirror an encoded image (e.g. the JPEG bytes from esp32_capture.py), at 1/scale resolution.
+
+    Args:
+        data (bytes-like): Encoded image
+        scale (int): Decode scale (1, 2, 4 or 8)
+
+    Returns:
+        numpy.ndarray: BGR image, None if it could not be decoded
+    """
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), DECODE_FLAGS[scale])
+    if image is None:
+        return None
+    return cv2.flip(image, 1)
+
+
+def scaled_settings(scale):
+    """
+    Get the size-dependent settings for an image decoded at 1/scale resolution.
+
+    Args:
+        scale (int): Decode scale (1, 2, 4 or 8)
+
+    Returns:
+        tuple: (minimum marker area in pixels, warp size in pixels)
+    """
+    #areas shrink with the square of the scale
+    min_marker_area = MIN_MARKER_AREA / (scale * scale)
+    #keep the warped board a multiple of 10 pixels so every grid cell is the same size
+    warp_size = max(100, WARP_SIZE // scale // 10 * 10)
+    return min_marker_area, warp_size
+
+#quality gate, checked on a tiny copy before the full pipeline (thresholds from the sample and synthetic images)
+QUALITY_SIZE = (160, 120)  #width, height of the copy the checks run on
+MIN_BRIGHTNESS = 50  #mean grey value below this is too dark
+MAX_CLIPPED_FRACTION = 0.6  #more than this fraction of (almost) white pixels is overexposed
+#blur is measured on the edges of the red markers: steepest change of the saturation across the edge divided by
+#the step between marker and board (about 1 / edge width in pixels of the tiny copy, so lighting does not matter).
+#the sample ESP32 frames are 0.47-0.58 and a gaussian blur of sigma 8 px on a VGA frame brings them to 0.41 or less,
+#too close to reject on by default, so None keeps the check off until it is calibrated on more real frames
+MIN_MARKER_SHARPNESS = None  #e.g. 0.4 to reject blurry captures
+MIN_MARKER_CONTRAST = 10  #below this saturation step there is no real marker edge to measure
+MIN_RED_PIXELS = 8  #4 corner markers are at least this many red pixels in the tiny copy
+
+
+def quality_decode_scale(data):
+    """
+    Decode scale for the check_quality copy of an encoded image: the largest one that still gives QUALITY_SIZE.
+
+    Only for baseline JPEG (what the ESP32 camera sends), where libjpeg skips most of the work at a reduced
+    scale. Progressive JPEGs and PNGs are decoded in full before they are scaled down, so they are better
+    decoded once and shrunk by check_quality.
+
+    Args:
+        data (bytes-like): Encoded image
+
+    Returns:
+        int: 1, 2, 4 or 8, None if it is not a baseline JPEG
+    """
+    data = bytes(memoryview(data)[:65536])
+    if not data.startswith(b"\xff\xd8"):
+        return None
+    #walk the header segments up to the baseline frame header (SOF0), it holds the image size
+    position = 2
+    while position + 9 <= len(data) and data[position] == 0xFF:
+        marker = data[position + 1]
+        if marker == 0xC0:
+            height, width = struct.unpack(">HH", data[position + 5:position + 9])
+            for scale in (8, 4, 2):
+                if width // scale >= QUALITY_SIZE[0] and height // scale >= QUALITY_SIZE[1]:
+                    return scale
+            return 1
+        if 0xC1 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC) or marker == 0xDA:
+            return None  #progressive (or otherwise not baseline) frame, or the scan started without a frame header
+        position += 2 + struct.unpack(">H", data[position + 2:position + 4])[0]
+    return None
+
+
+def marker_sharpness(hsv, red):
+    """
+    How sharp the edges of the red markers are, see MIN_MARKER_SHARPNESS.
+
+    Args:
+        hsv (numpy.ndarray): HSV tiny copy
+        red (numpy.ndarray): Red mask of the tiny copy
+
+    Returns:
+        float: Sharpness, None if there is no marker edge with enough contrast
+    """
+    kernel = np.ones((3, 3), np.uint8)
+    grown = cv2.dilate(red, kernel)
+    edge = grown > cv2.erode(red, kernel)
+    #ring of board just outside the markers
+    ring = cv2.dilate(grown, kernel, iterations=2) > cv2.dilate(grown, kernel)
+    if not edge.any() or not ring.any():
+        return None
+
+    saturation = hsv[:, :, 1].astype(np.float32)
+    contrast = float(saturation[red > 0].mean() - saturation[ring].mean())
+    if contrast < MIN_MARKER_CONTRAST:
+        return None
+    #sobel / 8 is the change per pixel
+    gradient = cv2.magnitude(cv2.Sobel(saturation, cv2.CV_32F, 1, 0), cv2.Sobel(saturation, cv2.CV_32F, 0, 1)) / 8
+    return float(np.percentile(gradient[edge], 90) / contrast)
+
+
+def check_quality(image, min_sharpness=MIN_MARKER_SHARPNESS):
+    """
+    Cheap checks on a tiny copy of the image, so a bad capture is rejected before the full pipeline runs.
+
+    Args:
+        image (numpy.ndarray): BGR image (any decode scale, see quality_decode_scale for the cheapest one)
+        min_sharpness (float): Reject below this marker sharpness, None only reports it
+
+    Returns:
+        dict: "ok" (bool), "reason" (None, "too_dark", "overexposed", "no_markers" or "blurry") and "metrics"
+    """
+    #big images are point-sampled to 4x the tiny copy first (an area resize of a 2048x2048 photo reads every
+    #pixel and costs more than all the checks), the area resize then averages 4x4 samples per pixel
+    if image.shape[1] > 4 * QUALITY_SIZE[0] and image.shape[0] > 4 * QUALITY_SIZE[1]:
+        image = cv2.resize(image, (4 * QUALITY_SIZE[0], 4 * QUALITY_SIZE[1]), interpolation=cv2.INTER_NEAREST)
+    tiny = cv2.resize(image, QUALITY_SIZE, interpolation=cv2.INTER_AREA)
+    grey = cv2.cvtColor(tiny, cv2.COLOR_BGR2GRAY)
+
+    #exposure from the histogram
+    hist = cv2.calcHist([grey], [0], None, [256], [0, 256]).ravel()
+    brightness = float(np.dot(hist, np.arange(256)) / grey.size)
+    clipped = float(hist[250:].sum() / grey.size)
+
+    #red pixels for the corner markers (same colour ranges as find_corner_markers)
+    hsv = cv2.cvtColor(tiny, cv2.COLOR_BGR2HSV)
+    red_mask = cv2.bitwise_or(cv2.inRange(hsv, LOWER_RED_1, UPPER_RED_1), cv2.inRange(hsv, LOWER_RED_2, UPPER_RED_2))
+    red = cv2.countNonZero(red_mask)
+
+    #blur: on the marker edges, the board itself may have no texture at all
+    sharpness = marker_sharpness(hsv, red_mask) if red >= MIN_RED_PIXELS else None
+
+    metrics = {
+        "brightness": round(brightness, 1),
+        "clipped_fraction": round(clipped, 3),
+        "red_pixels": int(red),
+        "marker_sharpness": None if sharpness is None else round(sharpness, 3),
+    }
+
+    #exposure first, the other checks mean nothing on a black or white image
+    if brightness < MIN_BRIGHTNESS:
+        reason = "too_dark"
+    elif clipped > MAX_CLIPPED_FRACTION:
+        reason = "overexposed"
+    elif red < MIN_RED_PIXELS:
+        reason = "no_markers"
+    elif min_sharpness is not None and sharpness is not None and sharpness < min_sharpness:
+        reason = "blurry"
+    else:
+        reason = None
+    return {"ok": reason is None, "reason": reason, "metrics": metrics}
 
-#now we have a mask that has 'highlighted' the green boats we need to determine the position and what grid it falls into
 
-for contour in boat_contours: #loop through all green objects 'boats' found
-    #get bouding box of contour (area boat covers) and calc centre
-    x, y, w, h = cv2.boundingRect(contour)
-    boat_center_x = x + w // 2
-    boat_center_y = y + h // 2
+####################### DETECT GRID AREA AND CREATE GRID #######################
 
-    #store occupied grid cells
-    occupied_cells = set()
+def find_corner_markers(image, min_area=MIN_MARKER_AREA):
+    """
+    Find the centres of the red corner markers.
+
+    Args:
+        image (numpy.ndarray): BGR image
+        min_area (float): Red areas smaller than this (in pixels) are ignored
+
+    Returns:
+        list: (x, y) centre of every red marker
+    """
+    # Convert to HSV
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+
+    #red has 2 colour ranges so we create a mask for both
+    # mask sets all red pixels to white and all other pixels to black (0)
+    mask1 = cv2.inRange(hsv, LOWER_RED_1, UPPER_RED_1)
+    mask2 = cv2.inRange(hsv, LOWER_RED_2, UPPER_RED_2)
+    mask = cv2.bitwise_or(mask1, mask2) #OR combines masks
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE) #finds boundaries of regions in mask
+
+    #purely visual:
+    # cv2.imshow("Board State", mask)
+    # cv2.waitKey(2000)  #shows image briefly
+
+    #get central coordinates of red regions, these will be used as corners of the grid.
+    coordinates = []
+    for contour in contours:
+        if cv2.contourArea(contour) > min_area:
+            M = cv2.moments(contour)
+            if M["m00"] != 0:
+                cx = int(M["m10"] / M["m00"])
+                cy = int(M["m01"] / M["m00"])
+                coordinates.append((cx, cy))
+                #print(cx, cy)
+    return coordinates
+
+
+def order_corners(coordinates):
+    """
+    Order the marker centres as top-left, top-right, bottom-right, bottom-left.
+
+    Args:
+        coordinates (list): (x, y) marker centres
+
+    Returns:
+        numpy.ndarray: float32 array of shape (4, 2)
+    """
+    pts = np.array(coordinates, dtype="float32")
+
+    # the idea: sum and diff of (x,y) give you unique signatures
+    s = pts.sum(axis=1)
+    diff = np.diff(pts, axis=1)
+
+    ordered = np.zeros((4,2), dtype="float32")
+    ordered[0] = pts[np.argmin(s)]       # top-left  has smallest  x+y
+    ordered[2] = pts[np.argmax(s)]       # bot-right has largest   x+y
+    ordered[1] = pts[np.argmin(diff)]    # top-right has smallest  x−y
+    ordered[3] = pts[np.argmax(diff)]    # bot-left has largest   x−y
+    return ordered
+
+
+def warp_board(image, corners, size=WARP_SIZE):
+    """
+    Map the board between the corners onto a size x size image.
+
+    Args:
+        image (numpy.ndarray): BGR image
+        corners (numpy.ndarray): Ordered corners from order_corners
+        size (int): Width and height of the warped board
+
+    Returns:
+        numpy.ndarray: The warped board
+    """
+    width, height = size, size
+    ideal = np.float32([[0,0],
+                        [width,0],
+                        [width,height],
+                        [0,height]])
+    M = cv2.getPerspectiveTransform(corners, ideal)
+    return cv2.warpPerspective(image, M, (width, height))
+
+
+####################### DETECT BOATS #######################
+
+def detect_boats(warped):
+    """
+    Find the green boats on the warped board and the grid cells they cover.
+
+    Args:
+        warped (numpy.ndarray): Warped board from warp_board
+
+    Returns:
+        list: One dict per boat with "occupied_cells", "size" and "orientation"
+    """
+    width = warped.shape[1]
+
+    #calc size of grid cell
+    cell_size = width // 10
+
+    #create 2D grid array with actual coordinates of the grid (used later to map where the boats are)
+    grid = [[(col * cell_size, row * cell_size) for col in range(10)] for row in range(10)]
+
+    #convert warped image to HSV for green boat detection
+    warped_hsv = cv2.cvtColor(warped, cv2.COLOR_BGR2HSV)
+
+    # Create mask for green color
+    green_mask = cv2.inRange(warped_hsv, LOWER_GREEN, UPPER_GREEN)
+
+    # Find contours of green boats
+    boat_contours, _ = cv2.findContours(green_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    #if not boat_contours:
+        #print("No green boats detected!")
+
+    #purely visual:
+    # cv2.imshow("Board State", green_mask)
+    # cv2.waitKey(4000)  #shows image briefly
 
-    #define a threshold (will need to be adjusted with testing)
-    threshold = 0.5
+    #now we have a mask that has 'highlighted' the green boats we need to determine the position and what grid it falls into
+    boats_data = []
     cell_area = cell_size * cell_size
 
-    #check which grid cells the boat occupies with majority overlap and
-    for row in range(10):
-        for col in range(10):
-            cell_x, cell_y = grid[row][col]
-
-            #define the grid cell's boundaries (top-left and bottom-right corners)
-            cell_bottom_right_x = cell_x + cell_size
-            cell_bottom_right_y = cell_y + cell_size
-
-            #calculate the overlap between the grid cell and the boat's bounding box
-            overlap_x1 = max(x, cell_x)
-            overlap_y1 = max(y, cell_y)
-            overlap_x2 = min(x + w, cell_bottom_right_x)
-            overlap_y2 = min(y + h, cell_bottom_right_y)
-
-            #check if there's any overlap at all
-            if overlap_x2 > overlap_x1 and overlap_y2 > overlap_y1:
-                overlap_area = (overlap_x2 - overlap_x1) * (overlap_y2 - overlap_y1)
-                #if the overlap area is greater than the threshold, consider the grid cell occupied and add it to occupied cells
-                if overlap_area > threshold * cell_area:
-                    occupied_cells.add((row, col))
-
-    #if the boat is not on any grid cell it means its outside the range of the board so discard
-    if not occupied_cells:
-        #print(f"No grid cells occupied for boat at ({boat_center_x}, {boat_center_y}), boat out of board range")
-        continue
-
-    #get boat size and orientation
-    boat_size = len(occupied_cells)
-    min_row = min(cell[0] for cell in occupied_cells)
-    max_row = max(cell[0] for cell in occupied_cells)
-    min_col = min(cell[1] for cell in occupied_cells)
-    max_col = max(cell[1] for cell in occupied_cells)
-
-    boat_width = max_col - min_col + 1
-    boat_height = max_row - min_row + 1
-
-    if boat_width > boat_height:
-        orientation = "Horizontal"
-    elif boat_height > boat_width:
-        orientation = "Vertical"
+    for contour in boat_contours: #loop through all green objects 'boats' found
+        #get bouding box of contour (area boat covers)
+        x, y, w, h = cv2.boundingRect(contour)
+
+        #store occupied grid cells
+        occupied_cells = set()
+
+        #check which grid cells the boat occupies with majority overlap and
+        for row in range(10):
+            for col in range(10):
+                cell_x, cell_y = grid[row][col]
+
+                #define the grid cell's boundaries (top-left and bottom-right corners)
+                cell_bottom_right_x = cell_x + cell_size
+                cell_bottom_right_y = cell_y + cell_size
+
+                #calculate the overlap between the grid cell and the boat's bounding box
+                overlap_x1 = max(x, cell_x)
+                overlap_y1 = max(y, cell_y)
+                overlap_x2 = min(x + w, cell_bottom_right_x)
+                overlap_y2 = min(y + h, cell_bottom_right_y)
+
+                #check if there's any overlap at all
+                if overlap_x2 > overlap_x1 and overlap_y2 > overlap_y1:
+                    overlap_area = (overlap_x2 - overlap_x1) * (overlap_y2 - overlap_y1)
+                    #if the overlap area is greater than the threshold, consider the grid cell occupied and add it to occupied cells
+                    if overlap_area > OCCUPANCY_THRESHOLD * cell_area:
+                        occupied_cells.add((row, col))
+
+        #if the boat is not on any grid cell it means its outside the range of the board so discard
+        if not occupied_cells:
+            continue
+
+        #get boat size and orientation
+        boat_size = len(occupied_cells)
+        min_row = min(cell[0] for cell in occupied_cells)
+        max_row = max(cell[0] for cell in occupied_cells)
+        min_col = min(cell[1] for cell in occupied_cells)
+        max_col = max(cell[1] for cell in occupied_cells)
+
+        boat_width = max_col - min_col + 1
+        boat_height = max_row - min_row + 1
+
+        if boat_width > boat_height:
+            orientation = "Horizontal"
+        elif boat_height > boat_width:
+            orientation = "Vertical"
+        else:
+            orientation = "Unknown"
+
+        #the code below is purely for visualisation and will not be functional in the final design
+        # cv2.rectangle(warped, (x, y), (x + w, y + h), (255, 0, 0), 2)
+        # cv2.putText(warped, f"{boat_size} cells", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+        # cv2.putText(warped, orientation, (x, y - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+
+        # populate json
+        boats_data.append({
+            "occupied_cells": sorted(list(occupied_cells)),  # sort for readability
+            "size": boat_size,
+            "orientation": orientation
+        })
+
+    return boats_data
+
+
+####################### CELL MODE #######################
+
+def classify_cells(image, corners, samples=CELL_SAMPLES):
+    """
+    Classify every grid cell from its own statistics instead of finding boat contours.
+
+    The board is warped straight onto a small 10*samples grid (after halving the image with pyrDown
+    until the board is at most a few times that size, so every sample averages the pixels around it)
+    and the green mask is averaged per cell.
+
+    Args:
+        image (numpy.ndarray): BGR image
+        corners (numpy.ndarray): Ordered corners from order_corners
+        samples (int): Pixels per cell side in the small warp
+
+    Returns:
+        dict: 10x10 arrays "occupancy" (uint8), "green_fraction", "confidence" (0 at the threshold,
+            1 far from it) and "mean_hsv" (10x10x3)
+    """
+    corners = np.asarray(corners, dtype="float32")
+    size = 10 * samples
+    side = max(np.linalg.norm(corners[1] - corners[0]), np.linalg.norm(corners[3] - corners[0]))
+    while side > 4 * size:
+        image = cv2.pyrDown(image)
+        corners = corners / 2
+        side /= 2
+
+    small = warp_board(image, corners, size)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    green_mask = cv2.inRange(hsv, LOWER_GREEN, UPPER_GREEN)
+
+    #split the warp into 10x10 blocks of samples x samples pixels and average each block
+    green_fraction = green_mask.reshape(10, samples, 10, samples).mean(axis=(1, 3)) / 255
+    mean_hsv = hsv.reshape(10, samples, 10, samples, 3).mean(axis=(1, 3))
+
+    occupancy = (green_fraction >= CELL_GREEN_THRESHOLD).astype(np.uint8)
+    confidence = np.clip(np.abs(green_fraction - CELL_GREEN_THRESHOLD) / CELL_GREEN_THRESHOLD, 0, 1)
+    return {"occupancy": occupancy, "green_fraction": green_fraction, "confidence": confidence, "mean_hsv": mean_hsv}
+
+
+def matrix_to_boats(occupancy):
+    """
+    Group occupied cells into boats (4-connected groups), in the same format as detect_boats.
+
+    Args:
+        occupancy (numpy.ndarray): 10x10 matrix, non-zero where a boat is
+
+    Returns:
+        list: One dict per boat with "occupied_cells", "size" and "orientation"
+    """
+    count, labels = cv2.connectedComponents(np.asarray(occupancy, dtype=np.uint8), connectivity=4)
+    boats_data = []
+    for label in range(1, count):
+        rows, cols = np.nonzero(labels == label)
+        boat_width = cols.max() - cols.min() + 1
+        boat_height = rows.max() - rows.min() + 1
+        if boat_width > boat_height:
+            orientation = "Horizontal"
+        elif boat_height > boat_width:
+            orientation = "Vertical"
+        else:
+            orientation = "Unknown"
+        boats_data.append({
+            "occupied_cells": sorted((int(r), int(c)) for r, c in zip(rows, cols)),
+            "size": int(len(rows)),
+            "orientation": orientation
+        })
+    return boats_data
+
+
+def boats_to_matrix(output):
+    """
+    Turn the {"boats": [...]} output into a 10x10 occupancy matrix (same as boatsToMatrix in route.ts).
+
+    Args:
+        output (dict): Output of process_board
+
+    Returns:
+        numpy.ndarray: 10x10 uint8 matrix with 1 where a boat covers the cell
+    """
+    matrix = np.zeros((10, 10), dtype=np.uint8)
+    for boat in output["boats"]:
+        for row, col in boat["occupied_cells"]:
+            if 0 <= row < 10 and 0 <= col < 10:
+                matrix[row, col] = 1
+    return matrix
+
+
+def process_board(image, scale=1, mode="contours", snap=False):
+    """
+    Run the whole pipeline on a board image.
+
+    Args:
+        image (numpy.ndarray): Mirrored BGR image from load_image / decode_image
+        scale (int): Scale the image was decoded at, used to scale the size-dependent settings
+        mode (str): "contours" finds the boat contours on a full warp, "cells" classifies every cell on a
+            small warp (see classify_cells) and also returns the per-cell confidence
+        snap (bool): Replace the detected boats with the most likely legal fleet (see fleet_index.py), only
+            when about the 17 cells of a fleet were detected, otherwise the boats are kept and "valid" is False
+
+    Returns:
+        dict: {"boats": [...]}, the output the game logic expects ("cells" mode adds "confidence", snap adds
+            "snapped", "valid" and "corrected_cells")
+    """
+    min_marker_area, warp_size = scaled_settings(scale)
+
+    coordinates = find_corner_markers(image, min_marker_area)
+    #now we have the marker centres that can be used as the corners of the grid.
+    corners = order_corners(coordinates)
+
+    if mode == "cells":
+        cells = classify_cells(image, corners)
+        output = {"boats": matrix_to_boats(cells["occupancy"]), "confidence": np.round(cells["confidence"], 2).tolist()}
+        #confidence 0 is a coin flip, 1 is certain either way
+        probability = np.where(cells["occupancy"] == 1, 0.5 + cells["confidence"] / 2, 0.5 - cells["confidence"] / 2)
     else:
-        orientation = "Unknown"
-
-    #print info, will later be sent to game logic. (THIS IS THE OUTPUT WE NEED)
-    # print(f"Boat at grid cells: {occupied_cells}")
-    # print(f"Boat size: {boat_size} grid cells")
-    # print(f"Boat orientation: {orientation}")
-
-    #the code below is purely for visualisation and will not be functional in the final design
-    # cv2.rectangle(warped, (x, y), (x + w, y + h), (255, 0, 0), 2)
-    # cv2.putText(warped, f"{boat_size} cells", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-    # cv2.putText(warped, orientation, (x, y - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-
-    # populate json
-    boats_data.append({
-        "occupied_cells": sorted(list(occupied_cells)),  # sort for readability
-        "size": boat_size,
-        "orientation": orientation
-    })
-
-output = {"boats": boats_data}
-print(json.dumps(output, indent=4))
+        warped = warp_board(image, corners, warp_size)
+
+        # cv2.imshow("Board State", warped) #purely visualisation
+        # cv2.waitKey(2000)  #shows image briefly
+
+        output = {"boats": detect_boats(warped)}
+        #contours give no confidence, trust every cell the same
+        probability = np.where(boats_to_matrix(output) == 1, 0.8, 0.2)
+
+    if snap:
+        snapped = snap_fleet(probability)
+        #far from a full fleet (e.g. still being set up): keep what was detected instead of inventing ships
+        if snapped["snapped"]:
+            output["boats"] = snapped["boats"]
+        output["snapped"] = snapped["snapped"]
+        output["valid"] = snapped["valid"]
+        output["corrected_cells"] = snapped["corrected_cells"]
+    return output
+
+
+def record_frame(archive, image_path, timestamp):
+    """
+    Append the encoded image to a capture archive, same file as the voice recordings.
+
+    Args:
+        archive (str): Archive path
+        image_path (str): Path to the image
+        timestamp (float): Capture time (time.time())
+    """
+    #session_archive.py lives with the voice code (same as OldVoiceRecog.py finds keyword_recognizer.py)
+    voice_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "VoiceRecognition")
+    sys.path.insert(0, os.path.normpath(voice_dir))
+    from session_archive import append_file
+    append_file(archive, "frame", image_path, timestamp)
+
+
+def main():
+    # Parse command-line argument for image path.
+    parser = argparse.ArgumentParser(description="Process board image to JSON")
+    parser.add_argument("--image", required=True, help="Path to input image")
+    parser.add_argument("--scale", type=int, default=DECODE_SCALE, choices=sorted(DECODE_FLAGS),
+                        help="Decode the image at 1/scale resolution")
+    parser.add_argument("--mode", default="contours", choices=["contours", "cells"],
+                        help="contours: boat contours on a full warp, cells: classify every cell on a small warp")
+    parser.add_argument("--snap", action="store_true",
+                        help="Correct the boats to the most likely legal fleet [5, 4, 3, 3, 2]")
+    parser.add_argument("--skip-quality-check", action="store_true",
+                        help="Run the full pipeline even if the image looks too dark, overexposed or blurry")
+    parser.add_argument("--min-sharpness", type=float, default=MIN_MARKER_SHARPNESS,
+                        help="Reject captures whose marker edges are less sharp than this (default: off)")
+    parser.add_argument("--record", default=RECORD_ARCHIVE,
+                        help="Append the image to this capture archive first (default: $BATTLESHIP_RECORD_ARCHIVE)")
+    args = parser.parse_args()
+
+    #record before anything else so rejected captures end up in the archive as well
+    if args.record:
+        try:
+            record_frame(args.record, args.image, time.time())
+        except Exception as e:
+            #stdout is parsed by route.ts, a failed recording must not break the board result
+            print(f"Could not record the image to {args.record}: {e}", file=sys.stderr)
+
+    data = np.fromfile(args.image, dtype=np.uint8)  # Use the image path provided
+
+    #reject bad captures straight away, the caller can take a new picture instead of getting a wrong board
+    image = None
+    if not args.skip_quality_check:
+        #a baseline JPEG is checked on a reduced decode, anything else is decoded once and shrunk by check_quality
+        quality_scale = quality_decode_scale(data)
+        if quality_scale is not None:
+            small = decode_image(data, quality_scale)
+        else:
+            small = image = decode_image(data, args.scale)
+        quality = check_quality(small, args.min_sharpness)
+        if not quality["ok"]:
+            print(json.dumps({"boats": [], "rejected": quality["reason"], "quality": quality["metrics"]}, indent=4))
+            return
+
+    if image is None:
+        image = decode_image(data, args.scale)
+
+    output = process_board(image, args.scale, args.mode, args.snap)
+    print(json.dumps(output, indent=4))
+
+
+if __name__ == "__main__":
+    main()
 
 ####################### DISPLAY IMAGE ANG GRID INFO #######################
 ####################### ALL CODE BELOW IS PURELY FOR VISUALISATION AND IS NOT NEEDED #######################
@@ -227,4 +648,4 @@ print(json.dumps(output, indent=4))
 #code to save image below
 # cv2.imwrite("GameStateOutput.png", resized_image)
 # cv2.imshow("Board State", resized_image)
-# cv2.waitKey(3000)  #shows image briefly before termination, image can be opened after (GameStateOutput.png)
\ No newline at end of file
+# cv2.waitKey(3000)  #shows image briefly before termination, image can be opened after (GameStateOutput.png)
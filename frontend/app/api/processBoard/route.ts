@@ -49,6 +49,16 @@ export async function POST(req: NextRequest) {
 
     // Parse the JSON output from the Python script.
     let boardData = JSON.parse(stdout)
+
+    // The quality check rejected the capture (too dark, overexposed, blurry or no markers), so take a new picture.
+    if (boardData.rejected) {
+      fs.unlinkSync(tempImagePath);
+      return NextResponse.json(
+        { error: `Image rejected: ${boardData.rejected}`, reason: boardData.rejected, quality: boardData.quality },
+        { status: 422 }
+      );
+    }
+
     boardData = boatsToMatrix(boardData)
     console.log("Board data:", boardData)
 
@@ -0,0 +1,173 @@
+"""
+Placement-count targeting heatmap (the medium/hard bot of actions/probability.ts) in NumPy.
+
+generateProbabilitiesForAllShips builds one 10x10 matrix per legal ship placement
+and adds them up one by one. placement_heatmap gives the same matrix with sliding
+window sums instead:
+
+- a window of a ship is legal when it contains no miss (window sum of the misses)
+- its weight is shipLength * multiplier, where the multiplier counts the hits in the
+  window: 4 * hits for rows, 4 for columns with any hit (as in probability.ts), 1 without
+- every cell gets the sum of the weights of the legal windows covering it (a second
+  sliding sum), except cells that are already hits
+
+All arrays may carry leading batch dimensions, so many boards (e.g. every board of a
+simulation, or every candidate after a hypothetical shot) are scored in one call.
+
+Usage (checks against a direct port of probability.ts and compares the speed):
+    python targeting.py [--boards 2000] [--shots 30]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+GRID = 10
+SHIPS = [5, 4, 3, 3, 2]  # default of generateProbabilitiesForAllShips
+
+
+def _window_sum(values, length, axis):
+    """Sum of every `length` consecutive entries along axis (size - length + 1 windows)."""
+    cumulative = np.cumsum(values, axis=axis)
+    zero = np.zeros_like(np.take(cumulative, [0], axis=axis))
+    cumulative = np.concatenate([zero, cumulative], axis=axis)
+    size = values.shape[axis]
+    return (np.take(cumulative, np.arange(length, size + 1), axis=axis)
+            - np.take(cumulative, np.arange(0, size - length + 1), axis=axis))
+
+
+def _spread(weights, length, axis):
+    """Give every cell the sum of the weights of the windows that cover it (inverse of _window_sum)."""
+    pad = [(0, 0)] * weights.ndim
+    pad[axis] = (length - 1, length - 1)
+    return _window_sum(np.pad(weights, pad), length, axis)
+
+
+def placement_heatmap(hits, misses, ships=SHIPS):
+    """
+    Hit-weighted placement counts, the same numbers as generateProbabilitiesForAllShips.
+
+    Args:
+        hits (array-like): (..., 10, 10), 1 where a shot hit (same as boardHits)
+        misses (array-like): (..., 10, 10), non-zero where a shot missed (same as boardMisses)
+        ships (list): Ship lengths, a length that appears twice counts twice
+
+    Returns:
+        numpy.ndarray: (..., 10, 10) int64 heatmap
+    """
+    hits = np.asarray(hits) == 1
+    misses = np.asarray(misses) != 0
+    # probability.ts only looks at hits inside windows without misses, so a cell marked both counts as a miss
+    hits = hits & ~misses
+    hit_counts = hits.astype(np.int64)
+    miss_counts = misses.astype(np.int64)
+
+    heatmap = np.zeros(np.broadcast_shapes(hits.shape, misses.shape), dtype=np.int64)
+    lengths, counts = np.unique(np.asarray(ships), return_counts=True)
+    for length, count in zip(lengths.tolist(), counts.tolist()):
+        # rows (along the last axis): multiplier 4 * number of hits
+        legal = _window_sum(miss_counts, length, axis=-1) == 0
+        window_hits = _window_sum(hit_counts, length, axis=-1)
+        weights = np.where(window_hits > 0, 4 * window_hits, 1) * legal
+        heatmap += count * length * _spread(weights, length, axis=-1)
+
+        # columns: multiplier 4 with any hit
+        legal = _window_sum(miss_counts, length, axis=-2) == 0
+        window_hits = _window_sum(hit_counts, length, axis=-2)
+        weights = np.where(window_hits > 0, 4, 1) * legal
+        heatmap += count * length * _spread(weights, length, axis=-2)
+
+    # a hit cell gets 0 in every placement that covers it
+    heatmap[hits] = 0
+    return heatmap
+
+
+def next_move(heatmap):
+    """
+    Pick the cell with the highest value, the first one in row-major order on ties (like generateNextMove).
+
+    Args:
+        heatmap (numpy.ndarray): (..., 10, 10) heatmap
+
+    Returns:
+        tuple: (row, col), as ints for a single board or as arrays for a batch
+    """
+    heatmap = np.asarray(heatmap)
+    flat = heatmap.reshape(heatmap.shape[:-2] + (GRID * GRID,))
+    best = np.argmax(flat, axis=-1)
+    row, col = np.divmod(best, GRID)
+    if heatmap.ndim == 2:
+        return int(row), int(col)
+    return row, col
+
+
+def _reference_heatmap(hits, misses, ships=SHIPS):
+    """Direct port of possibleLocationsProbability / generateProbabilitiesForAllShips, for checking."""
+    final = [[0] * GRID for _ in range(GRID)]
+    for length in ships:
+        for row in range(GRID):
+            for col in range(GRID - length + 1):
+                cells = [(row, k) for k in range(col, col + length)]
+                if all(misses[r][c] == 0 for r, c in cells):
+                    hit = [(r, c) for r, c in cells if hits[r][c] == 1]
+                    multiplier = 4 * len(hit) if hit else 1
+                    for r, c in cells:
+                        final[r][c] += 0 if (r, c) in hit else length * multiplier
+        for col in range(GRID):
+            for row in range(GRID - length + 1):
+                cells = [(k, col) for k in range(row, row + length)]
+                if all(misses[r][c] == 0 for r, c in cells):
+                    hit = [(r, c) for r, c in cells if hits[r][c] == 1]
+                    multiplier = 4 if hit else 1
+                    for r, c in cells:
+                        final[r][c] += 0 if (r, c) in hit else length * multiplier
+    return np.array(final)
+
+
+def random_boards(count, shots, rng):
+    """Random hit/miss boards with `shots` shots each (about a fifth of them hits)."""
+    hits = np.zeros((count, GRID, GRID), dtype=np.int8)
+    misses = np.zeros((count, GRID, GRID), dtype=np.int8)
+    for i in range(count):
+        cells = rng.choice(GRID * GRID, size=shots, replace=False)
+        is_hit = rng.random(shots) < 0.2
+        hits[i].flat[cells[is_hit]] = 1
+        misses[i].flat[cells[~is_hit]] = 1
+    return hits, misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the NumPy targeting heatmap")
+    parser.add_argument("--boards", type=int, default=2000, help="Random boards to score")
+    parser.add_argument("--shots", type=int, default=30, help="Shots already taken on every board")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random boards")
+    args = parser.parse_args()
+
+    hits, misses = random_boards(args.boards, args.shots, np.random.default_rng(args.seed))
+
+    checked = min(args.boards, 200)
+    start = time.perf_counter()
+    reference = [_reference_heatmap(hits[i], misses[i]) for i in range(checked)]
+    loop_time = (time.perf_counter() - start) / checked
+
+    start = time.perf_counter()
+    single = [placement_heatmap(hits[i], misses[i]) for i in range(checked)]
+    single_time = (time.perf_counter() - start) / checked
+
+    start = time.perf_counter()
+    batch = placement_heatmap(hits, misses)
+    rows, cols = next_move(batch)
+    batch_time = (time.perf_counter() - start) / args.boards
+
+    mismatches = sum(not np.array_equal(reference[i], single[i]) or not np.array_equal(reference[i], batch[i])
+                     for i in range(checked))
+    moves = sum(next_move(reference[i]) != (rows[i], cols[i]) for i in range(checked))
+    print(f"Checked {checked} boards against the probability.ts port: {mismatches} heatmap and {moves} move mismatches")
+    print(f"probability.ts port : {loop_time * 1e6:9.1f} us per board")
+    print(f"NumPy, one board    : {single_time * 1e6:9.1f} us per board")
+    print(f"NumPy, {args.boards} boards : {batch_time * 1e6:9.1f} us per board")
+
+
+if __name__ == "__main__":
+    main()
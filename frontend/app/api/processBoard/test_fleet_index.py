@@ -0,0 +1,90 @@
+"""
+Tests for fleet_index.py: the branch and bound against brute force, and when snapping is skipped.
+
+Run with:
+    python -m pytest frontend/app/api/processBoard
+"""
+
+import os
+import random
+
+import numpy as np
+
+from bitboard import GRID, mask_to_matrix, placement_matrix, placements
+from fleet_index import best_fleet, cell_log_odds, snap_fleet
+from montecarlo_bot import random_layout
+from process_board import load_image, process_board
+
+TEST_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "public", "testImage.jpg")
+
+
+def brute_force_best(probability):
+    """Best score of every [3, 2, 2] layout (the two 2-ships as unordered pairs)."""
+    scores = cell_log_odds(probability)
+    cells_3 = placement_matrix(3).astype(bool)
+    cells_2 = placement_matrix(2).astype(bool)
+    scores_3 = cells_3 @ scores
+    scores_2 = cells_2 @ scores
+    # pairs of 2-ships that do not overlap, and their summed score
+    pair_overlap = (cells_2.astype(int) @ cells_2.T.astype(int)) > 0
+    pair_scores = scores_2[:, None] + scores_2[None, :]
+    upper = np.triu(np.ones_like(pair_overlap), k=1)
+
+    best = -np.inf
+    for i in range(len(placements(3))):
+        free_2 = ~(cells_2 & cells_3[i]).any(axis=1)
+        legal = upper & ~pair_overlap & free_2[:, None] & free_2[None, :]
+        if legal.any():
+            best = max(best, scores_3[i] + pair_scores[legal].max())
+    return best
+
+
+def test_branch_and_bound_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(15):
+        probability = rng.uniform(0, 1, (GRID, GRID))
+        layout, score = best_fleet(probability, [3, 2, 2])
+        assert np.isclose(score, brute_force_best(probability))
+        # the layout is legal and scores what best_fleet says
+        occupied = 0
+        for mask in layout:
+            assert not mask & occupied
+            occupied |= mask
+        assert np.isclose(sum(mask_to_matrix(mask).ravel() @ cell_log_odds(probability) for mask in layout), score)
+
+
+def test_snaps_a_fleet_with_a_few_mistakes():
+    truth = mask_to_matrix(random_layout(random.Random(1)))
+    probability = np.where(truth == 1, 0.8, 0.2)
+    # one ship cell missed, one shadow detected, at about 60 % confidence
+    ship_cell = tuple(np.argwhere(truth == 1)[0])
+    water_cell = tuple(np.argwhere(truth == 0)[0])
+    probability[ship_cell] = 0.4
+    probability[water_cell] = 0.6
+
+    result = snap_fleet(probability)
+    assert result["snapped"]
+    assert np.array_equal(result["occupancy"], truth)
+    assert sorted(result["corrected_cells"]) == sorted([ship_cell, water_cell])
+    assert not result["valid"]
+
+
+def test_board_far_from_a_full_fleet_is_left_alone():
+    probability = np.full((GRID, GRID), 0.2)
+    probability[4, 2:6] = 0.8  # one boat, e.g. while the board is being set up
+
+    result = snap_fleet(probability)
+    assert not result["snapped"]
+    assert result["boats"] is None
+    assert result["corrected_cells"] == []
+    assert not result["valid"]
+    assert np.array_equal(result["occupancy"], (probability > 0.5).astype(np.uint8))
+
+
+def test_process_board_keeps_the_detected_boats_when_not_snapped():
+    image = load_image(TEST_IMAGE)
+    plain = process_board(image)
+    snapped = process_board(image, snap=True)
+    assert snapped["boats"] == plain["boats"]
+    assert snapped["snapped"] is False
+    assert snapped["valid"] is False
@@ -0,0 +1,113 @@
+"""
+Tests for process_board.py on the sample captures in the repo and on frames of board_generator.py.
+
+Run with:
+    python -m pytest frontend/app/api/processBoard
+"""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from board_generator import generate_frame
+from process_board import (boats_to_matrix, check_quality, classify_cells, decode_image, find_corner_markers,
+                           load_image, matrix_to_boats, order_corners, process_board, quality_decode_scale,
+                           scaled_settings)
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..")
+ESP_PHOTO = os.path.join(REPO, "ImageProcessing", "espphoto3.png")
+TEST_IMAGE = os.path.join(REPO, "frontend", "public", "testImage.jpg")
+
+
+def synthetic_frame(index, seed=0):
+    data, label = generate_frame(index, seed)
+    return decode_image(data), label
+
+
+def test_sharp_esp32_capture_passes_the_gate():
+    # an empty board with 4 markers, the board itself has almost no texture
+    image = load_image(ESP_PHOTO)
+    assert check_quality(image)["ok"]
+    assert check_quality(image, min_sharpness=0.4)["ok"]
+
+
+def test_blurred_frame_is_rejected_when_the_blur_check_is_on():
+    image, _ = synthetic_frame(4)
+    blurred = cv2.GaussianBlur(image, (0, 0), 8)
+
+    assert check_quality(image, min_sharpness=0.4)["ok"]
+    quality = check_quality(blurred, min_sharpness=0.4)
+    assert quality["reason"] == "blurry"
+    assert quality["metrics"]["marker_sharpness"] < check_quality(image)["metrics"]["marker_sharpness"]
+    # off by default until it is calibrated on more real ESP32 frames
+    assert check_quality(blurred)["ok"]
+
+
+def test_dark_and_overexposed_frames_are_rejected():
+    image, _ = synthetic_frame(1)
+    assert check_quality((image * 0.2).astype(np.uint8))["reason"] == "too_dark"
+    assert check_quality(np.full_like(image, 255))["reason"] == "overexposed"
+
+
+def test_quality_copy_is_decoded_at_a_reduced_scale():
+    data, _ = generate_frame(0)
+    scale = quality_decode_scale(np.frombuffer(data, dtype=np.uint8))
+    # a 640x480 frame still gives the 160x120 copy at 1/4
+    assert scale == 4
+    with open(ESP_PHOTO, "rb") as f:
+        assert quality_decode_scale(f.read()) is None  # PNG, decoded once and shrunk instead
+
+
+def test_scaled_settings():
+    assert scaled_settings(1) == (10, 500)
+    assert scaled_settings(2) == (2.5, 250)
+    # the warp stays a multiple of 10 so every cell has the same size, and never below 100
+    assert scaled_settings(4) == (0.625, 120)
+    assert scaled_settings(8) == (10 / 64, 100)
+
+
+def test_matrix_to_boats():
+    occupancy = np.zeros((10, 10), dtype=np.uint8)
+    occupancy[7, 5:9] = 1
+    occupancy[3:5, 4] = 1
+    occupancy[0, 0] = 1
+    boats = sorted(matrix_to_boats(occupancy), key=lambda boat: boat["size"])
+    assert boats == [
+        {"occupied_cells": [(0, 0)], "size": 1, "orientation": "Unknown"},
+        {"occupied_cells": [(3, 4), (4, 4)], "size": 2, "orientation": "Vertical"},
+        {"occupied_cells": [(7, 5), (7, 6), (7, 7), (7, 8)], "size": 4, "orientation": "Horizontal"},
+    ]
+    assert np.array_equal(boats_to_matrix({"boats": boats}), occupancy)
+
+
+def test_classify_cells():
+    image, label = synthetic_frame(2)
+    cells = classify_cells(image, order_corners(find_corner_markers(image)))
+    truth = np.array(label["occupancy"])
+    assert np.array_equal(cells["occupancy"], truth)
+    assert cells["green_fraction"].shape == cells["confidence"].shape == (10, 10)
+    assert cells["mean_hsv"].shape == (10, 10, 3)
+    # boat cells are mostly green, water cells hardly
+    assert cells["green_fraction"][truth == 1].min() > cells["green_fraction"][truth == 0].max()
+    assert ((cells["confidence"] >= 0) & (cells["confidence"] <= 1)).all()
+
+
+@pytest.mark.parametrize("mode", ["contours", "cells"])
+def test_sample_capture(mode):
+    result = process_board(load_image(TEST_IMAGE), mode=mode)
+    expected = np.zeros((10, 10), dtype=np.uint8)
+    expected[7, 5:9] = 1
+    expected[3:5, 4] = 1
+    assert np.array_equal(boats_to_matrix(result), expected)
+    assert sorted(boat["size"] for boat in result["boats"]) == [2, 4]
+
+
+@pytest.mark.parametrize("scale", [1, 2])
+@pytest.mark.parametrize("mode", ["contours", "cells"])
+@pytest.mark.parametrize("index", range(5))
+def test_synthetic_frames(index, mode, scale):
+    data, label = generate_frame(index)
+    result = process_board(decode_image(data, scale), scale, mode)
+    assert np.array_equal(boats_to_matrix(result), np.array(label["occupancy"]))
@@ -5,6 +5,33 @@ import librosa
 import re
 import wave
 import sys
+import os
+
+# Optional offline keyword recognizer (VoiceRecognition/keyword_recognizer.py).
+# Set BATTLESHIP_KEYWORD_TEMPLATES to a folder of recorded coordinates to skip Google when it is confident.
+# route.ts starts this script for every request, the template features are cached in keyword_templates.npz
+# inside that folder so only the first request after the templates change computes them.
+KEYWORD_TEMPLATES_DIR = os.environ.get("BATTLESHIP_KEYWORD_TEMPLATES")
+KEYWORD_MIN_CONFIDENCE = 0.2
+
+
+def load_keyword_recognizer():
+    if not KEYWORD_TEMPLATES_DIR:
+        return None
+    voice_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "VoiceRecognition")
+    sys.path.insert(0, os.path.normpath(voice_dir))
+    from keyword_recognizer import KeywordRecognizer
+    # stdout is read by route.ts, so nothing else may be printed
+    return KeywordRecognizer.from_directory(KEYWORD_TEMPLATES_DIR, verbose=False)
+
+
+def recognize_keyword(keyword_recognizer, audio):
+    # speech_recognition gives raw PCM, the recognizer expects float32 at 16kHz
+    pcm = np.frombuffer(audio.get_raw_data(convert_rate=16000, convert_width=2), dtype=np.int16)
+    coordinate, confidence = keyword_recognizer.recognize(pcm.astype(np.float32) / 32768.0)
+    if coordinate and confidence >= KEYWORD_MIN_CONFIDENCE:
+        return coordinate
+    return None
 
 
 def is_valid_coordinate(input_text):
@@ -30,6 +57,7 @@ def process_audio(recognizer, audio_source):
 def recognize_coordinates_from_mic():
     recognizer = sr.Recognizer()
     microphone = sr.Microphone()
+    keyword_recognizer = load_keyword_recognizer()
 
     # print("Say a coordinate (e.g., A5):")
 
@@ -40,6 +68,12 @@ def recognize_coordinates_from_mic():
                 # print("Listening...")
                 audio = recognizer.listen(source)
 
+            # Offline recognizer first (no network round trip), Google only when it is not confident
+            if keyword_recognizer is not None:
+                coordinate = recognize_keyword(keyword_recognizer, audio)
+                if coordinate:
+                    return coordinate
+
             # Process and validate the recognized text
             text = recognizer.recognize_google(audio).replace(" ", "")
             if text and is_valid_coordinate(text):